@@ -0,0 +1,314 @@
+"""
+Benchmarks each stage of processing a diff, on a pair of synthetic workbooks generated to a given shape, and appends the
+results to a file as a line of JSON, so runs can be compared across commits.
+
+Each stage is timed, as the fastest of a number of runs, and then measured in a separate run for the peak memory
+allocated during it, as traced by tracemalloc, and the peak resident set size of the process once it's finished, where
+the platform reports it. Tracing memory slows Python down considerably, so the two aren't measured in the same run.
+
+Run from the repository root with: python -m benchmarks.diff_stages [options]   (see --help)
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import openpyxl
+
+from diff import TableDiff, TableReference
+from tablewriter import append_table_sheet
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where the resident set size isn't reported.
+    resource = None
+
+
+SHEET_NAME: str = "Data"
+"""The name of the sheet the generated tables are on."""
+
+TABLE_NAME: str = "Table1"
+"""The name of the generated tables."""
+
+DEFAULT_OUTPUT_PATH: str = "bench_output.txt"
+"""The file results are appended to by default, relative to the working directory."""
+
+
+def generate_pair(directory:           str,
+                  row_count:           int,
+                  column_count:        int,
+                  key_column_count:    int,
+                  change_ratio:        float,
+                  insert_delete_ratio: float,
+                  unique_column_count: int,
+                  seed:                int) \
+        -> tuple[str, str]:
+    """
+    Generates a pair of Excel files, each containing a table, where the second is a modified copy of the first.
+    :param directory: The directory to write the files to.
+    :param row_count: The number of rows in the first table.
+    :param column_count: The number of columns shared by both tables, including the key columns.
+    :param key_column_count: The number of columns that make up the tables' compound key.
+    :param change_ratio: The proportion of rows common to both tables with a value changed in the second.
+    :param insert_delete_ratio: The proportion of rows of the first table deleted from the second, and, separately, the
+                                number of rows inserted into the second table, as a proportion of the first's rows.
+    :param unique_column_count: The number of columns only in the first table, and, separately, only in the second.
+    :param seed: The seed for the random choice of values, changes, insertions and deletions.
+    :return: A tuple of the filepaths of the first and second files.
+    """
+
+    rng = random.Random(seed)
+    key_column_names:   list[str] = [f"Key{i + 1}" for i in range(key_column_count)]
+    value_column_names: list[str] = [f"Value{i + 1}" for i in range(column_count - key_column_count)]
+    first_column_names:  list[str] = (key_column_names + value_column_names
+                                      + [f"OnlyInFirst{i + 1}" for i in range(unique_column_count)])
+    second_column_names: list[str] = (key_column_names + value_column_names
+                                      + [f"OnlyInSecond{i + 1}" for i in range(unique_column_count)])
+
+    first_rows: list[list[Any]] = [_make_row(rng, row_no, key_column_count, len(first_column_names))
+                                   for row_no in range(row_count)]
+    second_rows: list[list[Any]] = []
+
+    for row in first_rows:
+        if(rng.random() < insert_delete_ratio):
+            continue
+
+        row = row.copy()
+
+        if(len(value_column_names) > 0 and rng.random() < change_ratio):
+            position: int = key_column_count + rng.randrange(len(value_column_names))
+            row[position] = _make_value(rng, position)
+
+        second_rows.append(row)
+
+    for row_no in range(row_count, row_count + int(row_count * insert_delete_ratio)):
+        second_rows.insert(rng.randrange(len(second_rows) + 1),
+                           _make_row(rng, row_no, key_column_count, len(second_column_names)))
+
+    first_path:  str = os.path.join(directory, "first.xlsx")
+    second_path: str = os.path.join(directory, "second.xlsx")
+    _write_table(first_path,  first_column_names,  first_rows)
+    _write_table(second_path, second_column_names, second_rows)
+    return first_path, second_path
+
+
+def measure_stages(diff: TableDiff, repeats: int) -> dict[str, dict[str, Any]]:
+    """
+    Processes and saves a diff stage by stage, a number of times for timing and once more for memory.
+    :param diff: The diff to benchmark. This is processed repeatedly.
+    :param repeats: The number of runs to time each stage over.
+    :return: The measurements of each stage, mapped against the name of the stage, in order. Each has the fastest time
+             taken in "seconds", the peak memory allocated in "peak_traced_bytes", including what was allocated by
+             earlier stages and still held, how far that peak was above the memory allocated when the stage started in
+             "peak_traced_bytes_above_start", and the peak resident set size of the process in "max_rss_bytes", which is
+             None where the platform doesn't report it.
+    """
+
+    stages: list[tuple[str, Callable[[], None]]] = [
+        ("load",           diff.load_tables),
+        ("index",          diff.build_table_indices),
+        ("row_diff",       diff.read_row_differences),
+        ("unique_rows",    diff.read_rows_only_in_second),
+        ("unique_columns", lambda: (diff.read_columns_only_in_first(), diff.read_columns_only_in_second())),
+        ("save",           diff.save_to_file)
+    ]
+
+    results: dict[str, dict[str, Any]] = {name: {"seconds": float("inf")} for name, _ in stages}
+
+    for _ in range(repeats):
+        _reset(diff)
+
+        for name, stage in stages:
+            start: float = time.perf_counter()
+            stage()
+            results[name]["seconds"] = min(results[name]["seconds"], time.perf_counter() - start)
+
+    _reset(diff)
+    tracemalloc.start()
+
+    try:
+        for name, stage in stages:
+            tracemalloc.reset_peak()
+            traced_at_start: int = tracemalloc.get_traced_memory()[0]
+            stage()
+            results[name]["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+            results[name]["peak_traced_bytes_above_start"] = results[name]["peak_traced_bytes"] - traced_at_start
+            results[name]["max_rss_bytes"] = _get_max_rss_bytes()
+    finally:
+        tracemalloc.stop()
+        _reset(diff)
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks each stage of processing a diff of synthetic workbooks.")
+    parser.add_argument("--rows",                type=int,   default=50_000, help="rows in the first table")
+    parser.add_argument("--columns",             type=int,   default=10,     help="shared columns, including keys")
+    parser.add_argument("--key-columns",         type=int,   default=1,      help="columns in the compound key")
+    parser.add_argument("--change-ratio",        type=float, default=0.05,   help="proportion of common rows changed")
+    parser.add_argument("--insert-delete-ratio", type=float, default=0.01,   help="proportion of rows inserted/deleted")
+    parser.add_argument("--unique-columns",      type=int,   default=1,      help="columns only in each table")
+    parser.add_argument("--seed",                type=int,   default=0,      help="seed for generating the tables")
+    parser.add_argument("--repeats",             type=int,   default=3,      help="runs to time each stage over")
+    parser.add_argument("--read-only",           action="store_true",        help="load the tables in read-only mode")
+    parser.add_argument("--direct-parse",        action="store_true",        help="parse worksheets directly")
+    parser.add_argument("--columnwise",          action="store_true",        help="compare rows column by column")
+    parser.add_argument("--compact-columns",     action="store_true",        help="store columns as typed columns")
+    parser.add_argument("--label",               default="",                 help="a label to record with the results")
+    parser.add_argument("--output",              default=DEFAULT_OUTPUT_PATH, help="file to append results to")
+    args = parser.parse_args()
+
+    if(not 0 < args.key_columns <= args.columns):
+        parser.error("--key-columns must be between 1 and --columns.")
+
+    config: dict[str, Any] = {"rows":                args.rows,
+                              "columns":             args.columns,
+                              "key_columns":         args.key_columns,
+                              "change_ratio":        args.change_ratio,
+                              "insert_delete_ratio": args.insert_delete_ratio,
+                              "unique_columns":      args.unique_columns,
+                              "seed":                args.seed,
+                              "repeats":             args.repeats,
+                              "read_only":           args.read_only,
+                              "direct_parse":        args.direct_parse,
+                              "columnwise":          args.columnwise,
+                              "compact_columns":     args.compact_columns}
+
+    with tempfile.TemporaryDirectory(prefix="ExcelDiff-bench-") as directory:
+        start: float = time.perf_counter()
+        first_path, second_path = generate_pair(directory, args.rows, args.columns, args.key_columns,
+                                                args.change_ratio, args.insert_delete_ratio, args.unique_columns,
+                                                args.seed)
+        print(f"Generated tables in {time.perf_counter() - start:.2f}s")
+
+        diff = TableDiff(TableReference(first_path,  SHEET_NAME, TABLE_NAME),
+                         TableReference(second_path, SHEET_NAME, TABLE_NAME),
+                         os.path.join(directory, "result.xlsx"),
+                         [f"Key{i + 1}" for i in range(args.key_columns)],
+                         read_only             = args.read_only,
+                         columnwise_comparison = args.columnwise,
+                         direct_parse          = args.direct_parse,
+                         compact_columns       = args.compact_columns)
+
+        stages: dict[str, dict[str, Any]] = measure_stages(diff, args.repeats)
+
+    record: dict[str, Any] = {"label":     args.label,
+                              "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                              "commit":    _get_commit(),
+                              "python":    platform.python_version(),
+                              "platform":  platform.platform(),
+                              "config":    config,
+                              "stages":    stages,
+                              "total_seconds": sum(x["seconds"] for x in stages.values())}
+
+    with open(args.output, "a", encoding="utf-8") as file:
+        file.write(json.dumps(record) + "\n")
+
+    print(f"{'Stage':<16} {'Time (s)':>10} {'Peak traced (MiB)':>18} {'Stage peak (MiB)':>17} {'Max RSS (MiB)':>14}")
+
+    for name, stage in stages.items():
+        max_rss: str = f"{stage['max_rss_bytes'] / 1024 ** 2:.1f}" if stage["max_rss_bytes"] is not None else "-"
+        print(f"{name:<16} {stage['seconds']:>10.3f} {stage['peak_traced_bytes'] / 1024 ** 2:>18.1f} "
+              f"{stage['peak_traced_bytes_above_start'] / 1024 ** 2:>17.1f} {max_rss:>14}")
+
+    print(f"{'Total':<16} {record['total_seconds']:>10.3f}")
+    print(f"Results appended to {args.output}")
+
+
+def _make_row(rng: random.Random, row_no: int, key_column_count: int, column_count: int) -> list[Any]:
+    """
+    Makes a row of a generated table, with a unique compound key derived from the row number.
+    :param rng: The random number generator to make values with.
+    :param row_no: The number of the row, unique across both tables.
+    :param key_column_count: The number of key columns.
+    :param column_count: The number of columns in the row, including the key columns.
+    :return: The values of the row.
+    """
+
+    # The first key column alone is unique. Any others vary so the compound key has to be used in full.
+    key: list[Any] = [row_no] + [f"K{i}-{row_no % (i + 7)}" for i in range(1, key_column_count)]
+    return key + [_make_value(rng, position) for position in range(key_column_count, column_count)]
+
+
+def _make_value(rng: random.Random, position: int) -> Any:
+    """
+    Makes a random value for a cell, of a type depending on its column, so tables mix strings, integers and floats.
+    :param rng: The random number generator to make the value with.
+    :param position: The position of the cell's column in its table.
+    :return: The value made.
+    """
+
+    kind: int = position % 3
+
+    if(kind == 0):
+        return f"Text {rng.randrange(1_000_000)}"
+
+    if(kind == 1):
+        return rng.randrange(1_000_000)
+
+    return round(rng.uniform(0, 1_000_000), 2)
+
+
+def _write_table(filepath: str, column_names: list[str], rows: list[list[Any]]) -> None:
+    """
+    Writes a workbook containing a single table.
+    :param filepath: The filepath to write the workbook to.
+    :param column_names: The names of the table's columns.
+    :param rows: The values of the table's rows.
+    """
+
+    wb = openpyxl.Workbook(write_only=True)
+    append_table_sheet(wb, SHEET_NAME, TABLE_NAME, column_names, rows)
+    wb.save(filepath)
+
+
+def _reset(diff: TableDiff) -> None:
+    """
+    Resets a diff to its unprocessed state, so it can be processed again. Its key indices are rebuilt once its tables
+    are loaded again.
+    :param diff: The diff to reset.
+    """
+
+    diff.discard_loaded_tables()
+
+
+def _get_max_rss_bytes() -> int | None:
+    """
+    Gets the peak resident set size of this process so far.
+    :return: The peak resident set size in bytes, or None where the platform doesn't report it.
+    """
+
+    if(resource is None):
+        return None
+
+    max_rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Reported in bytes on macOS, but in kilobytes elsewhere.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def _get_commit() -> str | None:
+    """
+    Gets the commit the working tree is checked out at, to record with the results.
+    :return: The hash of the commit, or None if it can't be found.
+    """
+
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    main()
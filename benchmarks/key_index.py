@@ -0,0 +1,117 @@
+"""
+Micro-benchmark comparing the cost of building and looking up row key indices with string-encoded keys (the approach
+TableDiff used previously, via `Utils.dict_to_str`) against the normalised tuple keys TableDiff now uses.
+
+Run from the repository root with: python -m benchmarks.key_index [row count] [key column count]
+"""
+
+import sys
+import timeit
+from typing import Any, Callable
+
+import Utils
+from columnartable import ColumnarTable
+from diff import TableDiff, TableReference
+
+
+def make_table(row_count: int, key_column_count: int) -> ColumnarTable:
+    """
+    Makes a table with a unique compound key, mixing numeric and string key values.
+    :param row_count: The number of rows in the table.
+    :param key_column_count: The number of columns that make up the key.
+    :return: The table made.
+    """
+
+    column_names: list[str] = [f"Key{i + 1}" for i in range(key_column_count)]
+    columns: list[list[Any]] = []
+
+    for i in range(key_column_count):
+        if(i % 2 == 0):
+            columns.append([row_no // (7 ** i) for row_no in range(row_count)])
+        else:
+            columns.append([f"Code \"{row_no % (7 ** i)}\"" for row_no in range(row_count)])
+
+    return ColumnarTable(column_names, columns)
+
+
+def build_string_index(table: ColumnarTable, key_column_names: list[str]) -> dict[str, int]:
+    """Builds a row index the way TableDiff used to, with keys encoded by `Utils.dict_to_str`."""
+
+    index: dict[str, int] = {}
+    key_columns = [table.column(x) for x in key_column_names]
+
+    for row_no in range(table.row_count):
+        keys: dict[str, Any] = {name: col[row_no] for name, col in zip(key_column_names, key_columns)}
+        index[Utils.dict_to_str(keys)] = row_no
+
+    return index
+
+
+def look_up_string_index(table: ColumnarTable, key_column_names: list[str], index: dict[str, int]) -> int:
+    """Looks up every row of a table in a string-encoded index, returning the number of rows found."""
+
+    found: int = 0
+    key_columns = [table.column(x) for x in key_column_names]
+
+    for row_no in range(table.row_count):
+        keys: dict[str, Any] = {name: col[row_no] for name, col in zip(key_column_names, key_columns)}
+
+        if(index.get(Utils.dict_to_str(keys)) is not None):
+            found += 1
+
+    return found
+
+
+def build_tuple_index(diff: TableDiff, table: ColumnarTable) -> dict[tuple[str, ...], int]:
+    """Builds a row index the way TableDiff does now, with normalised tuple keys."""
+
+    index: dict[tuple[str, ...], int] = {}
+    diff._build_row_index(table, index)
+    return index
+
+
+def look_up_tuple_index(diff: TableDiff, table: ColumnarTable, index: dict[tuple[str, ...], int]) -> int:
+    """Looks up every row of a table in a tuple-keyed index, returning the number of rows found."""
+
+    return sum(1 for key in diff._iterate_normalised_keys(table) if key in index)
+
+
+def time_best_of(func: Callable[[], Any], repeats: int = 5) -> float:
+    """Gets the fastest time, in seconds, of a number of runs of the given function."""
+
+    return min(timeit.repeat(func, number=1, repeat=repeats))
+
+
+def main() -> None:
+    row_count:        int = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    key_column_count: int = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    table = make_table(row_count, key_column_count)
+    key_column_names: list[str] = table.column_names
+    ref = TableReference("", "", "")
+    diff = TableDiff(ref, ref, "", key_column_names)
+
+    string_index = build_string_index(table, key_column_names)
+    tuple_index  = build_tuple_index(diff, table)
+
+    if(len(string_index) != len(tuple_index)):
+        raise AssertionError("The two indices disagree on the number of unique keys.")
+
+    results: list[tuple[str, float, float]] = [
+        ("Index build",
+         time_best_of(lambda: build_string_index(table, key_column_names)),
+         time_best_of(lambda: build_tuple_index(diff, table))),
+        ("Lookup of every row",
+         time_best_of(lambda: look_up_string_index(table, key_column_names, string_index)),
+         time_best_of(lambda: look_up_tuple_index(diff, table, tuple_index)))
+    ]
+
+    print(f"{row_count} rows, {key_column_count} key column(s)")
+    print(f"{'Stage':<20} {'dict_to_str (s)':>16} {'tuple (s)':>12} {'speed-up':>10}")
+
+    for stage, before, after in results:
+        print(f"{stage:<20} {before:>16.4f} {after:>12.4f} {before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
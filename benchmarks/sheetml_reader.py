@@ -0,0 +1,86 @@
+"""
+Checks that SheetMLReader reads the same values as openpyxl does in read-only mode, and compares the time each takes.
+Every table in each of the given files is read both ways, and any cell whose value or type differs is reported.
+
+Run from the repository root with: python -m benchmarks.sheetml_reader <file.xlsx> [<file.xlsx> ...]
+"""
+
+import sys
+import time
+from typing import Any
+
+from columnartable import ColumnarTable, load_tables_from_file
+from xlsxmetadata import TableDefinition, read_table_definitions
+
+
+_MAX_MISMATCHES_SHOWN: int = 10
+"""The greatest number of mismatched cells to show for each table."""
+
+
+def find_mismatches(expected: ColumnarTable, actual: ColumnarTable) -> list[str]:
+    """
+    Finds the cells whose values or types differ between two readings of the same table.
+    :param expected: The table as read by openpyxl.
+    :param actual: The table as read by SheetMLReader.
+    :return: A list of descriptions of each difference found.
+    """
+
+    if(expected.column_names != actual.column_names):
+        return [f"Column names differ: {expected.column_names} != {actual.column_names}"]
+
+    if(expected.row_count != actual.row_count):
+        return [f"Row counts differ: {expected.row_count} != {actual.row_count}"]
+
+    result: list[str] = []
+
+    for column_name in expected.column_names:
+        expected_column: list[Any] = expected.column(column_name)
+        actual_column:   list[Any] = actual.column(column_name)
+
+        for row_no, (expected_value, actual_value) in enumerate(zip(expected_column, actual_column)):
+            if(type(expected_value) is not type(actual_value) or expected_value != actual_value):
+                result.append(f"Row {row_no}, column \"{column_name}\": {expected_value!r} != {actual_value!r}")
+
+    return result
+
+
+def main() -> None:
+    if(len(sys.argv) < 2):
+        print(__doc__.strip())
+        sys.exit(2)
+
+    mismatch_count: int = 0
+
+    print(f"{'File':<30} {'Table':<30} {'Cells':>10} {'openpyxl (s)':>13} {'direct (s)':>11} {'speed-up':>9}")
+
+    for filepath in sys.argv[1:]:
+        definitions: list[TableDefinition] = read_table_definitions(filepath)
+        tables: list[tuple[str, str]] = [(x.sheet_name, x.table_name) for x in definitions]
+
+        start: float = time.perf_counter()
+        expected_tables: list[ColumnarTable] = load_tables_from_file(filepath, tables, read_only=True)
+        openpyxl_seconds: float = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual_tables: list[ColumnarTable] = load_tables_from_file(filepath, tables, read_only=True, direct_parse=True)
+        direct_seconds: float = time.perf_counter() - start
+
+        for definition, expected, actual in zip(definitions, expected_tables, actual_tables):
+            mismatches: list[str] = find_mismatches(expected, actual)
+            mismatch_count += len(mismatches)
+            print(f"{filepath[-30:]:<30} {definition.sheet_name + '/' + definition.table_name:<30} "
+                  f"{definition.cell_count:>10}")
+
+            for mismatch in mismatches[:_MAX_MISMATCHES_SHOWN]:
+                print(f"    {mismatch}")
+
+        print(f"{'':<30} {'All tables':<30} {'':>10} {openpyxl_seconds:>13.3f} {direct_seconds:>11.3f} "
+              f"{openpyxl_seconds / direct_seconds:>8.1f}x")
+
+    if(mismatch_count > 0):
+        print(f"{mismatch_count} mismatched cell(s)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Contains the ColumnarTable class, an in-memory, column-oriented copy of the values of an Excel table.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, Sequence
+
+import openpyxl
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.workbook import Workbook
+
+from sheetmlreader import SheetMLReader
+from typedcolumns import compact_column
+from xlsxmetadata import TableDefinition, get_table_definition, read_table_definitions
+from xltables import XLTable
+
+
+class ColumnarTable:
+    """
+    The values of a table, held in memory as one list of values per column.
+
+    A table is read into this form exactly once, after which the file it was read from is no longer needed. Values are
+    held as plain values rather than as cells, and rows can be accessed at random by their number. Columns may be held
+    compactly as typed columns (see `typedcolumns`) rather than lists, which are read the same way.
+    """
+
+    column_names: list[str]
+    """The names of the table's columns, in order."""
+
+    columns: list[Sequence[Any]]
+    """
+    The values of each column in the table, in the same order as the column names, each as a list or as a typed column.
+    """
+
+    row_count: int
+    """The number of rows in the table, not counting the header row."""
+
+    _column_indices: dict[str, int]
+    """The position of each column in the table, mapped against the column's name."""
+
+    def __init__(self, column_names: list[str], columns: list[Sequence[Any]]):
+        """
+        Creates a new ColumnarTable object from columns of values that have already been read.
+        :param column_names: The names of the table's columns, in order.
+        :param columns: The values of each column, in the same order as the column names, each as a list or as a typed
+                        column. Every column should have the same number of values.
+        """
+
+        self.column_names    = column_names
+        self.columns         = columns
+        self.row_count       = len(columns[0]) if len(columns) > 0 else 0
+        self._column_indices = {name: i for i, name in enumerate(column_names)}
+
+    @staticmethod
+    def from_rows(column_names: list[str], rows: Iterable[Sequence[Any]], compact: bool = False) -> "ColumnarTable":
+        """
+        Creates a new ColumnarTable object from the values of a table given row by row.
+        :param column_names: The names of the table's columns, in order.
+        :param rows: The values of each row, in column order. These are read through exactly once.
+        :param compact: Whether to store each column as compactly as it can be, as by `compact_column`, once it's been
+                        read. This takes far less memory for large tables, but makes reading values slightly slower.
+        :return: A new ColumnarTable containing the given values.
+        """
+
+        columns: list[list[Any]] = [[] for _ in column_names]
+        appenders = [col.append for col in columns]
+
+        for row in rows:
+            for append, value in zip(appenders, row):
+                append(value)
+
+        if(compact):
+            del appenders
+
+            # Each list is released as soon as it's been replaced, so only one column is held twice at once.
+            for i in range(len(columns)):
+                columns[i] = compact_column(columns[i])
+
+        return ColumnarTable(column_names, columns)
+
+    @staticmethod
+    def load_from_file(filepath:     str,
+                       sheet_name:   str,
+                       table_name:   str,
+                       read_only:    bool = False,
+                       direct_parse: bool = False,
+                       compact:      bool = False) \
+            -> "ColumnarTable":
+        """
+        Reads the values of a table in an Excel file.
+        :param filepath: The filepath of the Excel file containing the table.
+        :param sheet_name: The name of the sheet containing the table.
+        :param table_name: The name of the table.
+        :param read_only: Whether to open the file in read-only mode. In read-only mode, only the values of the cells in
+                          the table's range are streamed from the file, so the time and memory taken scale with the size
+                          of the table rather than the size of the workbook.
+        :param direct_parse: Whether, in read-only mode, to parse the table's worksheet directly with a SheetMLReader
+                             rather than reading it through openpyxl. The values read are the same either way. This has
+                             no effect outside of read-only mode.
+        :param compact: Whether to store each column as compactly as it can be, as with `ColumnarTable.from_rows`.
+        :return: A new ColumnarTable containing the values of the table.
+        """
+
+        with open_table_rows(filepath, sheet_name, table_name, read_only, direct_parse) as (column_names, rows):
+            return ColumnarTable.from_rows(column_names, rows, compact)
+
+    def has_column(self, column_name: str) -> bool:
+        """
+        Gets whether this table has a column with the given name.
+        :param column_name: The name of the column.
+        :return: True if the table has a column with the given name. Otherwise, false.
+        """
+
+        return column_name in self._column_indices
+
+    def column(self, column_name: str) -> Sequence[Any]:
+        """
+        Gets the values of a column in this table.
+        :param column_name: The name of the column.
+        :return: The values of the column, in row order.
+        """
+
+        return self.columns[self._column_indices[column_name]]
+
+    def get_row(self, row_number: int) -> dict[str, Any]:
+        """
+        Gets the values of a row in this table.
+        :param row_number: The zero-based number of the row within the table, not counting the header row.
+        :return: The row, as a dictionary of values mapped against their column names.
+        """
+
+        return {name: col[row_number] for name, col in zip(self.column_names, self.columns)}
+
+    def get_row_values(self, row_number: int) -> tuple[Any, ...]:
+        """
+        Gets the values of a row in this table, without their column names.
+        :param row_number: The zero-based number of the row within the table, not counting the header row.
+        :return: The values of the row, in the same order as the table's column names.
+        """
+
+        return tuple([col[row_number] for col in self.columns])
+
+
+@contextmanager
+def open_table_rows(filepath:     str,
+                    sheet_name:   str,
+                    table_name:   str,
+                    read_only:    bool = False,
+                    direct_parse: bool = False) \
+        -> Iterator[tuple[list[str], Iterator[Sequence[Any]]]]:
+    """
+    Opens a table in an Excel file to be read row by row, without holding all of its values in memory at once. The file
+    is closed once the returned context is exited.
+
+    Use as: `with open_table_rows(...) as (column_names, rows): ...`
+    :param filepath: The filepath of the Excel file containing the table.
+    :param sheet_name: The name of the sheet containing the table.
+    :param table_name: The name of the table.
+    :param read_only: Whether to open the file in read-only mode. In read-only mode, only the values of the cells in the
+                      table's range are streamed from the file.
+    :param direct_parse: Whether, in read-only mode, to parse the table's worksheet directly with a SheetMLReader rather
+                         than reading it through openpyxl.
+    :return: A context providing a tuple of the names of the table's columns, in order, and an iterator over the values
+             of each row of the table, in column order.
+    """
+
+    if(not read_only):
+        table: XLTable = XLTable.load_from_file(filepath, sheet_name, table_name)
+        column_names: list[str] = list(table.column_names)
+
+        try:
+            yield column_names, ([row[name].value for name in column_names] for row in table.row_iterator)
+        finally:
+            table.source_workbook.close()
+
+        return
+
+    definition: TableDefinition = get_table_definition(filepath, sheet_name, table_name)
+
+    if(direct_parse):
+        with SheetMLReader(filepath) as reader:
+            yield definition.column_names, reader.iter_table_rows(definition)
+
+        return
+
+    wb: Workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+
+    try:
+        yield definition.column_names, _stream_table_rows(wb, definition)
+    finally:
+        wb.close()
+
+
+def load_tables_from_file(filepath:     str,
+                          tables:       Sequence[tuple[str, str]],
+                          read_only:    bool = False,
+                          direct_parse: bool = False,
+                          compact:      bool = False) \
+        -> list[ColumnarTable]:
+    """
+    Reads the values of several tables in the same Excel file, opening and parsing the file only once for all of them.
+    :param filepath: The filepath of the Excel file containing the tables.
+    :param tables: The tables to read, as tuples of the name of the sheet containing each table and the table's name.
+    :param read_only: Whether to open the file in read-only mode, as with `ColumnarTable.load_from_file`.
+    :param direct_parse: Whether, in read-only mode, to parse the tables' worksheets directly, as with
+                         `ColumnarTable.load_from_file`.
+    :param compact: Whether to store each column as compactly as it can be, as with `ColumnarTable.from_rows`.
+    :return: A list of new ColumnarTable objects containing the values of the given tables, in the same order.
+    :raises KeyError: If any of the given tables isn't in the file.
+    """
+
+    if(len(tables) == 0):
+        return []
+
+    definitions: dict[tuple[str, str], TableDefinition] \
+        = {(x.sheet_name, x.table_name): x for x in read_table_definitions(filepath)}
+
+    for sheet_name, table_name in tables:
+        if((sheet_name, table_name) not in definitions):
+            raise KeyError(f"No table named \"{table_name}\" on sheet \"{sheet_name}\" in {filepath}")
+
+    if(read_only and direct_parse):
+        with SheetMLReader(filepath) as reader:
+            return [ColumnarTable.from_rows(definitions[x].column_names, reader.iter_table_rows(definitions[x]),
+                                            compact)
+                    for x in tables]
+
+    # The workbook XLTable loads is reused for the rest of the tables, so the values read are the same as they'd be if
+    # each table was loaded on its own.
+    if(read_only):
+        wb: Workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    else:
+        wb: Workbook = XLTable.load_from_file(filepath, *tables[0]).source_workbook
+
+    try:
+        return [ColumnarTable.from_rows(definitions[x].column_names, _stream_table_rows(wb, definitions[x]), compact)
+                for x in tables]
+    finally:
+        wb.close()
+
+
+def _stream_table_rows(wb: Workbook, definition: TableDefinition) -> Iterator[Sequence[Any]]:
+    """
+    Streams the values of the rows of a table from a workbook opened in read-only mode.
+    :param wb: The workbook containing the table.
+    :param definition: The definition of the table.
+    :return: An iterator over the values of each row of the table, in column order.
+    """
+
+    min_col, min_row, max_col, max_row = range_boundaries(definition.ref)
+    first_data_row: int = min_row + definition.header_row_count
+    last_data_row:  int = max_row - definition.totals_row_count
+    row_count:      int = max(last_data_row - first_data_row + 1, 0)
+    rows_read:      int = 0
+
+    if(row_count == 0):
+        return
+
+    for row in wb[definition.sheet_name].iter_rows(min_row = first_data_row, max_row = last_data_row,
+                                                   min_col = min_col,        max_col = max_col,
+                                                   values_only = True):
+        rows_read += 1
+        yield row
+
+    # Rows missing from the end of the worksheet's XML aren't yielded by openpyxl.
+    empty_row: tuple[None, ...] = (None,) * (max_col - min_col + 1)
+
+    for _ in range(rows_read, row_count):
+        yield empty_row
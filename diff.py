@@ -2,18 +2,92 @@
 Contains the TableDiff class, for processing the differences between Excel tables, and associated supporting classes.
 """
 
+import cProfile
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any
+from itertools import compress
+from multiprocessing.context import BaseContext
+from operator import is_not, itemgetter, ne, or_
+from typing import Any, Callable, Iterator, Sequence
 
 import openpyxl
-from openpyxl.cell import Cell
 from openpyxl.workbook import Workbook
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.worksheet.table import Table
 
-import Utils
+from columnartable import ColumnarTable, open_table_rows
+from diffstats import DiffStats, StageStats
+from normalisers import ValueNormaliser, infer_normaliser, infer_normaliser_from_types, memoise_normaliser
+from partitionspill import PartitionSpill
+from resultsink import ResultSink
+from snapshotcache import SnapshotCache, TableSnapshot
+from tablecache import TableCache
+from tablewriter import append_column_table_sheet, append_table_sheet
+from typedcolumns import DictionaryColumn, compact_column, map_column, map_values, take_values
+from xlsxmetadata import TableDefinition, get_table_definition
 
-from xltables import XLTable
+
+WORKER_PROCESS_CONTEXT: BaseContext = multiprocessing.get_context("spawn")
+"""
+The context worker processes are started in. Workers are spawned afresh rather than forked, as diffs are often processed
+on a background thread (as by the GUI), and a process forked while other threads are running can deadlock.
+"""
+
+_ESTIMATED_BYTES_PER_CELL: int = 100
+"""
+A rough estimate of the memory needed per cell of a table to diff it in memory, including the cell's value, its place in
+its column, and its share of the table's key index.
+"""
+
+_SPILL_BUFFER_SHARE: float = 0.25
+"""The share of a diff's memory budget that rows waiting to be written to partition files may take up."""
+
+_PROGRESS_INTERVAL_ROWS: int = 10_000
+"""The number of rows processed between each progress event raised while rows are being processed."""
+
+_COLUMNWISE_BLOCK_ROWS: int = 10_000
+"""
+The number of matched rows compared a column at a time in each block, so only the differences found in one block are
+held before they're yielded.
+"""
+
+_FINGERPRINTABLE_TYPES: frozenset[type] = frozenset({str, bool, int, type(None)})
+"""
+The types of cell values rows can be fingerprinted by. Values of these types that are equal always normalise the same
+for comparison, as long as a column doesn't mix booleans and integers (as True == 1). Unequal values may still hash the
+same (e.g. hash("") == hash(0) == hash(False)), so rows with the same fingerprint have their fingerprinted values
+checked for equality before being passed over.
+"""
+
+_ComparedColumn = tuple[str, Sequence[Any], Sequence[Any], Callable[[Any], str]]
+"""
+A column present in both tables being compared: its name, its values in the first table, its values in the second
+table, and the function normalising its values for comparison.
+"""
+
+
+class DiffCancelledError(Exception):
+    """Raised from a diff being processed once it's been cancelled, at the next point it reports its progress."""
+
+
+@dataclass
+class ProgressEvent:
+    """A report of how far through a stage of processing a diff has got."""
+
+    stage: str
+    """A description of the stage of processing the diff is in. (e.g. "Comparing rows")"""
+
+    rows_processed: int
+    """The number of rows processed so far in the current stage."""
+
+    rows_total: int | None
+    """The total number of rows to process in the current stage, or None where this isn't known in advance."""
 
 
 @dataclass
@@ -30,7 +104,7 @@ class TableReference:
     """The name of the table."""
 
 
-@dataclass
+@dataclass(slots=True)
 class CellDifference:
     """
     A record of a difference between two cells of the same column in different rows, which may not necessarily be in the
@@ -38,7 +112,10 @@ class CellDifference:
     """
 
     column_name: str
-    """The name of the column the cells are in."""
+    """
+    The name of the column the cells are in. This is the same string object as the name in the table's column names,
+    rather than a copy of it, so records for the same column share it.
+    """
 
     value1: Any
     """The value of the cell in the first row."""
@@ -47,23 +124,33 @@ class CellDifference:
     """The value of the cell in the second row."""
 
 
-@dataclass
+@dataclass(slots=True)
 class RowDifference:
     """A record of a set of differences between two rows with the same keys in different tables."""
 
-    keys: dict[str, Any]
+    key_values: tuple[Any, ...]
     """
-    A dictionary of the shared keys between the two rows; the dictionary key is the column name and the dictionary value
-    is the value of the corresponding key cell in those rows. This is a dictionary rather than just a pair of values,
-    because tables may have compound keys - each key of this dictionary would be the name of one of the columns that
-    make up the compound key.
+    The values of the shared keys of the two rows, as in the first table, in the same order as the key column names of
+    the diff that found them. Tables may have compound keys, in which case there's one value for each of the columns
+    that make up the compound key.
     """
 
     cell_differences: list[CellDifference]
     """A list of cell differences between the two rows."""
 
 
-@dataclass
+@dataclass(slots=True)
+class UniqueRow:
+    """A record of a row whose key is only found in one of the two tables being compared."""
+
+    values: tuple[Any, ...]
+    """The values of the row, in the same order as the column names of the table it's in."""
+
+    in_first: bool
+    """Whether the row is in the first table. If not, it's in the second."""
+
+
+@dataclass(slots=True)
 class TableColumnContent:
     """A record of the values of cells in a column, along with the column name."""
 
@@ -74,27 +161,52 @@ class TableColumnContent:
     """A list of the values of the cells in the represented column."""
 
 
+@dataclass(slots=True)
+class DiffResult:
+    """
+    The differences found between two tables by a diff. The values in a result are plain values, as read from the
+    tables, and don't refer to the diff or to any workbook, so results can be kept after the diff is done with.
+    """
+
+    key_column_names: list[str]
+    """The names of the columns that collectively form a unique identifier in both tables."""
+
+    first_column_names: list[str]
+    """The names of the columns in the first table, in order."""
+
+    second_column_names: list[str]
+    """The names of the columns in the second table, in order."""
+
+    row_differences: list[RowDifference]
+    """The differences between rows common to both tables, in the order the rows appear in the first table."""
+
+    rows_only_in_first: list[tuple[Any, ...]]
+    """The rows that only exist in the first table, as tuples of values in the order of the first table's columns."""
+
+    rows_only_in_second: list[tuple[Any, ...]]
+    """The rows that only exist in the second table, as tuples of values in the order of the second table's columns."""
+
+    columns_only_in_first: list[TableColumnContent]
+    """The columns that only exist in the first table."""
+
+    columns_only_in_second: list[TableColumnContent]
+    """The columns that only exist in the second table."""
+
+
 class TableDiff:
     """
     A queued difference between two tables.
 
     The difference isn't processed immediately. Rather, this contains the information required to establish the
     differences between two tables, and then save them to a particular file. Once you have a constructed instance of
-    this class, you can establish the differences between two tables and save them to a file with `.process_and_save()`.
+    this class, you can establish the differences between two tables and save them to a file with `.process_and_save()`,
+    establish them without saving them with `.process()`, or iterate over them as they're found with
+    `.iterate_differences()`.
 
     The file produced details the differences between rows shared between the two tables, rows that only exist in one
     table or the other, and columns that only exist in one table or the other.
     """
 
-    # TODO: Make this store the rows unique to one table or the other as dictionaries of values, rather than of cells,
-    #       so that there's no possible problem programmatically reading those values once the tables have been
-    #       discarded.
-
-    # TODO: Add a method to process a difference without saving it to a file, so this can be used without saving
-    #       necessarily anything. When done, update inline documentation that directs users to a method to process this
-    #       diff, to mention that method as well.
-
-
     first_table_ref:  TableReference
     """A reference to one of the tables being compared."""
 
@@ -110,31 +222,207 @@ class TableDiff:
     of tables to be compared without having to worry about order.
     """
 
+    read_only: bool
+    """
+    Whether to load the tables in read-only mode. In read-only mode, only the cells in each table's range are streamed
+    from its file, rather than the whole of each workbook being loaded.
+    """
+
+    direct_parse: bool
+    """
+    Whether, in read-only mode, to read the tables by parsing the XML of their worksheets directly, rather than through
+    openpyxl. This has no effect unless the tables are loaded in read-only mode.
+    """
+
+    columnwise_comparison: bool
+    """
+    Whether to compare common rows column by column rather than row by row. Comparing column by column normalises each
+    column's values in one batch and only builds records for rows with differences, which is faster where few rows
+    differ. The differences found are identical either way.
+    """
+
+    concurrent_load: bool
+    """
+    Whether to load the two tables concurrently, loading one of them in a separate worker process. Loading is the
+    largest single cost of processing a diff of large files, and the two loads are independent.
+    """
+
+    memory_budget: int | None
+    """
+    The approximate number of bytes of memory the tables may take up while being diffed, or None for no limit. Where the
+    tables are estimated to need more than this, they're split into partitions on disk and diffed a partition at a time.
+    Tables split into partitions are always streamed from their files, as in read-only mode, whatever `read_only` is.
+    """
+
+    spill_directory: str | None
+    """
+    The directory to create temporary partition files in when diffing within a memory budget, or None to use the
+    system's default temporary directory.
+    """
+
+    progress_callback: Callable[[ProgressEvent], None] | None
+    """
+    A function to call with a progress event at the start of each stage of processing this diff, and periodically during
+    it, or None. It's called on whichever thread is processing the diff.
+    """
+
+    table_cache: TableCache | None
+    """
+    A cache to get the tables from, and to add them to once they're loaded, or None to always load them from their
+    files. This isn't used when diffing in partitions.
+    """
+
+    snapshot_cache: SnapshotCache | None
+    """
+    A cache on disk to read the tables and their key indices from where they've already been parsed, and to snapshot
+    them to once they are, or None to always parse them from their files. This isn't used when diffing in partitions.
+    """
+
+    result_sink: ResultSink | None
+    """
+    A sink to stream the results to as they're found, in place of saving them to an Excel file, or None. Results
+    streamed to a sink aren't kept in this object.
+    """
+
+    trace_memory: bool
+    """
+    Whether to trace the memory allocated during each stage of processing this diff, to record its peak in the stats.
+    Tracing memory slows processing down considerably.
+    """
+
+    profile_directory: str | None
+    """
+    The directory to save a profile of processing this diff to, as a pstats file named after the result file, or None
+    not to profile it.
+    """
+
+    column_normalisers: dict[str, ValueNormaliser]
+    """
+    How to normalise the values of particular columns before they're compared, mapped against the names of the columns.
+    Where a key column has a normaliser, rows are matched by their key values as normalised by it.
+    """
+
+    infer_normalisers: bool
+    """
+    Whether to choose how to normalise each compared column without a normaliser of its own from the types of its
+    values, as per `infer_normaliser`, rather than normalising it the default way. Key columns are always normalised as
+    their string forms unless they have a normaliser of their own.
+    """
+
+    compact_columns: bool
+    """
+    Whether to store the columns of the tables this diff loads compactly, as typed columns, rather than as lists. This
+    takes far less memory for large tables of numbers, dates and repeated text, at some cost to speed. Tables this diff
+    gets from a table cache or snapshot are used however they were stored.
+    """
+
+    stats: DiffStats
+    """
+    The time, CPU time, memory and rows processed by each stage of the last time this diff was processed, by
+    `.process_and_save()` or `.process()`. These are recorded as processing goes, so are available for the stages that
+    ran even if processing failed.
+    """
+
+    _cancel_requested: threading.Event
+    """
+    Set once this diff has been cancelled. Checked each time this diff reports its progress. This may be shared with
+    other diffs or processes, as by `.share_cancellation()`.
+    """
+
+    _table_definitions: tuple[TableDefinition, TableDefinition] | None
+    """
+    The definitions of the two tables, as read once per run of processing this diff in partitions, or None where they
+    haven't been read yet.
+    """
+
+    _given_first_key_index: dict[tuple[str, ...], int] | None
+    """
+    A key index of the first table given by `.use_first_key_index()`, to be used on the next run of processing this
+    diff rather than building one, or None where none has been given.
+    """
+
+    _first_key_index_built: bool
+    """
+    Whether the key index of the first table has already been built in the current run of processing this diff, as
+    where it's read from a snapshot or given by `.use_first_key_index()`, so needn't be built when indexing.
+    """
+
+    _second_key_index_built: bool
+    """Whether the key index of the second table has already been built in the current run, as for the first table."""
+
+    _inferred_normalisers: dict[str, ValueNormaliser] | None
+    """
+    Normalisers already inferred from the types of the values in the whole of both tables, mapped against the names of
+    the columns, to be used in place of inferring them from the tables this diff holds, or None to infer them from
+    those. Given to the diffs of each partition, so that every partition normalises a column the same way.
+    """
+
+    _comparison_normalisers: dict[str, Callable[[Any], str]]
+    """
+    The memoised normaliser of each column present in both tables, mapped against the name of the column, as chosen
+    when the tables are indexed.
+    """
+
+
+    first_table: ColumnarTable | None
+    """The values of one of the tables being compared."""
+
+    second_table: ColumnarTable | None
+    """The values of the other table being compared."""
+
+    first_column_names: list[str]
+    """The names of the columns in the first table, in order. Only available once the tables have been loaded."""
+
+    second_column_names: list[str]
+    """The names of the columns in the second table, in order. Only available once the tables have been loaded."""
+
 
-    first_table: XLTable | None
-    """One of the tables being compared."""
+    row_numbers_for_key_sets_in_first:  dict[tuple[str, ...], int]
+    """
+    The numbers of every row in the first table, mapped against the key values of that row, normalised as a tuple of
+    strings in the same order as the key column names.
+    """
 
-    second_table: XLTable | None
-    """The other table being compared."""
+    row_numbers_for_key_sets_in_second: dict[tuple[str, ...], int]
+    """
+    The numbers of every row in the second table, mapped against the key values of that row, normalised as a tuple of
+    strings in the same order as the key column names.
+    """
 
 
-    row_numbers_for_key_sets_in_first:  dict[str, int]
-    """The numbers of every row in the first table, mapped against a the key values of that row, encoded as a string."""
+    fingerprinted_column_names: list[str]
+    """
+    The names of the columns present in both tables that rows are fingerprinted by, in the order they appear in the
+    first table. Only available once the tables have been indexed for comparing row by row.
+    """
+
+    row_fingerprints_in_first:  list[int]
+    """
+    A fingerprint of each row in the first table, in row order, hashed from the row's values in the fingerprinted
+    columns. Only available once the tables have been indexed for comparing row by row.
+    """
 
-    row_numbers_for_key_sets_in_second: dict[str, int]
+    row_fingerprints_in_second: list[int]
     """
-    The numbers of every row in the second table, mapped against a the key values of that row, encoded as a string.
+    A fingerprint of each row in the second table, in row order, hashed from the row's values in the fingerprinted
+    columns. Only available once the tables have been indexed for comparing row by row.
     """
 
 
     row_differences:        list[RowDifference]
     """A list of the different rows between the two tables. Only available once processed."""
 
-    rows_only_in_first:     list[dict[str, Cell]]
-    """A list of the rows that only exist in the first table. Only available once processed."""
+    rows_only_in_first:     list[tuple[Any, ...]]
+    """
+    A list of the rows that only exist in the first table, as tuples of values in the same order as the first table's
+    column names. Only available once processed.
+    """
 
-    rows_only_in_second:    list[dict[str, Cell]]
-    """A list of the rows that only exist in the second table. Only available once processed."""
+    rows_only_in_second:    list[tuple[Any, ...]]
+    """
+    A list of the rows that only exist in the second table, as tuples of values in the same order as the second table's
+    column names. Only available once processed.
+    """
 
     columns_only_in_first:  list[TableColumnContent]
     """A list of the columns that only exist in the first table. Only available once processed."""
@@ -143,29 +431,119 @@ class TableDiff:
     """A list of the columns that only exist in the second table. Only available once processed."""
 
     def __init__(self,
-                 first:            TableReference,
-                 second:           TableReference,
-                 result_filepath:  str,
-                 key_column_names: list[str]):
+                 first:                 TableReference,
+                 second:                TableReference,
+                 result_filepath:       str,
+                 key_column_names:      list[str],
+                 read_only:             bool = False,
+                 columnwise_comparison: bool = False,
+                 concurrent_load:       bool = False,
+                 memory_budget:         int | None = None,
+                 spill_directory:       str | None = None,
+                 progress_callback:     Callable[[ProgressEvent], None] | None = None,
+                 table_cache:           TableCache | None = None,
+                 direct_parse:          bool = False,
+                 snapshot_cache:        SnapshotCache | None = None,
+                 result_sink:           ResultSink | None = None,
+                 trace_memory:          bool = False,
+                 profile_directory:     str | None = None,
+                 column_normalisers:    dict[str, ValueNormaliser] | None = None,
+                 infer_normalisers:     bool = False,
+                 compact_columns:       bool = False):
         """
         Creates a new TableDiff object.
 
-        This does not immediately process the difference. To process the difference, call `.process_and_save()`
+        This does not immediately process the difference. To process the difference, call `.process_and_save()`, or
+        `.process()` to process it without saving it.
         :param first: A reference to the first table being compared.
         :param second: A reference to the second table being compared.
         :param result_filepath: The filepath the resulting table should be saved to.
         :param key_column_names: The names of the columns common to both tables that collectively form a
                                  uniquely-identifying key. This will not behave properly if the given key is not
                                  completely unique to each row.
+        :param read_only: Whether to load the tables in read-only mode, streaming only the cells in each table's range
+                          rather than loading the whole of each workbook. This is much faster and uses much less memory
+                          where tables are small relative to the workbooks they're in.
+        :param columnwise_comparison: Whether to compare common rows column by column, rather than row by row. This
+                                      produces identical results, but is faster on large tables.
+        :param concurrent_load: Whether to load the two tables at the same time, one of them in a worker process. This
+                                roughly halves the time taken to load large tables, where there are cores to spare.
+        :param memory_budget: The approximate number of bytes of memory the tables may take up while being diffed. If
+                              the tables are estimated to need more than this, they're streamed from their files in
+                              read-only mode, split into partitions on disk by key, and diffed a partition at a time. If
+                              None, the tables are always diffed in memory.
+        :param spill_directory: The directory to create temporary partition files in, if diffing in partitions. If
+                                None, the system's default temporary directory is used.
+        :param progress_callback: A function to call with a progress event at the start of each stage of processing, and
+                                  periodically during it. This isn't carried over if the diff is pickled.
+        :param table_cache: A cache to get the tables from where they've already been loaded, and to add them to once
+                            they are. This isn't carried over if the diff is pickled.
+        :param direct_parse: Whether, in read-only mode, to read the tables by parsing their worksheets directly rather
+                             than through openpyxl. This reads the same values, but is faster, as no cell objects are
+                             created. This has no effect unless read_only is set.
+        :param snapshot_cache: A cache on disk to read the tables and their key indices from where they've already been
+                               parsed, by this or any earlier diff, and to snapshot them to once they are. This is
+                               carried over if the diff is pickled.
+        :param result_sink: A sink to stream the results to as they're found, in place of saving them to an Excel file
+                            at the result filepath. The results aren't kept in the diff. This is carried over if the
+                            diff is pickled, so should be unopened.
+        :param trace_memory: Whether to trace the memory allocated during each stage of processing, to record its peak
+                             in the diff's stats. This slows processing down considerably.
+        :param profile_directory: A directory to save a cProfile profile of processing the diff to, as a pstats file
+                                  named after the result file, or None not to profile it.
+        :param column_normalisers: How to normalise the values of particular columns before they're compared, mapped
+                                   against the names of the columns. Columns without a normaliser are normalised the
+                                   default way, as by `ValueNormaliser`, with key columns normalised as their string
+                                   forms.
+        :param infer_normalisers: Whether to choose how to normalise each compared column without a normaliser of its
+                                  own from the types of its values, so that (for example) 1 and 1.0 compare equal. Where
+                                  the tables are diffed in partitions, this is chosen from the types of the values in
+                                  the whole of both tables, collected as they're split, not from each partition.
+        :param compact_columns: Whether to store the columns of the tables loaded compactly, with numbers and dates in
+                                arrays and repeated text dictionary-encoded, rather than as lists of values. This cuts
+                                the memory taken by large tables many times over, but makes diffing them slower.
         """
 
         self.first_table_ref  = first
         self.second_table_ref = second
         self.result_filepath  = result_filepath
         self.key_column_names = key_column_names
+        self.read_only        = read_only
+        self.direct_parse     = direct_parse
+
+        self.columnwise_comparison = columnwise_comparison
+        self.concurrent_load       = concurrent_load
+        self.memory_budget         = memory_budget
+        self.spill_directory       = spill_directory
+        self.progress_callback     = progress_callback
+        self.table_cache           = table_cache
+        self.snapshot_cache        = snapshot_cache
+        self.result_sink           = result_sink
+        self.trace_memory          = trace_memory
+        self.profile_directory     = profile_directory
+        self.column_normalisers    = column_normalisers if column_normalisers is not None else {}
+        self.infer_normalisers     = infer_normalisers
+        self.compact_columns       = compact_columns
+        self.stats                 = DiffStats()
+
+        self._cancel_requested       = threading.Event()
+        self._comparison_normalisers = {}
+        self._inferred_normalisers   = None
+        self._table_definitions      = None
+        self._given_first_key_index  = None
+        self._first_key_index_built  = False
+        self._second_key_index_built = False
+
+        self.first_table         = None
+        self.second_table        = None
+        self.first_column_names  = []
+        self.second_column_names = []
 
         self.row_numbers_for_key_sets_in_first  = {}
         self.row_numbers_for_key_sets_in_second = {}
+        self.fingerprinted_column_names         = []
+        self.row_fingerprints_in_first          = []
+        self.row_fingerprints_in_second         = []
 
         self.row_differences        = []
         self.rows_only_in_first     = []
@@ -173,51 +551,489 @@ class TableDiff:
         self.columns_only_in_first  = []
         self.columns_only_in_second = []
 
+    def __getstate__(self) -> dict[str, Any]:
+        """
+        Gets the state of this diff to be pickled. Only what's needed to process the diff is pickled - the references to
+        the tables and the settings it was created with - and not any loaded tables or results, so queued diffs can be
+        cheaply sent to other processes to be processed there. The progress callback and table cache aren't pickled, as
+        they're specific to the process they were given in.
+        :return: The arguments this diff was constructed with, by name.
+        """
+
+        return {"first":                 self.first_table_ref,
+                "second":                self.second_table_ref,
+                "result_filepath":       self.result_filepath,
+                "key_column_names":      self.key_column_names,
+                "read_only":             self.read_only,
+                "columnwise_comparison": self.columnwise_comparison,
+                "concurrent_load":       self.concurrent_load,
+                "memory_budget":         self.memory_budget,
+                "spill_directory":       self.spill_directory,
+                "direct_parse":          self.direct_parse,
+                "snapshot_cache":        self.snapshot_cache,
+                "result_sink":           self.result_sink,
+                "trace_memory":          self.trace_memory,
+                "profile_directory":     self.profile_directory,
+                "column_normalisers":    self.column_normalisers,
+                "infer_normalisers":     self.infer_normalisers,
+                "compact_columns":       self.compact_columns}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """
+        Restores this diff from a pickled state, as an unprocessed diff.
+        :param state: The arguments the pickled diff was constructed with, by name.
+        """
+
+        self.__init__(**state)
+
     def process_and_save(self) -> None:
         """
         Processes the differences between the two tables in this diff, and saves those differences to an Excel file at
         the filepath stored.
 
         After calling this, information about the differences between the two tables will be available in this object.
+
+        If this diff has a memory budget the tables are estimated not to fit within, the differences are processed a
+        partition at a time, as by `.process_in_partitions()`.
+
+        The resources used by each stage of processing are recorded in this diff's stats as it goes.
+
+        If this diff has a result sink, the results are streamed to it as they're found instead, and aren't kept in this
+        object. The sink is opened before processing starts, and closed once it's finished, whether or not it succeeded.
+        :raises DiffCancelledError: If this diff is cancelled before it's finished. Nothing is saved in this case,
+                                    though results may already have been streamed to a result sink.
+        """
+
+        with self._processing():
+            self._read_differences()
+            self._run_stage("save", self.save_to_file, self._count_result_rows)
+
+    def process_into_workbook(self, wb: Workbook, sheet_name_prefix: str, table_name_prefix: str) -> None:
+        """
+        Processes the differences between the two tables in this diff, and adds sheets for them to the end of the given
+        workbook rather than saving them to a file of their own, so the differences of several diffs can be saved to
+        the same file. The sheets are the same as those saved by `.process_and_save()`, but with the given prefixes.
+
+        After calling this, information about the differences between the two tables will be available in this object.
+        Result sinks and memory budgets are used as with `.process_and_save()`, with nothing added to the workbook where
+        the results are streamed to a sink.
+        :param wb: The workbook to add the sheets to. This may be in write-only mode.
+        :param sheet_name_prefix: Text to put before the name of each sheet added, to tell them apart from the sheets of
+                                  other diffs in the same workbook.
+        :param table_name_prefix: Text to put before the name of each table added, as table names need to be unique
+                                  within a workbook.
+        :raises DiffCancelledError: If this diff is cancelled before it's finished.
+        """
+
+        def add_sheets() -> None:
+            if(self.result_sink is not None):
+                self._write_columns_to_sink()
+            else:
+                self._add_sheets_to_workbook(wb, sheet_name_prefix, table_name_prefix)
+
+        with self._processing():
+            self._read_differences()
+            self._run_stage("save", add_sheets, self._count_result_rows)
+
+    def _read_differences(self) -> None:
+        """
+        Reads the differences between the two tables in this diff into this object, or into its result sink, in
+        partitions where this diff has a memory budget the tables are estimated not to fit within.
+        """
+
+        rows_in_both = lambda: self.first_table.row_count + self.second_table.row_count
+
+        if(self._get_partition_count() > 1):
+            self._run_stage("partitioned_diff", self.process_in_partitions, rows_in_both)
+            return
+
+        read_unique_columns = lambda: (self.read_columns_only_in_first(), self.read_columns_only_in_second())
+
+        self._run_stage("load",           self.load_tables,              rows_in_both)
+        self._run_stage("index",          self.build_table_indices,      rows_in_both)
+        self._run_stage("row_diff",       self.read_row_differences,     lambda: self.first_table.row_count)
+        self._run_stage("unique_rows",    self.read_rows_only_in_second, lambda: self.second_table.row_count)
+        self._run_stage("unique_columns", read_unique_columns,           rows_in_both)
+
+    @contextmanager
+    def _processing(self) -> Iterator[None]:
+        """
+        Prepares this diff to be processed, and tidies up once it's been processed, whether or not it succeeded. This
+        resets its stats, starts tracing memory and profiling if they're enabled, and opens its result sink if it has
+        one. Once done, it discards the loaded tables, closes the result sink, and saves the profile.
+        """
+
+        self.stats = DiffStats()
+        self._table_definitions = None
+        started_tracing: bool = self.trace_memory and not tracemalloc.is_tracing()
+        profiler: cProfile.Profile | None = cProfile.Profile() if self.profile_directory is not None else None
+
+        if(started_tracing):
+            tracemalloc.start()
+
+        if(self.result_sink is not None):
+            self.result_sink.open(self.key_column_names)
+
+        if(profiler is not None):
+            profiler.enable()
+
+        try:
+            yield
+        finally:
+            if(profiler is not None):
+                profiler.disable()
+                self.stats.profile_filepath = self._save_profile(profiler)
+
+            self.discard_loaded_tables()
+
+            if(self.result_sink is not None):
+                self.result_sink.close()
+
+            if(started_tracing):
+                tracemalloc.stop()
+
+    def _run_stage(self, name: str, stage: Callable[[], Any], count_rows: Callable[[], int]) -> None:
+        """
+        Runs a stage of processing this diff, recording the resources it used in this diff's stats.
+        :param name: The name of the stage, as recorded in the stats.
+        :param stage: The function performing the stage.
+        :param count_rows: A function getting the number of rows the stage processed, called once the stage is done.
+        """
+
+        stage_stats = StageStats(name)
+        self.stats.stages.append(stage_stats)
+        tracing: bool = self.trace_memory and tracemalloc.is_tracing()
+        memory_at_start: int = 0
+
+        if(tracing):
+            tracemalloc.reset_peak()
+            memory_at_start = tracemalloc.get_traced_memory()[0]
+
+        wall_start: float = time.perf_counter()
+        cpu_start:  float = time.process_time()
+
+        try:
+            stage()
+        finally:
+            stage_stats.wall_seconds = time.perf_counter() - wall_start
+            stage_stats.cpu_seconds  = time.process_time() - cpu_start
+
+            if(tracing):
+                stage_stats.peak_memory_bytes = tracemalloc.get_traced_memory()[1] - memory_at_start
+
+        stage_stats.rows_processed = count_rows()
+
+    def _count_result_rows(self) -> int:
+        """
+        Counts the rows of results held in this object, as written when saving them.
+        :return: The number of differences between common rows and rows unique to one table or the other.
+        """
+
+        return len(self.row_differences) + len(self.rows_only_in_first) + len(self.rows_only_in_second)
+
+    def _save_profile(self, profiler: cProfile.Profile) -> str:
+        """
+        Saves a profile of processing this diff to this diff's profile directory, named after its result file.
+        :param profiler: The profiler that profiled processing this diff.
+        :return: The filepath the profile was saved to.
+        """
+
+        os.makedirs(self.profile_directory, exist_ok=True)
+        filepath: str = os.path.join(self.profile_directory, os.path.basename(self.result_filepath) + ".pstats")
+        profiler.dump_stats(filepath)
+        return filepath
+
+    def process(self) -> DiffResult:
+        """
+        Processes the differences between the two tables in this diff, without saving them to a file.
+
+        After calling this, information about the differences between the two tables will also be available in this
+        object. The tables are processed as by `.process_and_save()`, including in partitions where this diff has a
+        memory budget the tables are estimated not to fit within. If this diff has a result sink, the results are
+        streamed to it, and aren't in the result returned. The resources used by each stage of processing are recorded
+        in this diff's stats, as with `.process_and_save()`.
+        :return: The differences found between the two tables.
+        :raises DiffCancelledError: If this diff is cancelled before it's finished.
+        """
+
+        with self._processing():
+            self._read_differences()
+
+            if(self.result_sink is not None):
+                self._run_stage("save", self._write_columns_to_sink, lambda: 0)
+
+            return DiffResult(key_column_names       = list(self.key_column_names),
+                              first_column_names     = list(self.first_column_names),
+                              second_column_names    = list(self.second_column_names),
+                              row_differences        = self.row_differences,
+                              rows_only_in_first     = self.rows_only_in_first,
+                              rows_only_in_second    = self.rows_only_in_second,
+                              columns_only_in_first  = self.columns_only_in_first,
+                              columns_only_in_second = self.columns_only_in_second)
+
+    def iterate_differences(self) -> Iterator[RowDifference | UniqueRow]:
+        """
+        Processes the differences between the rows of the two tables in this diff lazily, yielding each difference as
+        it's found, without keeping the differences in this object or saving them anywhere.
+
+        The tables are loaded and indexed when iteration starts, and discarded once it's finished or the iterator is
+        closed. The differences between common rows and the rows unique to the first table are yielded as the first
+        table is walked, followed by the rows unique to the second table. Where rows are compared column by column, the
+        rows unique to the first table come before the differences between common rows. The columns unique to one table
+        or another aren't yielded, and this diff's result sink isn't used.
+
+        If this diff has a memory budget the tables are estimated not to fit within, the tables are diffed a partition
+        at a time first, and the differences are yielded once they've all been found, in the same order.
+        :return: An iterator over the differences between common rows, and the rows unique to one table or the other.
+                 The values of unique rows are in the order of the column names of the table they're in, which are
+                 available in this object once iteration has started.
+        :raises DiffCancelledError: If this diff is cancelled before iteration is finished.
+        """
+
+        self._table_definitions = None
+
+        try:
+            if(self._get_partition_count() > 1):
+                row_differences:     list[tuple[int, RowDifference]] = []
+                rows_only_in_first:  list[tuple[int, tuple[Any, ...]]] = []
+                rows_only_in_second: list[tuple[int, tuple[Any, ...]]] = []
+                self._diff_in_partitions(row_differences, rows_only_in_first, rows_only_in_second)
+
+                events_in_first: list[tuple[int, RowDifference | UniqueRow]] \
+                    = row_differences + [(row_no, UniqueRow(row, True)) for row_no, row in rows_only_in_first]
+
+                yield from (event for _, event in sorted(events_in_first, key=itemgetter(0)))
+                yield from (UniqueRow(row, False) for _, row in sorted(rows_only_in_second, key=itemgetter(0)))
+                return
+
+            self.load_tables()
+            self.build_table_indices()
+            yield from self._iterate_first_table_differences()
+            yield from (UniqueRow(row, False) for row in self._iterate_rows_only_in_second())
+        finally:
+            self.discard_loaded_tables()
+
+    def cancel(self) -> None:
+        """
+        Cancels processing this diff. This may be called from any thread. Processing stops with a `DiffCancelledError`
+        the next time the diff reports its progress, which happens at the start of each stage and every few thousand
+        rows. If the diff hasn't started being processed yet, it stops as soon as it starts.
+        """
+
+        self._cancel_requested.set()
+
+    @property
+    def cancel_requested(self) -> bool:
+        """Whether `.cancel()` has been called on this diff."""
+
+        return self._cancel_requested.is_set()
+
+    def share_cancellation(self, cancel_event: threading.Event) -> None:
+        """
+        Makes this diff be cancelled whenever the given event is set, rather than only when `.cancel()` is called on it.
+        Calling `.cancel()` on this diff sets the event. This lets a diff being processed in another process, as a copy,
+        be cancelled from the process that queued it.
+        :param cancel_event: The event to share. This may be a proxy for an event in another process, as made by a
+                             `multiprocessing` manager, so long as it has the same methods as `threading.Event`.
+        """
+
+        self._cancel_requested = cancel_event
+
+    def use_first_key_index(self, index: dict[tuple[str, ...], int]) -> None:
+        """
+        Gives this diff a key index of its first table that's already been built, such as by an earlier diff of the
+        same table, to use on the next run of processing this diff rather than building its own. The index is only used
+        where the first table is got from this diff's table cache or snapshot cache rather than parsed from its file,
+        and only for that one run.
+        :param index: The index, built as by this diff, of the table in the table cache.
+        """
+
+        self._given_first_key_index = index
+
+    def load_tables(self) -> None:
+        """
+        Loads the values of the tables referenced by this diff. Each table is read through exactly once, and every later
+        stage of processing works from the values read.
+
+        If this diff is in read-only mode, only the cells in the range of each table are read from each file. If this
+        diff loads its tables concurrently, the second table is loaded in a worker process while the first is loaded in
+        this one.
+
+        If this diff has a table cache, tables in the cache aren't loaded again, and tables that are loaded are added to
+        it. If this diff has a snapshot cache, tables not in the table cache are read from their snapshots where there
+        are any, along with their key indices, and tables that are parsed are snapshotted. Tables are only loaded
+        concurrently where neither has been loaded already.
+
+        The key indices of any earlier run are discarded, as the files may have changed since.
+        """
+
+        ref1 = self.first_table_ref
+        ref2 = self.second_table_ref
+        given_first_key_index: dict[tuple[str, ...], int] | None = self._given_first_key_index
+        self._report_progress("Loading tables", 0, None)
+
+        self.row_numbers_for_key_sets_in_first  = {}
+        self.row_numbers_for_key_sets_in_second = {}
+        self._given_first_key_index             = None
+
+        self.first_table,  self._first_key_index_built \
+            = self._get_stored_table(ref1, self.row_numbers_for_key_sets_in_first)
+        self.second_table, self._second_key_index_built \
+            = self._get_stored_table(ref2, self.row_numbers_for_key_sets_in_second)
+
+        if(self.first_table is not None and not self._first_key_index_built and given_first_key_index is not None):
+            self.row_numbers_for_key_sets_in_first.update(given_first_key_index)
+            self._first_key_index_built = True
+
+        if(self.concurrent_load and self.first_table is None and self.second_table is None):
+            with ProcessPoolExecutor(max_workers=1, mp_context=WORKER_PROCESS_CONTEXT) as executor:
+                second_table_future: Future = executor.submit(ColumnarTable.load_from_file,
+                                                              ref2.filepath, ref2.sheet_name, ref2.table_name,
+                                                              self.read_only, self.direct_parse, self.compact_columns)
+
+                self.first_table, self._first_key_index_built \
+                    = self._parse_table(ref1, self.row_numbers_for_key_sets_in_first)
+                self.second_table = second_table_future.result()
+
+            self._second_key_index_built \
+                = self._store_parsed_table(ref2, self.second_table, self.row_numbers_for_key_sets_in_second)
+
+        if(self.first_table is None):
+            self.first_table, self._first_key_index_built \
+                = self._parse_table(ref1, self.row_numbers_for_key_sets_in_first)
+
+        if(self.second_table is None):
+            self.second_table, self._second_key_index_built \
+                = self._parse_table(ref2, self.row_numbers_for_key_sets_in_second)
+
+        self.first_column_names  = self.first_table.column_names
+        self.second_column_names = self.second_table.column_names
+
+        rows_loaded: int = self.first_table.row_count + self.second_table.row_count
+        self._report_progress("Loading tables", rows_loaded, rows_loaded)
+
+    def process_in_partitions(self) -> None:
+        """
+        Processes the differences between the two tables in this diff without holding either table in memory in full.
+
+        Both tables are streamed from their files, as in read-only mode, and split between partition files in a
+        temporary directory by a hash of each row's key, so that rows with the same key always end up in partitions with
+        the same number. The rows waiting to be written to the partition files take up no more than a share of the
+        memory budget. Each pair of partitions is then loaded and diffed in turn, and the results are merged back into
+        this object in the original order of the rows. Only the key columns and the columns unique to each table are
+        kept in memory in full, as the loaded tables, for the columns unique to one table or the other.
+
+        After calling this, information about the differences between the two tables will be available in this object,
+        as with processing them in memory.
         """
 
-        self.load_tables()
-        self.build_table_indices()
-        self.read_row_differences()
-        self.read_rows_only_in_second()
+        row_differences:     list[tuple[int, RowDifference]] = []
+        rows_only_in_first:  list[tuple[int, tuple[Any, ...]]] = []
+        rows_only_in_second: list[tuple[int, tuple[Any, ...]]] = []
+        self._diff_in_partitions(row_differences, rows_only_in_first, rows_only_in_second)
+
+        self.row_differences     = []
+        self.rows_only_in_first  = []
+        self.rows_only_in_second = []
+
+        for _, difference in sorted(row_differences, key=itemgetter(0)):
+            self._add_row_difference(difference)
+
+        for _, row in sorted(rows_only_in_first, key=itemgetter(0)):
+            self._add_row_only_in_first(row)
+
+        for _, row in sorted(rows_only_in_second, key=itemgetter(0)):
+            self._add_row_only_in_second(row)
+
         self.read_columns_only_in_first()
         self.read_columns_only_in_second()
-        self.save_to_file()
-        self.discard_loaded_tables()
 
-    def load_tables(self) -> None:
+    def _diff_in_partitions(self,
+                            row_differences:     list[tuple[int, RowDifference]],
+                            rows_only_in_first:  list[tuple[int, tuple[Any, ...]]],
+                            rows_only_in_second: list[tuple[int, tuple[Any, ...]]]) \
+            -> None:
         """
-        Loads the tables referenced by this diff.
+        Splits both tables into partitions on disk, and diffs each pair of partitions in turn, adding the results to the
+        given lists in no particular order. The key columns and columns unique to each table are loaded as the tables.
+        :param row_differences: A list to add the differences between common rows to, each along with the number of the
+                                row in the first table.
+        :param rows_only_in_first: A list to add the rows unique to the first table to, each along with its row number.
+        :param rows_only_in_second: A list to add the rows unique to the second table to, each along with its row
+                                    number.
         """
 
-        ref1              = self.first_table_ref
-        ref2              = self.second_table_ref
-        self.first_table  = XLTable.load_from_file(ref1.filepath, ref1.sheet_name, ref1.table_name)
-        self.second_table = XLTable.load_from_file(ref2.filepath, ref2.sheet_name, ref2.table_name)
+        ref1 = self.first_table_ref
+        ref2 = self.second_table_ref
+        first_column_names:  list[str] = self._get_table_definitions()[0].column_names
+        second_column_names: list[str] = self._get_table_definitions()[1].column_names
+        partition_count: int = self._get_partition_count()
+
+        with tempfile.TemporaryDirectory(prefix="ExcelDiff-", dir=self.spill_directory) as spill_dir:
+            first_spill  = PartitionSpill(spill_dir, "first",  partition_count,
+                                          self._get_spill_buffer_rows(len(first_column_names)))
+            second_spill = PartitionSpill(spill_dir, "second", partition_count,
+                                          self._get_spill_buffer_rows(len(second_column_names)))
+
+            first_types:  dict[str, set[type]] = {}
+            second_types: dict[str, set[type]] = {}
+            self.first_column_names,  self.first_table \
+                = self._spill_table(ref1, second_column_names, first_spill,  first_types)
+            self.second_column_names, self.second_table \
+                = self._spill_table(ref2, first_column_names,  second_spill, second_types)
+            inferred_normalisers: dict[str, ValueNormaliser] | None \
+                = ({name: infer_normaliser_from_types(types | second_types[name])
+                    for name, types in first_types.items() if name in second_types}
+                   if self.infer_normalisers else None)
+
+            rows_total: int = self.first_table.row_count + self.second_table.row_count
+            rows_diffed: int = 0
+
+            for partition in range(partition_count):
+                self._report_progress("Comparing partitions", rows_diffed, rows_total)
+                rows_diffed += self._diff_partition(first_spill, second_spill, partition, inferred_normalisers,
+                                                    row_differences, rows_only_in_first, rows_only_in_second)
 
     def discard_loaded_tables(self) -> None:
         """
-        Closes and discards the tables referenced by this diff.
+        Discards the values of the tables referenced by this diff.
         """
 
-        self.first_table.source_workbook.close()
-        self.second_table.source_workbook.close()
         self.first_table  = None
         self.second_table = None
 
     def build_table_indices(self) -> None:
         """
         Builds indexes of the loaded tables, of the keys for each row against their row numbers. This allows for faster
-        random access to rows.
+        random access to rows. Where rows are to be compared row by row, this also fingerprints each row, so that cells
+        that are the same in both tables can be passed over without comparing them one by one.
         """
 
-        self._build_row_index(self.first_table,  self.row_numbers_for_key_sets_in_first)
-        self._build_row_index(self.second_table, self.row_numbers_for_key_sets_in_second)
+        rows_total: int = self.first_table.row_count + self.second_table.row_count
+        self._comparison_normalisers = self._choose_comparison_normalisers()
+
+        # Tables read from snapshots, or snapshotted as they were parsed, come with their key indices already built.
+        self._report_progress("Indexing rows", 0, rows_total)
+
+        if(not self._first_key_index_built):
+            self._build_row_index(self.first_table, self.row_numbers_for_key_sets_in_first)
+            self._first_key_index_built = True
+
+        self._report_progress("Indexing rows", self.first_table.row_count, rows_total)
+
+        if(not self._second_key_index_built):
+            self._build_row_index(self.second_table, self.row_numbers_for_key_sets_in_second)
+            self._second_key_index_built = True
+
+        if(self.columnwise_comparison):
+            return
+
+        self._report_progress("Fingerprinting rows", 0, rows_total)
+        self.fingerprinted_column_names = [name for name, col1, col2 in self._get_shared_columns()
+                                           if _can_fingerprint_column(col1, col2)]
+        self.row_fingerprints_in_first = self._get_row_fingerprints(self.first_table)
+        self._report_progress("Fingerprinting rows", self.first_table.row_count, rows_total)
+        self.row_fingerprints_in_second = self._get_row_fingerprints(self.second_table)
 
     def read_row_differences(self) -> None:
         """
@@ -229,23 +1045,166 @@ class TableDiff:
         self.row_differences    = []
         self.rows_only_in_first = []
 
-        for row in self.first_table.row_iterator:
-            keys: dict[str, Any] = {}
+        for difference in self._iterate_first_table_differences():
+            if(isinstance(difference, UniqueRow)):
+                self._add_row_only_in_first(difference.values)
+            else:
+                self._add_row_difference(difference)
 
-            for key_col_name in self.key_column_names:
-                keys[key_col_name] = row[key_col_name].value
+    def _iterate_first_table_differences(self) -> Iterator[RowDifference | UniqueRow]:
+        """
+        Walks the first table, finding the differences between rows common to both tables and the rows unique to the
+        first table as it goes.
+        :return: An iterator over the differences between common rows, and the rows unique to the first table, as
+                 they're found.
+        """
 
-            matching_row_in_second: dict[str, Cell] | None \
-                = self._get_row_with_keys(self.second_table, keys, self.row_numbers_for_key_sets_in_second)
+        if(self.columnwise_comparison):
+            yield from self._iterate_first_table_differences_columnwise()
+            return
+
+        shared_columns: list[_ComparedColumn] = self._get_compared_columns()
+        index_of_second: dict[tuple[str, ...], int] = self.row_numbers_for_key_sets_in_second
+        row_count: int = self.first_table.row_count
+
+        fingerprints_in_first:  list[int] = self.row_fingerprints_in_first
+        fingerprints_in_second: list[int] = self.row_fingerprints_in_second
+        fingerprinted_column_names: set[str] = set(self.fingerprinted_column_names)
+        unfingerprinted_columns: list[_ComparedColumn] \
+            = [x for x in shared_columns if x[0] not in fingerprinted_column_names]
+        fingerprinted_columns: list[_ComparedColumn] \
+            = [x for x in shared_columns if x[0] in fingerprinted_column_names]
+
+        key_columns: list[Sequence[Any]] = [self.first_table.column(x) for x in self.key_column_names]
 
-            if(matching_row_in_second is None):
-                self.rows_only_in_first.append(row)
+        for row_no, key in enumerate(self._iterate_normalised_keys(self.first_table)):
+            if(row_no % _PROGRESS_INTERVAL_ROWS == 0):
+                self._report_progress("Comparing rows", row_no, row_count)
+
+            matching_row_no_in_second: int | None = index_of_second.get(key)
+
+            if(matching_row_no_in_second is None):
+                yield UniqueRow(self.first_table.get_row_values(row_no), True)
                 continue
 
-            cell_diffs: list[CellDifference] = self._get_differences_between_rows(row, matching_row_in_second)
+            # Rows with the same fingerprint and equal values in every fingerprinted column have the same normalised
+            # values in those columns, so only the rest of their cells need comparing. The values are checked as well
+            # as the fingerprints, as unequal values can hash the same.
+            columns_to_compare: list[_ComparedColumn] = shared_columns
+
+            if(fingerprints_in_first[row_no] == fingerprints_in_second[matching_row_no_in_second]
+                    and all(col1[row_no] == col2[matching_row_no_in_second]
+                            for _, col1, col2, _ in fingerprinted_columns)):
+                if(len(unfingerprinted_columns) == 0):
+                    continue
+
+                columns_to_compare = unfingerprinted_columns
+
+            cell_diffs: list[CellDifference] \
+                = self._get_differences_between_rows(columns_to_compare, row_no, matching_row_no_in_second)
 
             if(len(cell_diffs) != 0):
-                self.row_differences.append(RowDifference(keys, cell_diffs))
+                yield RowDifference(tuple([col[row_no] for col in key_columns]), cell_diffs)
+
+    def _iterate_first_table_differences_columnwise(self) -> Iterator[RowDifference | UniqueRow]:
+        """
+        Walks the first table, finding the differences between rows common to both tables and the rows unique to the
+        first table, comparing the common rows a column at a time.
+
+        The common rows of both tables are aligned by key, then compared in blocks of `_COLUMNWISE_BLOCK_ROWS` rows.
+        Each shared column's values for a block's rows are compared in one batch to produce a mask of which rows may
+        differ in that column, and the block's differences are yielded before the next block is compared, so they
+        needn't all be held at once, as where they're streamed to a result sink. Values of the same type that are equal
+        always normalise to the same value, so only the values picked out by the mask are normalised and compared. Where
+        a column is dictionary-encoded in both tables, its values are compared by their codes, translated from one
+        dictionary to the other, and each distinct value picked out by the mask is only normalised once. Difference
+        records are only built for rows where a mask has a hit.
+        :return: An iterator over the rows unique to the first table, as they're found, followed by the differences
+                 between common rows.
+        """
+
+        index_of_second: dict[tuple[str, ...], int] = self.row_numbers_for_key_sets_in_second
+        row_count: int = self.first_table.row_count
+        matched_in_first:  list[int] = []
+        matched_in_second: list[int] = []
+
+        for row_no, key in enumerate(self._iterate_normalised_keys(self.first_table)):
+            if(row_no % _PROGRESS_INTERVAL_ROWS == 0):
+                self._report_progress("Comparing rows", row_no, row_count)
+
+            matching_row_no_in_second: int | None = index_of_second.get(key)
+
+            if(matching_row_no_in_second is None):
+                yield UniqueRow(self.first_table.get_row_values(row_no), True)
+                continue
+
+            matched_in_first.append(row_no)
+            matched_in_second.append(matching_row_no_in_second)
+
+        compared_columns: list[_ComparedColumn] = self._get_compared_columns()
+        key_columns: list[Sequence[Any]] = [self.first_table.column(x) for x in self.key_column_names]
+
+        # Translated once for the whole table, for each column dictionary-encoded in both tables.
+        codes_in_second: list[list[int] | None] \
+            = [col1.translate_codes(col2)
+               if isinstance(col1, DictionaryColumn) and isinstance(col2, DictionaryColumn) else None
+               for _, col1, col2, _ in compared_columns]
+
+        for start in range(0, len(matched_in_first), _COLUMNWISE_BLOCK_ROWS):
+            block_in_first:  list[int] = matched_in_first[start:start + _COLUMNWISE_BLOCK_ROWS]
+            block_in_second: list[int] = matched_in_second[start:start + _COLUMNWISE_BLOCK_ROWS]
+            cell_diffs_by_position: dict[int, list[CellDifference]] \
+                = self._compare_block_columnwise(compared_columns, codes_in_second, block_in_first, block_in_second)
+
+            for position in sorted(cell_diffs_by_position.keys()):
+                row_no: int = block_in_first[position]
+                yield RowDifference(tuple([col[row_no] for col in key_columns]), cell_diffs_by_position[position])
+
+    @staticmethod
+    def _compare_block_columnwise(compared_columns: list[_ComparedColumn],
+                                  codes_in_second:  list[list[int] | None],
+                                  block_in_first:   list[int],
+                                  block_in_second:  list[int]) \
+            -> dict[int, list[CellDifference]]:
+        """
+        Compares a block of matched rows a column at a time, as per `._iterate_first_table_differences_columnwise()`.
+        :param compared_columns: The columns present in both tables, along with how each is normalised.
+        :param codes_in_second: For each compared column, the codes of the first table's dictionary translated to the
+                                second's where the column is dictionary-encoded in both tables. Otherwise, None.
+        :param block_in_first: The numbers in the first table of the rows in the block.
+        :param block_in_second: The numbers in the second table of the matching rows, in the same order.
+        :return: The cell differences of each row in the block with any differences, mapped against the row's position
+                 in the block. Columns are processed in order, so each row's cell differences are in column order.
+        """
+
+        result: dict[int, list[CellDifference]] = {}
+        positions = range(len(block_in_first))
+
+        for (name, col1, col2, normalise), translated_codes in zip(compared_columns, codes_in_second):
+            maybe_different: list[int]
+            normalised1: list[str]
+            normalised2: list[str]
+
+            # The values that may differ are normalised in one batch per column, so comparing them is plain equality.
+            if(translated_codes is not None):
+                codes1 = map(translated_codes.__getitem__, map(col1.codes.__getitem__, block_in_first))
+                codes2 = map(col2.codes.__getitem__, block_in_second)
+                maybe_different = list(compress(positions, map(ne, codes1, codes2)))
+                normalised1 = map_values(normalise, col1, map(block_in_first.__getitem__,  maybe_different))
+                normalised2 = map_values(normalise, col2, map(block_in_second.__getitem__, maybe_different))
+            else:
+                values1: list[Any] = take_values(col1, block_in_first)
+                values2: list[Any] = take_values(col2, block_in_second)
+                mask = map(or_, map(ne, values1, values2), map(is_not, map(type, values1), map(type, values2)))
+                maybe_different = list(compress(positions, mask))
+                normalised1 = list(map(normalise, map(values1.__getitem__, maybe_different)))
+                normalised2 = list(map(normalise, map(values2.__getitem__, maybe_different)))
+
+            for position, v1val, v2val in zip(maybe_different, normalised1, normalised2):
+                if(v1val != v2val):
+                    result.setdefault(position, []).append(CellDifference(name, v1val, v2val))
+
+        return result
 
     def read_rows_only_in_second(self) -> None:
         """
@@ -254,115 +1213,217 @@ class TableDiff:
 
         self.rows_only_in_second = []
 
-        for row in self.second_table.row_iterator:
-            keys: dict[str, Any] = {}
+        for row in self._iterate_rows_only_in_second():
+            self._add_row_only_in_second(row)
 
-            for key_col_name in self.key_column_names:
-                keys[key_col_name] = row[key_col_name].value
+    def _iterate_rows_only_in_second(self) -> Iterator[tuple[Any, ...]]:
+        """
+        Walks the second table, finding the rows unique to it.
+        :return: An iterator over the rows unique to the second table, as tuples of values in column order.
+        """
+
+        index_of_first: dict[tuple[str, ...], int] = self.row_numbers_for_key_sets_in_first
+        row_count: int = self.second_table.row_count
 
-            matching_row_exists_in_first: bool \
-                = self.row_numbers_for_key_sets_in_first.get(Utils.dict_to_str(keys)) is not None
+        for row_no, key in enumerate(self._iterate_normalised_keys(self.second_table)):
+            if(row_no % _PROGRESS_INTERVAL_ROWS == 0):
+                self._report_progress("Finding rows unique to second", row_no, row_count)
 
-            if(not matching_row_exists_in_first):
-                self.rows_only_in_second.append(row)
+            if(key not in index_of_first):
+                yield self.second_table.get_row_values(row_no)
 
     def read_columns_only_in_first(self) -> None:
         """
         Reads the rows unique to the first table into this object.
         """
 
-        self.columns_only_in_first = self._get_columns_not_in_other(self.first_table, self.second_table)
+        self.columns_only_in_first = self._get_columns_not_in_other(self.first_table, self.second_column_names)
 
     def read_columns_only_in_second(self) -> None:
         """
         Reads the rows unique to the second table into this object.
         """
 
-        self.columns_only_in_second = self._get_columns_not_in_other(self.second_table, self.first_table)
+        self.columns_only_in_second = self._get_columns_not_in_other(self.second_table, self.first_column_names)
 
     def save_to_file(self) -> None:
         """
         Creates an Excel file at the stored filepath and populates it, as needed, with sheets for the differences
         between common rows, the rows unique to one table or another, and the columns unique to one table or another.
+
+        The file is written in write-only mode, with each sheet's rows streamed into it in turn, so the whole result
+        doesn't need to be held in memory as a workbook before being saved.
+
+        If this diff has a result sink, the differences between rows have already been streamed to it, so this only
+        writes the columns unique to one table or another to the sink, and no Excel file is created.
         """
 
-        wb = openpyxl.Workbook()
+        if(self.result_sink is not None):
+            self._write_columns_to_sink()
+            return
+
+        wb = openpyxl.Workbook(write_only=True)
+        self._add_sheets_to_workbook(wb)
+        wb.save(self.result_filepath)
+
+    def _add_sheets_to_workbook(self, wb: Workbook, sheet_name_prefix: str = "", table_name_prefix: str = "") -> None:
+        """
+        Adds sheets for the differences that have been processed to the end of the given workbook, for the kinds of
+        difference there are any of. The tables need to still be loaded.
+        :param wb: The workbook to add the sheets to. This may be in write-only mode.
+        :param sheet_name_prefix: Text to put before the name of each sheet added.
+        :param table_name_prefix: Text to put before the name of each table added.
+        """
 
-        self._add_diffs_sheet_to_workbook(wb)
-        self._add_rows_only_in_one_sheet_to_workbook(wb, self.rows_only_in_first,
-                                                     2, "Rows unique to first", "RowsUniqueToFirst")
+        rows_total: int = len(self.row_differences) + len(self.rows_only_in_first) + len(self.rows_only_in_second)
+        rows_saved: int = 0
 
-        self._add_rows_only_in_one_sheet_to_workbook(wb, self.rows_only_in_second,
-                                                     3, "Rows unique to second", "RowsUniqueToSecond")
+        self._report_progress("Saving", rows_saved, rows_total)
+        self._add_diffs_sheet_to_workbook(wb, sheet_name_prefix + "Differences", table_name_prefix + "DiffTable")
+        rows_saved += len(self.row_differences)
+
+        self._report_progress("Saving", rows_saved, rows_total)
+        self._add_rows_only_in_one_sheet_to_workbook(wb, self.first_column_names, self.rows_only_in_first,
+                                                     sheet_name_prefix + "Rows unique to first",
+                                                     table_name_prefix + "RowsUniqueToFirst")
+        rows_saved += len(self.rows_only_in_first)
+
+        self._report_progress("Saving", rows_saved, rows_total)
+        self._add_rows_only_in_one_sheet_to_workbook(wb, self.second_column_names, self.rows_only_in_second,
+                                                     sheet_name_prefix + "Rows unique to second",
+                                                     table_name_prefix + "RowsUniqueToSecond")
+        rows_saved += len(self.rows_only_in_second)
+
+        self._report_progress("Saving", rows_saved, rows_total)
 
         key_cols_in_first:  list[TableColumnContent] = self._get_key_columns(self.first_table)
         key_cols_in_second: list[TableColumnContent] = self._get_key_columns(self.second_table)
 
         self._add_columns_only_in_one_sheet_to_workbook(wb, key_cols_in_first, self.columns_only_in_first,
-                                                        4, "Columns unique to first", "ColumnsUniqueToFirst")
+                                                        sheet_name_prefix + "Columns unique to first",
+                                                        table_name_prefix + "ColumnsUniqueToFirst")
 
         self._add_columns_only_in_one_sheet_to_workbook(wb, key_cols_in_second, self.columns_only_in_second,
-                                                        5, "Columns unique to second", "ColumnsUniqueToSecond")
+                                                        sheet_name_prefix + "Columns unique to second",
+                                                        table_name_prefix + "ColumnsUniqueToSecond")
 
-        wb.remove_sheet(wb.get_sheet_by_name("Sheet"))
-        wb.save(self.result_filepath)
+    def _write_columns_to_sink(self) -> None:
+        """
+        Writes the columns unique to one table or another to this diff's result sink, along with the key columns of the
+        tables they're in.
+        """
 
-    def _add_diffs_sheet_to_workbook(self, wb: Workbook) -> None:
+        self._report_progress("Saving", 0, None)
+
+        if(len(self.columns_only_in_first) != 0):
+            self.result_sink.write_columns_only_in_first(self._get_key_columns(self.first_table),
+                                                         self.columns_only_in_first)
+
+        if(len(self.columns_only_in_second) != 0):
+            self.result_sink.write_columns_only_in_second(self._get_key_columns(self.second_table),
+                                                          self.columns_only_in_second)
+
+    def _add_row_difference(self, difference: RowDifference) -> None:
+        """
+        Records the differences between a pair of common rows, streaming them to this diff's result sink if it has one,
+        or otherwise adding them to this object.
+        :param difference: The differences between the rows.
+        """
+
+        if(self.result_sink is not None):
+            self.result_sink.write_row_difference(difference)
+        else:
+            self.row_differences.append(difference)
+
+    def _add_row_only_in_first(self, row: tuple[Any, ...]) -> None:
+        """
+        Records a row unique to the first table, streaming it to this diff's result sink if it has one, or otherwise
+        adding it to this object.
+        :param row: The values of the row, in the same order as the first table's column names.
+        """
+
+        if(self.result_sink is not None):
+            self.result_sink.write_row_only_in_first(self.first_column_names, row)
+        else:
+            self.rows_only_in_first.append(row)
+
+    def _add_row_only_in_second(self, row: tuple[Any, ...]) -> None:
+        """
+        Records a row unique to the second table, streaming it to this diff's result sink if it has one, or otherwise
+        adding it to this object.
+        :param row: The values of the row, in the same order as the second table's column names.
+        """
+
+        if(self.result_sink is not None):
+            self.result_sink.write_row_only_in_second(self.second_column_names, row)
+        else:
+            self.rows_only_in_second.append(row)
+
+    def _add_diffs_sheet_to_workbook(self, wb: Workbook, sheet_name: str, table_name: str) -> None:
         """
         Write the differences between common rows that have been processed into the given workbook as a sheet.
         :param wb: The workbook to write the sheet into.
+        :param sheet_name: The name of the sheet.
+        :param table_name: The name of the table to be written.
         """
 
         if(len(self.row_differences) == 0):
             return
 
-        wb.create_sheet("Differences", 1)
-        sheet = wb.get_sheet_by_name("Differences")
+        changed_column_names: list[str] = self._get_changed_column_names()
+        key_column_count: int = len(self.key_column_names)
+        column_names: list[str] = list(self.key_column_names)
 
-        for i in range(len(self.key_column_names)):
-            sheet.cell(1, i + 1).value = self.key_column_names[i]
+        for name in changed_column_names:
+            column_names.append(name + " * 1")
+            column_names.append(name + " * 2")
 
-        table = Table(displayName = "DiffTable",
-                      ref         = f"A1:{Utils.convert_int_to_alphabetic_number(len(self.key_column_names))}1")
+        # The position of the "* 1" column of each pair. The "* 2" column always immediately follows it.
+        column_positions: dict[str, int] \
+            = {name: key_column_count + (i * 2) for i, name in enumerate(changed_column_names)}
 
-        sheet.add_table(table)
-        tbl_diff = XLTable(self.result_filepath, wb, sheet, table)
+        empty_row: list[Any] = [None] * len(column_names)
 
-        for diff in self.row_differences:
-            tbl_diff.add_row()
-            row = tbl_diff.bottom_row
+        def rows() -> Iterator[list[Any]]:
+            for diff in self.row_differences:
+                row: list[Any] = empty_row.copy()
+                row[:key_column_count] = diff.key_values
 
-            for k, v in diff.keys.items():
-                row[k].value = v
+                for cell_diff in diff.cell_differences:
+                    position: int = column_positions[cell_diff.column_name]
+                    row[position]     = cell_diff.value1
+                    row[position + 1] = cell_diff.value2
 
-            for cell_diff in diff.cell_differences:
-                col_name_1 = cell_diff.column_name + " * 1"
-                col_name_2 = cell_diff.column_name + " * 2"
-                columns_added: bool = False
+                yield row
 
-                if(not tbl_diff.has_column(col_name_1)):
-                    tbl_diff.add_column(col_name_1)
-                    tbl_diff.add_column(col_name_2)
-                    columns_added = True
+        append_table_sheet(wb, sheet_name, table_name, column_names, rows())
 
-                if(columns_added):
-                    row = tbl_diff.bottom_row
+    def _get_changed_column_names(self) -> list[str]:
+        """
+        Gets the names of the columns with at least one difference between common rows, in a single pass over the
+        differences that have been processed.
+        :return: The names of the columns with differences, in the order they appear in the first table.
+        """
 
-                row[col_name_1].value = cell_diff.value1
-                row[col_name_2].value = cell_diff.value2
+        changed_column_names: set[str] = set()
+
+        for diff in self.row_differences:
+            changed_column_names.update([x.column_name for x in diff.cell_differences])
+
+        return [x for x in self.first_column_names if x in changed_column_names]
 
     def _add_rows_only_in_one_sheet_to_workbook(self,
-                                                wb:          Workbook,
-                                                rows:        list[dict[str, Cell]],
-                                                sheet_index: int,
-                                                sheet_name:  str,
-                                                table_name:  str) \
+                                                wb:                 Workbook,
+                                                table_column_names: list[str],
+                                                rows:               list[tuple[Any, ...]],
+                                                sheet_name:         str,
+                                                table_name:         str) \
             -> None:
         """
-        Write the rows unique to one of the tables to the given workbook as a sheet.
+        Write the rows unique to one of the tables to the given workbook as a sheet, with the key columns first.
         :param wb: The workbook to write the sheet into.
-        :param rows: The rows unique to the table.
-        :param sheet_index: The index of the sheet in the workbook.
+        :param table_column_names: The names of the columns of the table the rows are in, in order.
+        :param rows: The rows unique to the table, as tuples of values in the same order as the table's column names.
         :param sheet_name: The name of the sheet.
         :param table_name: The name of the table to be written.
         """
@@ -370,37 +1431,15 @@ class TableDiff:
         if(len(rows) == 0):
             return
 
-        Workbook.create_sheet(wb, sheet_name, sheet_index)
-        sheet: Worksheet = wb.get_sheet_by_name(sheet_name)
-        key_column_count = len(self.key_column_names)
-
-        for i in range(key_column_count):
-            sheet.cell(1, i + 1).value = self.key_column_names[i]
-
-        non_key_column_names = [x for x in rows[0].keys() if x not in self.key_column_names]
-        table_width = len(rows[0].keys())
-
-        for i in range(len(non_key_column_names)):
-            sheet.cell(1, key_column_count + i + 1).value = non_key_column_names[i]
-
-        table = Table(displayName = table_name,
-                      ref         = f"A1:{Utils.convert_int_to_alphabetic_number(table_width)}1")
-
-        sheet.add_table(table)
-        tbl = XLTable(self.result_filepath, wb, sheet, table)
-
-        for source_row in rows:
-            tbl.add_row()
-            dest_row = tbl.bottom_row
-
-            for k, v in source_row.items():
-                dest_row[k].value = v.value
+        non_key_column_names = [x for x in table_column_names if x not in self.key_column_names]
+        column_names = self.key_column_names + non_key_column_names
+        positions: list[int] = [table_column_names.index(x) for x in column_names]
+        append_table_sheet(wb, sheet_name, table_name, column_names, ([x[i] for i in positions] for x in rows))
 
     def _add_columns_only_in_one_sheet_to_workbook(self,
                                                    wb:          Workbook,
                                                    key_columns: list[TableColumnContent],
                                                    columns:     list[TableColumnContent],
-                                                   sheet_index: int,
                                                    sheet_name:  str,
                                                    table_name:  str) \
             -> None:
@@ -409,7 +1448,6 @@ class TableDiff:
         :param wb: The workbook to write the sheet into.
         :param key_columns: The columns used to uniquely identify rows in the two tables.
         :param columns: The columns unique to one of the tables.
-        :param sheet_index: The index of the sheet in the workbook.
         :param sheet_name: The name of the sheet.
         :param table_name: The name of the table to be written.
         """
@@ -417,132 +1455,458 @@ class TableDiff:
         if(len(columns) == 0):
             return
 
-        wb.create_sheet(sheet_name, sheet_index)
-        sheet = wb.get_sheet_by_name(sheet_name)
-        row_count = len(columns[0].values)
+        all_columns: list[TableColumnContent] = key_columns + columns
+
+        append_column_table_sheet(wb, sheet_name, table_name,
+                                  [x.column_name for x in all_columns],
+                                  [x.values for x in all_columns])
+
+    def _get_stored_table(self, ref: TableReference, index: dict[tuple[str, ...], int]) \
+            -> tuple[ColumnarTable | None, bool]:
+        """
+        Gets the values of a table without parsing its file, from this diff's table cache, or failing that from its
+        snapshot cache, if this diff has either. A table read from a snapshot is added to the table cache.
+        :param ref: A reference to the table.
+        :param index: The dictionary to populate with the table's key index, if the table is read from a snapshot. It
+                      should be empty.
+        :return: A tuple of the values of the table, or None if it needs to be parsed from its file, and whether the
+                 given dictionary was populated with the table's key index.
+        """
+
+        if(self.table_cache is not None):
+            table: ColumnarTable | None = self.table_cache.get_cached_table(ref.filepath, ref.sheet_name,
+                                                                            ref.table_name, self.read_only)
+
+            if(table is not None):
+                return table, False
+
+        if(self.snapshot_cache is None):
+            return None, False
+
+        snapshot: TableSnapshot | None = self.snapshot_cache.get_snapshot(ref.filepath, ref.sheet_name, ref.table_name,
+                                                                          self.key_column_names, self.read_only)
+
+        if(snapshot is None):
+            return None, False
+
+        # Snapshotted key indices are only built with the default key normalisation.
+        index_built: bool = not self._has_key_normalisers() and snapshot.key_index is not None
+
+        if(index_built):
+            index.update(snapshot.key_index)
 
-        for i in range(len(key_columns)):
-            col: TableColumnContent = key_columns[i]
-            sheet.cell(1, i + 1).value = col.column_name
+        if(self.table_cache is not None):
+            self.table_cache.add_table(ref.filepath, ref.sheet_name, ref.table_name, self.read_only, snapshot.table)
 
-            for j in range(len(col.values)):
-                sheet.cell(j + 2, i + 1).value = col.values[j]
+        return snapshot.table, index_built
 
-        table = Table(displayName=table_name,
-                      ref=f"A1:{Utils.convert_int_to_alphabetic_number(len(key_columns))}{row_count + 1}")
+    def _parse_table(self, ref: TableReference, index: dict[tuple[str, ...], int]) -> tuple[ColumnarTable, bool]:
+        """
+        Loads the values of a table from its file, and stores them in this diff's table and snapshot caches.
+        :param ref: A reference to the table to load.
+        :param index: The dictionary to populate with the table's key index, if it's snapshotted. It should be empty.
+        :return: A tuple of the values of the table, and whether the given dictionary was populated with the table's key
+                 index.
+        """
+
+        table: ColumnarTable = ColumnarTable.load_from_file(ref.filepath, ref.sheet_name, ref.table_name,
+                                                            self.read_only, self.direct_parse, self.compact_columns)
+
+        return table, self._store_parsed_table(ref, table, index)
+
+    def _store_parsed_table(self, ref: TableReference, table: ColumnarTable, index: dict[tuple[str, ...], int]) \
+            -> bool:
+        """
+        Adds the values of a table just loaded from its file to this diff's table cache, if it has one, and snapshots
+        them along with the table's key index, if it has a snapshot cache.
+        :param ref: A reference to the table.
+        :param table: The values of the table.
+        :param index: The dictionary to populate with the table's key index, if it's snapshotted. It should be empty.
+        :return: True if the given dictionary was populated with the table's key index. Otherwise, false.
+        """
+
+        if(self.table_cache is not None):
+            self.table_cache.add_table(ref.filepath, ref.sheet_name, ref.table_name, self.read_only, table)
+
+        if(self.snapshot_cache is None):
+            return False
+
+        # A key index built with normalisers of this diff's own would be wrong for other diffs, so is left out. Diffs
+        # reading the snapshot build their own.
+        if(self._has_key_normalisers()):
+            self.snapshot_cache.add_snapshot(ref.filepath, ref.sheet_name, ref.table_name, self.key_column_names,
+                                             self.read_only, TableSnapshot(table, None))
+            return False
+
+        self._build_row_index(table, index)
+        self.snapshot_cache.add_snapshot(ref.filepath, ref.sheet_name, ref.table_name, self.key_column_names,
+                                         self.read_only, TableSnapshot(table, index))
+        return True
+
+    def _get_table_definitions(self) -> tuple[TableDefinition, TableDefinition]:
+        """
+        Gets the definitions of the two tables, without loading any cell data. These are only read from the tables'
+        files once per run of processing this diff.
+        :return: A tuple of the definitions of the first and second tables.
+        """
 
-        sheet.add_table(table)
-        tbl = XLTable(self.result_filepath, wb, sheet, table)
+        if(self._table_definitions is None):
+            self._table_definitions = tuple(get_table_definition(x.filepath, x.sheet_name, x.table_name)
+                                            for x in (self.first_table_ref, self.second_table_ref))
 
-        for col in columns:
-            tbl.add_column(col.column_name, col.values)
+        return self._table_definitions
 
-    def _build_row_index(self, table: XLTable, index: dict[str, int]) -> None:
+    def _get_partition_count(self) -> int:
         """
-        Populates a given dictionary with string-encoded versions of the keys of every row, and the number that row
-        appears in.
+        Gets the number of partitions the tables need to be split into to be diffed within this diff's memory budget.
+        :return: The number of partitions needed, based on the sizes of the tables' ranges. This is 1 where the tables
+                 can be diffed in memory.
+        """
+
+        if(self.memory_budget is None):
+            return 1
+
+        estimated_bytes: int = sum(x.cell_count for x in self._get_table_definitions()) * _ESTIMATED_BYTES_PER_CELL
+        return max(math.ceil(estimated_bytes / self.memory_budget), 1)
+
+    def _get_spill_buffer_rows(self, column_count: int) -> int:
+        """
+        Gets the number of rows of a table that may be held in memory while splitting it into partitions, before they're
+        written to the partition files, so that they take up no more than their share of this diff's memory budget.
+        :param column_count: The number of columns in the table.
+        :return: The total number of rows to buffer, across all partitions.
+        """
+
+        return int(self.memory_budget * _SPILL_BUFFER_SHARE) // (max(column_count, 1) * _ESTIMATED_BYTES_PER_CELL)
+
+    def _spill_table(self,
+                     ref:                TableReference,
+                     other_column_names: list[str],
+                     spill:              PartitionSpill,
+                     value_types:        dict[str, set[type]]) \
+            -> tuple[list[str], ColumnarTable]:
+        """
+        Streams the rows of a table into partition files, by a hash of each row's key. The table is always streamed in
+        read-only mode, so the whole of its workbook is never loaded.
+        :param ref: A reference to the table to spill.
+        :param other_column_names: The names of the columns in the other table being compared.
+        :param spill: The partition files to write the rows to.
+        :param value_types: A dictionary to collect the types of the values in each of the table's columns in, against
+                            the names of the columns, where this diff infers normalisers. Otherwise, left empty.
+        :return: A tuple of the names of the table's columns, and a table of just its key columns and the columns not in
+                 the other table, which are kept in memory in full.
+        """
+
+        with open_table_rows(ref.filepath, ref.sheet_name, ref.table_name, True, self.direct_parse) \
+                as (column_names, rows):
+            key_positions: list[int] = [column_names.index(x) for x in self.key_column_names]
+            kept_column_names: list[str] = self.key_column_names + [x for x in column_names
+                                                                    if x not in other_column_names]
+            kept_positions: list[int] = [column_names.index(x) for x in kept_column_names]
+            kept_columns: list[list[Any]] = [[] for _ in kept_column_names]
+            partition_count: int = spill.partition_count
+            column_types: list[set[type]] = [value_types.setdefault(x, set()) for x in column_names] \
+                                            if self.infer_normalisers else []
+
+            for row_no, row in enumerate(rows):
+                if(row_no % _PROGRESS_INTERVAL_ROWS == 0):
+                    self._report_progress("Splitting tables into partitions", row_no, None)
+
+                key: tuple[str, ...] = self._normalise_key([row[i] for i in key_positions])
+                spill.add(hash(key) % partition_count, row_no, row)
+
+                for col, i in zip(kept_columns, kept_positions):
+                    col.append(row[i])
+
+                for types, value in zip(column_types, row):
+                    types.add(type(value))
+
+        spill.flush()
+
+        if(self.compact_columns):
+            kept_columns = [compact_column(x) for x in kept_columns]
+
+        return column_names, ColumnarTable(kept_column_names, kept_columns)
+
+    def _diff_partition(self,
+                        first_spill:          PartitionSpill,
+                        second_spill:         PartitionSpill,
+                        partition:            int,
+                        inferred_normalisers: dict[str, ValueNormaliser] | None,
+                        row_differences:      list[tuple[int, RowDifference]],
+                        rows_only_in_first:   list[tuple[int, tuple[Any, ...]]],
+                        rows_only_in_second:  list[tuple[int, tuple[Any, ...]]]) \
+            -> int:
+        """
+        Diffs one partition of the first table against the partition with the same number of the second table, adding
+        the results to the given lists.
+        :param first_spill: The partitions of the first table.
+        :param second_spill: The partitions of the second table.
+        :param partition: The number of the partition to diff.
+        :param inferred_normalisers: The normalisers inferred from the whole of both tables, mapped against the names of
+                                     the columns, or None where this diff doesn't infer normalisers.
+        :param row_differences: A list to add the differences between common rows in the partition to, each along with
+                                the number of the row in the first table.
+        :param rows_only_in_first: A list to add the rows in the partition unique to the first table to, each along with
+                                   its row number.
+        :param rows_only_in_second: A list to add the rows in the partition unique to the second table to, each along
+                                    with its row number.
+        :return: The number of rows in the partition, across both tables.
+        """
+
+        first_row_nos,  first_rows  = self._read_partition(first_spill,  partition)
+        second_row_nos, second_rows = self._read_partition(second_spill, partition)
+
+        partition_diff = TableDiff(self.first_table_ref, self.second_table_ref, self.result_filepath,
+                                   self.key_column_names,
+                                   columnwise_comparison = self.columnwise_comparison,
+                                   column_normalisers    = self.column_normalisers,
+                                   infer_normalisers     = self.infer_normalisers)
+
+        # Shared so that cancelling this diff also stops the partition being diffed.
+        partition_diff.share_cancellation(self._cancel_requested)
+        partition_diff._inferred_normalisers = inferred_normalisers
+
+        partition_diff.first_table  = ColumnarTable.from_rows(self.first_column_names,  first_rows)
+        partition_diff.second_table = ColumnarTable.from_rows(self.second_column_names, second_rows)
+        partition_diff.build_table_indices()
+        partition_diff.read_row_differences()
+        partition_diff.read_rows_only_in_second()
+
+        index_of_first:  dict[tuple[str, ...], int] = partition_diff.row_numbers_for_key_sets_in_first
+        index_of_second: dict[tuple[str, ...], int] = partition_diff.row_numbers_for_key_sets_in_second
+
+        first_key_positions:  list[int] = [self.first_column_names.index(x)  for x in self.key_column_names]
+        second_key_positions: list[int] = [self.second_column_names.index(x) for x in self.key_column_names]
+
+        for diff in partition_diff.row_differences:
+            row_differences.append((first_row_nos[index_of_first[self._normalise_key(diff.key_values)]], diff))
+
+        for row in partition_diff.rows_only_in_first:
+            key: tuple[str, ...] = self._normalise_key([row[i] for i in first_key_positions])
+            rows_only_in_first.append((first_row_nos[index_of_first[key]], row))
+
+        for row in partition_diff.rows_only_in_second:
+            key = self._normalise_key([row[i] for i in second_key_positions])
+            rows_only_in_second.append((second_row_nos[index_of_second[key]], row))
+
+        return len(first_row_nos) + len(second_row_nos)
+
+    def _report_progress(self, stage: str, rows_processed: int, rows_total: int | None) -> None:
+        """
+        Reports how far through a stage of processing this diff has got to the progress callback, if there is one.
+        :param stage: A description of the current stage of processing.
+        :param rows_processed: The number of rows processed so far in the current stage.
+        :param rows_total: The total number of rows to process in the current stage, or None if this isn't known.
+        :raises DiffCancelledError: If this diff has been cancelled.
+        """
+
+        if(self._cancel_requested.is_set()):
+            raise DiffCancelledError("The diff was cancelled.")
+
+        if(self.progress_callback is not None):
+            self.progress_callback(ProgressEvent(stage, rows_processed, rows_total))
+
+    @staticmethod
+    def _read_partition(spill: PartitionSpill, partition: int) -> tuple[list[int], list[Sequence[Any]]]:
+        """
+        Reads back the rows in a partition.
+        :param spill: The partitions of a table.
+        :param partition: The number of the partition to read.
+        :return: A tuple of the numbers of the rows in the original table, and the values of those rows.
+        """
+
+        row_nos: list[int] = []
+        rows: list[Sequence[Any]] = []
+
+        for row_no, row in spill.read_partition(partition):
+            row_nos.append(row_no)
+            rows.append(row)
+
+        return row_nos, rows
+
+    def _normalise_key(self, key_values: Sequence[Any]) -> tuple[str, ...]:
+        """
+        Gets the normalised key of a row, as used in the row indices.
+        :param key_values: The row's key values, in the same order as the key column names.
+        :return: The normalised key of the row.
+        """
+
+        return tuple([normalise(x) for normalise, x in zip(self._get_key_normalisers(), key_values)])
+
+    def _build_row_index(self, table: ColumnarTable, index: dict[tuple[str, ...], int]) -> None:
+        """
+        Populates a given dictionary with normalised versions of the keys of every row, and the number that row appears
+        in.
         :param table: The table this is an index for.
         :param index: The dictionary serving as an index. It should be empty.
         """
 
-        row_no: int = -1
+        index.update(zip(self._iterate_normalised_keys(table), range(table.row_count)))
 
-        for row in table.row_iterator:
-            keys: dict[str, str] = {}
-            row_no += 1
+    def _iterate_normalised_keys(self, table: ColumnarTable) -> Iterator[tuple[str, ...]]:
+        """
+        Iterates over the normalised keys of every row in the given table.
 
-            for key_col_name in self.key_column_names:
-                keys[key_col_name] = row[key_col_name].value
+        A row's normalised key is a tuple of its values in the key columns, in the same order as the key column names,
+        each normalised by the column's normaliser, or as its string form where it has none. Two rows have the same
+        normalised key exactly when their normalised key values are the same, column for column.
+        :param table: The table to read the keys of.
+        :return: An iterator over the normalised keys of each row, in row order.
+        """
 
-            key_str: str = Utils.dict_to_str(keys)
-            index[key_str] = row_no
+        return zip(*[map_column(normalise, table.column(x))
+                     for normalise, x in zip(self._get_key_normalisers(), self.key_column_names)])
 
-    def _get_key_columns(self, table: XLTable) -> list[TableColumnContent]:
+    def _get_key_normalisers(self) -> list[Callable[[Any], str]]:
         """
-        Gets a list of the key columns in full (their names and contents) from the given table.
-        :param table: The table to get the key columns from.
-        :return: A list of the columns (as TableColumnContent objects) that form the uniquely identifying key in the
-                 given table.
+        Gets the normaliser of each key column.
+        :return: The normaliser of each key column, in the same order as the key column names. Key columns without a
+                 normaliser of their own are normalised as their string forms.
+        """
+
+        return [self.column_normalisers.get(x, str) for x in self.key_column_names]
+
+    def _has_key_normalisers(self) -> bool:
+        """
+        Gets whether any of the key columns have a normaliser of their own, in which case key indices built by other
+        diffs, such as those in snapshots, can't be relied on to match this diff's.
+        :return: True if any key column has a normaliser. Otherwise, false.
+        """
+
+        return any(x in self.column_normalisers for x in self.key_column_names)
+
+    def _choose_comparison_normalisers(self) -> dict[str, Callable[[Any], str]]:
+        """
+        Chooses how to normalise each column present in both tables, once for the whole column: by the column's own
+        normaliser where it has one, or otherwise as inferred from its values (or as given already inferred, for a
+        partition) or the default way, depending on whether this diff infers normalisers. Each is memoised, so each
+        distinct string or boolean in a column is only normalised once.
+        :return: The memoised normaliser of each column present in both tables, mapped against the name of the column.
         """
 
-        result: list[TableColumnContent] = []
+        result: dict[str, Callable[[Any], str]] = {}
 
-        for col_name in self.key_column_names:
-            col_vals: list[Any] = []
+        for name, col1, col2 in self._get_shared_columns():
+            normaliser: ValueNormaliser | None = self.column_normalisers.get(name)
 
-            for row in table.row_iterator:
-                col_vals.append(row[col_name].value)
+            if(normaliser is None and self._inferred_normalisers is not None):
+                normaliser = self._inferred_normalisers[name]
+            elif(normaliser is None):
+                normaliser = infer_normaliser(col1, col2) if self.infer_normalisers else ValueNormaliser()
 
-            result.append(TableColumnContent(col_name, col_vals))
+            result[name] = memoise_normaliser(normaliser)
 
         return result
 
+    def _get_row_fingerprints(self, table: ColumnarTable) -> list[int]:
+        """
+        Fingerprints every row in the given table, from the row's values in the fingerprinted columns.
+
+        A row's fingerprint is the hash of the tuple of its values in the fingerprinted columns, in order. Rows with
+        different fingerprints have different values in those columns, but rows with the same fingerprint may not have
+        the same values, as unequal values can hash the same (e.g. hash("") == hash(0)); their values need checking
+        before the rows are taken to be the same in those columns. Rows with different fingerprints may still have the
+        same normalised values, such as where values differ only in whitespace.
+        :param table: The table to fingerprint the rows of. This should be one of the tables being compared.
+        :return: A list of the fingerprints of each row, in row order.
+        """
+
+        if(len(self.fingerprinted_column_names) == 0):
+            return [hash(())] * table.row_count
+
+        return list(map(hash, zip(*[table.column(x) for x in self.fingerprinted_column_names])))
+
+    def _get_shared_columns(self) -> list[tuple[str, Sequence[Any], Sequence[Any]]]:
+        """
+        Gets the columns present in both tables.
+        :return: A list of tuples, one per column present in both tables, in the order they appear in the first table.
+                 Each tuple contains the name of the column, the values of the column in the first table, and the values
+                 of the column in the second table.
+        """
 
-    def _get_row_with_keys(self, table: XLTable, keys: dict[str, Any], row_number_lookup_dict: dict[str, int])\
-            -> dict[str, Cell] | None:
+        return [(name, col, self.second_table.column(name))
+                for name, col in zip(self.first_table.column_names, self.first_table.columns)
+                if self.second_table.has_column(name)]
+
+    def _get_compared_columns(self) -> list[_ComparedColumn]:
         """
-        Gets the row in the given table with the given keys.
-        :param table: The table to look a row up in.
-        :param keys: Dictionary where the keys are the names of columns that make up part of the uniquely identifying
-                     key in the table, and the values are the values for those columns in the sought-after row.
-        :param row_number_lookup_dict: A dictionary containing the numbers of every row in the given table, mapped to
-                                       the keys for those rows encoded as a string.
-        :return: If a row was found in the table (using the given index), that row as a dictionary of cells mapped to
-                 their column names. Otherwise, null.
+        Gets the columns present in both tables, along with how each is normalised for comparison.
+        :return: A list of tuples, one per column present in both tables, in the order they appear in the first table.
+                 Each tuple contains the name of the column, the values of the column in the first table, the values of
+                 the column in the second table, and the column's normaliser.
         """
 
-        key_string: str = Utils.dict_to_str(keys)
-        row_no: int | None = row_number_lookup_dict.get(key_string)
-        return (table.get_row(row_no)) if (row_no is not None) else (None)
+        return [(name, col1, col2, self._comparison_normalisers[name])
+                for name, col1, col2 in self._get_shared_columns()]
 
-    def _get_differences_between_rows(self, first: dict[str, Cell], second: dict[str, Cell]) \
+    def _get_key_columns(self, table: ColumnarTable) -> list[TableColumnContent]:
+        """
+        Gets a list of the key columns in full (their names and contents) from the given table.
+        :param table: The table to get the key columns from.
+        :return: A list of the columns (as TableColumnContent objects) that form the uniquely identifying key in the
+                 given table.
+        """
+
+        return [TableColumnContent(col_name, list(table.column(col_name))) for col_name in self.key_column_names]
+
+
+    def _get_differences_between_rows(self,
+                                      shared_columns: list[_ComparedColumn],
+                                      first_row_no:   int,
+                                      second_row_no:  int) \
             -> list[CellDifference]:
         """
-        Gets the differences between two rows.
-        :param first: One of the rows to compare, as a dictionary where the keys are the column names and the values are
-                      the corresponding cells.
-        :param second: The other row to compare, as a dictionary where the keys are the column names and the values are
-                      the corresponding cells.
+        Gets the differences between a row in the first table and a row in the second table.
+        :param shared_columns: The columns present in both tables to compare, as returned by `._get_compared_columns()`.
+        :param first_row_no: The number of the row in the first table to compare.
+        :param second_row_no: The number of the row in the second table to compare.
         :return: A list of cell differences, differences between cells in the given rows from the same columns.
         """
 
         result: list[CellDifference] = []
 
-        for k, v1 in first.items():
-            v2: Cell | None = second.get(k)
-
-            if(v2 is None):
-                continue
-
-            v1val = str(v1.value).strip() if v1.value is not None else ""
-            v2val = str(v2.value).strip() if v2.value is not None else ""
+        for k, col1, col2, normalise in shared_columns:
+            v1val = normalise(col1[first_row_no])
+            v2val = normalise(col2[second_row_no])
 
             if(v1val != v2val):
                 result.append(CellDifference(k, v1val, v2val))
 
         return result
 
-    def _get_columns_not_in_other(self, table: XLTable, other_table: XLTable) \
+    def _get_columns_not_in_other(self, table: ColumnarTable, other_column_names: list[str]) \
             -> list[TableColumnContent]:
         """
         Gets the columns in unique to one of the tables.
         :param table: The table that may contain columns not in the other.
-        :param other_table: The other table to compare.
+        :param other_column_names: The names of the columns in the other table.
         :return: A list of the columns in the first table that are not present in the second.
         """
 
         col_names_1 = table.column_names
-        col_names_2 = other_table.column_names
+        col_names_2 = set(other_column_names)
 
         cols_not_in_other: list[TableColumnContent] = []
 
         for col_name in col_names_1:
             if(col_name not in col_names_2):
-                col_vals: list[Any] = []
+                cols_not_in_other.append(TableColumnContent(col_name, list(table.column(col_name))))
 
-                for row in table.row_iterator:
-                    col_vals.append(row[col_name].value)
+        return cols_not_in_other
 
-                cols_not_in_other.append(TableColumnContent(col_name, col_vals))
 
-        return cols_not_in_other
+def _can_fingerprint_column(first_values: list[Any], second_values: list[Any]) -> bool:
+    """
+    Gets whether rows can be fingerprinted by a column present in both tables, as per `_FINGERPRINTABLE_TYPES`.
+    :param first_values: The values of the column in the first table.
+    :param second_values: The values of the column in the second table.
+    :return: True if rows can be fingerprinted by the column. Otherwise, false.
+    """
+
+    types: set[type] = set(map(type, first_values)).union(map(type, second_values))
+
+    if(not types <= _FINGERPRINTABLE_TYPES):
+        return False
+
+    return int not in types or bool not in types
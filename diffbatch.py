@@ -0,0 +1,252 @@
+"""
+Runs a batch of diffs from the command line, without the GUI, as listed in a manifest file.
+
+The manifest is a JSON file containing a list of jobs, each an object of the form:
+
+    {"first":            {"filepath": "Old.xlsx", "sheet_name": "Sheet1", "table_name": "Table1"},
+     "second":           {"filepath": "New.xlsx", "sheet_name": "Sheet1", "table_name": "Table1"},
+     "key_column_names": ["Key1", "Key2"],
+     "result_filepath":  "Diff.xlsx"}
+
+Jobs may also give any of "read_only", "columnwise_comparison", "direct_parse", "memory_budget" and "compact_columns",
+as accepted by TableDiff. Relative filepaths are taken as relative to the directory containing the manifest.
+
+Run with: python diffbatch.py manifest.json [--jobs N]   (see --help)
+
+The process exits with 0 if every job succeeded, 1 if any failed, and 2 if the manifest couldn't be read.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any
+
+from diff import TableDiff, TableReference
+from diffqueue import DiffOutcome, process_and_save_diffs
+from xlsxmetadata import get_table_definition
+
+
+_JOB_OPTION_NAMES: tuple[str, ...] \
+    = ("read_only", "columnwise_comparison", "direct_parse", "memory_budget", "compact_columns")
+"""The names of the optional TableDiff settings a job in a manifest may give."""
+
+_REQUIRED_JOB_SETTING_NAMES: tuple[str, ...] = ("first", "second", "key_column_names", "result_filepath")
+"""The names of the settings every job in a manifest must give."""
+
+_TABLE_REF_FIELD_NAMES: tuple[str, ...] = ("filepath", "sheet_name", "table_name")
+"""The names of the fields of a reference to a table in a manifest, each a string."""
+
+
+class ManifestError(Exception):
+    """Raised where a manifest of diffs can't be read, or a job in it is malformed."""
+
+
+def read_manifest(manifest_filepath: str) -> list[TableDiff]:
+    """
+    Reads the diffs listed in a manifest file.
+    :param manifest_filepath: The filepath of the manifest.
+    :return: The diffs listed in the manifest, in the order they're listed.
+    :raises ManifestError: If the manifest can't be read, or any of its jobs are malformed.
+    """
+
+    try:
+        with open(manifest_filepath, encoding="utf-8") as file:
+            jobs: Any = json.load(file)
+    except (OSError, ValueError) as e:
+        raise ManifestError(f"Couldn't read manifest {manifest_filepath}: {e}") from e
+
+    if(not isinstance(jobs, list)):
+        raise ManifestError("The manifest must contain a list of jobs.")
+
+    base_directory: str = os.path.dirname(os.path.abspath(manifest_filepath))
+    return [_read_job(job, job_no, base_directory) for job_no, job in enumerate(jobs, start=1)]
+
+
+def order_largest_first(diffs: list[TableDiff]) -> list[TableDiff]:
+    """
+    Orders a batch of diffs so the largest start first. Where the diffs outnumber the workers processing them, starting
+    the longest first stops one of them being left to run on its own at the end, so the batch finishes sooner.
+    :param diffs: The diffs in the batch.
+    :return: The same diffs, in descending order of the number of cells in their two tables.
+    """
+
+    sizes: dict[int, int] = {id(diff): _estimate_size(diff) for diff in diffs}
+    return sorted(diffs, key=lambda x: sizes[id(x)], reverse=True)
+
+
+def format_summary(outcomes: list[DiffOutcome]) -> str:
+    """
+    Formats the outcomes of a batch of diffs as a plain-text table, one line per diff.
+    :param outcomes: The outcomes of the diffs.
+    :return: The formatted table.
+    """
+
+    lines: list[str] = [f"{'Status':<10} {'Time (s)':>10}  Result"]
+
+    for outcome in outcomes:
+        lines.append(f"{_get_status(outcome):<10} {outcome.elapsed_seconds:>10.3f}  {outcome.diff.result_filepath}")
+
+    succeeded_count: int = sum(1 for x in outcomes if x.succeeded)
+    lines.append(f"{succeeded_count} of {len(outcomes)} succeeded, "
+                 f"in {sum(x.elapsed_seconds for x in outcomes):.3f}s of processing time.")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Runs the batch of diffs in the manifest given on the command line, reporting each as it finishes and then a summary.
+    :param argv: The command-line arguments, not including the program name. If None, those this process was run with
+                 are used.
+    :return: The exit status: 0 if every diff succeeded, 1 if any didn't, and 2 if the manifest couldn't be read.
+    """
+
+    parser = argparse.ArgumentParser(description="Processes and saves a batch of diffs listed in a manifest file.")
+    parser.add_argument("manifest",                                 help="JSON file listing the diffs to run")
+    parser.add_argument("--jobs", "-j", type=int, default=None,     help="diffs to run at once (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    if(args.jobs is not None and args.jobs < 1):
+        parser.error("--jobs must be at least 1")
+
+    try:
+        diffs: list[TableDiff] = read_manifest(args.manifest)
+    except ManifestError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    if(len(diffs) == 0):
+        print("The manifest lists no diffs.")
+        return 0
+
+    outcomes: list[DiffOutcome] = process_and_save_diffs(order_largest_first(diffs),
+                                                         max_workers      = args.jobs,
+                                                         outcome_callback = _report_outcome)
+
+    # Summarised in the order the manifest lists the diffs, rather than the order they were run in.
+    positions: dict[int, int] = {id(diff): position for position, diff in enumerate(diffs)}
+    outcomes.sort(key=lambda x: positions[id(x.diff)])
+
+    print()
+    print(format_summary(outcomes))
+    return 0 if all(x.succeeded for x in outcomes) else 1
+
+
+def _read_job(job: Any, job_no: int, base_directory: str) -> TableDiff:
+    """
+    Reads a single job from a manifest.
+    :param job: The job, as parsed from the manifest.
+    :param job_no: The position of the job in the manifest, counting from 1, for error messages.
+    :param base_directory: The directory relative filepaths in the job are relative to.
+    :return: The diff the job describes.
+    :raises ManifestError: If the job is malformed.
+    """
+
+    if(not isinstance(job, dict)):
+        raise ManifestError(f"Job {job_no} in the manifest isn't an object.")
+
+    missing_names: list[str] = [x for x in _REQUIRED_JOB_SETTING_NAMES if x not in job]
+    unknown_names: set[str] = set(job) - {*_REQUIRED_JOB_SETTING_NAMES, *_JOB_OPTION_NAMES}
+
+    if(len(missing_names) != 0):
+        raise ManifestError(f"Job {job_no} in the manifest is missing settings: {', '.join(missing_names)}")
+
+    if(len(unknown_names) != 0):
+        raise ManifestError(f"Job {job_no} in the manifest has unknown settings: {', '.join(sorted(unknown_names))}")
+
+    key_column_names: Any = job["key_column_names"]
+    result_filepath:  Any = job["result_filepath"]
+
+    if(not isinstance(key_column_names, list)
+            or len(key_column_names) == 0
+            or not all(isinstance(x, str) for x in key_column_names)):
+        raise ManifestError(f'Job {job_no} in the manifest must give "key_column_names" as a non-empty list of '
+                            f'strings.')
+
+    if(not isinstance(result_filepath, str)):
+        raise ManifestError(f'Job {job_no} in the manifest must give "result_filepath" as a string.')
+
+    for name in _JOB_OPTION_NAMES:
+        value: Any = job.get(name)
+
+        if(name == "memory_budget"):
+            # bool is a subclass of int, so true and false are ruled out explicitly.
+            if(value is not None and (not isinstance(value, int) or isinstance(value, bool) or value <= 0)):
+                raise ManifestError(f'Job {job_no} in the manifest must give "{name}" as a positive whole number of '
+                                    f'bytes, or null.')
+        elif(name in job and not isinstance(value, bool)):
+            raise ManifestError(f'Job {job_no} in the manifest must give "{name}" as true or false.')
+
+    options: dict[str, Any] = {name: job[name] for name in _JOB_OPTION_NAMES if name in job}
+
+    return TableDiff(_read_table_ref(job["first"],  "first",  job_no, base_directory),
+                     _read_table_ref(job["second"], "second", job_no, base_directory),
+                     os.path.join(base_directory, result_filepath),
+                     key_column_names,
+                     **options)
+
+
+def _read_table_ref(ref: Any, setting_name: str, job_no: int, base_directory: str) -> TableReference:
+    """
+    Reads a reference to a table from a job in a manifest.
+    :param ref: The reference, as parsed from the manifest.
+    :param setting_name: The name of the job's setting the reference was given as, for error messages.
+    :param job_no: The position of the job in the manifest, counting from 1, for error messages.
+    :param base_directory: The directory a relative filepath is relative to.
+    :return: The table reference.
+    :raises ManifestError: If the reference isn't an object, or any of its fields are missing or aren't strings.
+    """
+
+    if(not isinstance(ref, dict) or not all(isinstance(ref.get(x), str) for x in _TABLE_REF_FIELD_NAMES)):
+        raise ManifestError(f'Job {job_no} in the manifest must give "{setting_name}" as an object with '
+                            f'{", ".join(_TABLE_REF_FIELD_NAMES)} strings.')
+
+    return TableReference(os.path.join(base_directory, ref["filepath"]), ref["sheet_name"], ref["table_name"])
+
+
+def _estimate_size(diff: TableDiff) -> int:
+    """
+    Estimates the size of a diff from the definitions of its two tables, without loading either of them.
+    :param diff: The diff.
+    :return: The total number of cells in the ranges of the diff's two tables. Tables that can't be read count as empty,
+             as a diff that will fail needn't be started first.
+    """
+
+    result: int = 0
+
+    for ref in (diff.first_table_ref, diff.second_table_ref):
+        try:
+            result += get_table_definition(ref.filepath, ref.sheet_name, ref.table_name).cell_count
+        except Exception:
+            pass
+
+    return result
+
+
+def _get_status(outcome: DiffOutcome) -> str:
+    """
+    Gets a one-word description of the outcome of a diff.
+    :param outcome: The outcome.
+    :return: "OK", "FAILED" or "CANCELLED".
+    """
+
+    if(outcome.cancelled):
+        return "CANCELLED"
+
+    return "OK" if outcome.error is None else "FAILED"
+
+
+def _report_outcome(outcome: DiffOutcome) -> None:
+    """
+    Reports the outcome of a diff as soon as it finishes, with the error that stopped it where it failed.
+    :param outcome: The outcome.
+    """
+
+    print(f"{_get_status(outcome)}: {outcome.diff.result_filepath} ({outcome.elapsed_seconds:.3f}s)", flush=True)
+
+    if(outcome.error is not None):
+        print(outcome.error, file=sys.stderr, flush=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,331 @@
+"""
+Contains functions for processing queues of diffs in parallel, and the DiffOutcome class recording the outcome of each.
+"""
+
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+from columnartable import ColumnarTable
+from diff import WORKER_PROCESS_CONTEXT, DiffCancelledError, TableDiff, TableReference
+from tablecache import TableCache
+
+
+_CANCEL_POLL_SECONDS: float = 0.1
+"""How often to check whether a queue of diffs being processed in worker processes has been cancelled, in seconds."""
+
+_FileKey = tuple[str, bool, bool]
+"""
+A file used by a queue of diffs, and how its tables are loaded: the real path of the file, whether it's loaded in
+read-only mode, and whether it's parsed directly in read-only mode.
+"""
+
+_worker_table_cache: TableCache | None = None
+"""
+The cache of tables used by more than one diff in the queue a worker process is processing diffs from, kept in the
+worker for as long as it runs, or None in processes that haven't processed any such diff yet.
+"""
+
+
+@dataclass
+class DiffOutcome:
+    """A record of the outcome of processing and saving a diff."""
+
+    diff: TableDiff
+    """The diff processed."""
+
+    error: str | None
+    """A description of the error that stopped the diff from being processed or saved, or None if it succeeded."""
+
+    elapsed_seconds: float
+    """The time taken to process and save the diff, in seconds."""
+
+    cancelled: bool = False
+    """Whether the diff was cancelled before it was saved."""
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether the diff was processed and saved without error or being cancelled."""
+
+        return self.error is None and not self.cancelled
+
+
+def process_and_save_diffs(diffs:            list[TableDiff],
+                           max_workers:      int | None = None,
+                           outcome_callback: Callable[[DiffOutcome], None] | None = None,
+                           table_cache:      TableCache | None = None) \
+        -> list[DiffOutcome]:
+    """
+    Processes and saves a queue of diffs, in parallel across a pool of worker processes.
+
+    Each diff is sent to a worker by reference (see `TableDiff.__getstate__`), and the worker loads, diffs and saves it
+    on its own. An error in one diff doesn't stop the others being processed.
+
+    Files used by more than one diff in the queue, such as a baseline compared against several others, are only parsed
+    once per process. Every table needed from such a file is loaded from it together the first time a diff in a process
+    needs it, and kept in that process's table cache, from which it's given to each later diff processed there that
+    uses it. Each worker keeps its own cache, rather than tables being loaded once for the whole queue, as sending them
+    between processes would mean pickling them out of the worker that loaded them and into every diff using them, which
+    can cost more than parsing the file again. A shared file may be parsed once in each worker, but in parallel.
+
+    Diffs can be cancelled from another thread with `TableDiff.cancel()`. Cancelled diffs that haven't started yet are
+    skipped, and cancelled diffs already being processed stop the next time they report their progress. Each diff sent
+    to a worker shares a cancellation event with the worker's copy of it, through a `multiprocessing` manager, so that
+    cancelling the diff here reaches the copy.
+    :param diffs: The diffs to process and save.
+    :param max_workers: The most worker processes to use at once. If None, one per CPU is used. If 1, or if there's only
+                        one diff, the diffs are processed in this process instead.
+    :param outcome_callback: A function to call with the outcome of each diff as it finishes, in the order they finish.
+    :param table_cache: The cache to keep tables used by more than one diff in, where the diffs are processed in this
+                        process. If None, a new cache is used for just this queue. Worker processes always use their
+                        own.
+    :return: The outcome of each diff, in the same order as the given diffs.
+    """
+
+    if(table_cache is None):
+        table_cache = TableCache()
+
+    shared_tables_by_file: dict[_FileKey, list[tuple[str, str]]] = _get_shared_tables_by_file(diffs)
+
+    if(max_workers is None):
+        max_workers = os.cpu_count() or 1
+
+    max_workers = min(max_workers, len(diffs))
+
+    if(max_workers <= 1):
+        return [_process_and_save_inline(diff, table_cache, shared_tables_by_file, outcome_callback) for diff in diffs]
+
+    outcomes: list[DiffOutcome | None] = [None] * len(diffs)
+
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=WORKER_PROCESS_CONTEXT) as executor, \
+            WORKER_PROCESS_CONTEXT.Manager() as manager:
+        positions: dict[Future, int] = {}
+        cancel_events: dict[Future, threading.Event] = {}
+        cancelled: set[Future] = set()
+
+        for position, diff in enumerate(diffs):
+            if(diff.cancel_requested):
+                outcomes[position] = DiffOutcome(diff, None, 0.0, cancelled=True)
+
+                if(outcome_callback is not None):
+                    outcome_callback(outcomes[position])
+            else:
+                cancel_event: threading.Event = manager.Event()
+                future: Future = executor.submit(_process_and_save_in_worker, diff, shared_tables_by_file, cancel_event)
+                positions[future]     = position
+                cancel_events[future] = cancel_event
+
+        pending: set[Future] = set(positions.keys())
+
+        while(len(pending) != 0):
+            done, pending = wait(pending, timeout=_CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+
+            for future in pending:
+                if(future not in cancelled and diffs[positions[future]].cancel_requested):
+                    # Stops the diff if it hasn't started yet, and otherwise reaches the worker's copy of it.
+                    future.cancel()
+                    cancel_events[future].set()
+                    cancelled.add(future)
+
+            for future in done:
+                position: int = positions[future]
+                outcomes[position] = DiffOutcome(diffs[position], *_get_result(future))
+
+                if(outcome_callback is not None):
+                    outcome_callback(outcomes[position])
+
+    return outcomes
+
+
+def _get_shared_tables_by_file(diffs: list[TableDiff]) -> dict[_FileKey, list[tuple[str, str]]]:
+    """
+    Gets the tables needed from each file used more than once by a queue of diffs, so each of those files can be loaded
+    just once. Diffs that have been cancelled or have a memory budget, and so won't load their tables in full, are
+    ignored.
+    :param diffs: The queue of diffs.
+    :return: A dictionary of the tables needed from each file, as tuples of the name of the sheet containing each table
+             and the table's name, mapped against the file and how it's loaded. Only files used more than once are
+             included.
+    """
+
+    tables_by_file: dict[_FileKey, list[tuple[str, str]]] = {}
+    use_counts: dict[_FileKey, int] = {}
+
+    for diff in diffs:
+        if(diff.cancel_requested or diff.memory_budget is not None):
+            continue
+
+        for ref in (diff.first_table_ref, diff.second_table_ref):
+            file_key: _FileKey = _get_file_key(diff, ref)
+            tables: list[tuple[str, str]] = tables_by_file.setdefault(file_key, [])
+            use_counts[file_key] = use_counts.get(file_key, 0) + 1
+
+            if((ref.sheet_name, ref.table_name) not in tables):
+                tables.append((ref.sheet_name, ref.table_name))
+
+    return {file_key: tables for file_key, tables in tables_by_file.items() if use_counts[file_key] > 1}
+
+
+def _get_file_key(diff: TableDiff, ref: TableReference) -> _FileKey:
+    """
+    Gets the key of a file used by a diff, identifying the file and how the diff loads its tables.
+    :param diff: The diff.
+    :param ref: A reference to one of the diff's tables.
+    :return: The key of the file containing the table.
+    """
+
+    return os.path.realpath(ref.filepath), diff.read_only, diff.read_only and diff.direct_parse
+
+
+def _get_cached_tables(diff: TableDiff, table_cache: TableCache) -> Iterator[tuple[TableReference, ColumnarTable]]:
+    """
+    Gets the tables used by a diff that are in a table cache.
+    :param diff: The diff.
+    :param table_cache: The table cache.
+    :return: An iterator over tuples of a reference to each of the diff's tables that's in the cache, and its values.
+    """
+
+    if(diff.memory_budget is not None):
+        return
+
+    for ref in (diff.first_table_ref, diff.second_table_ref):
+        table: ColumnarTable | None \
+            = table_cache.get_cached_table(ref.filepath, ref.sheet_name, ref.table_name, diff.read_only)
+
+        if(table is not None):
+            yield ref, table
+
+
+def _process_and_save_inline(diff:                  TableDiff,
+                             table_cache:           TableCache,
+                             shared_tables_by_file: dict[_FileKey, list[tuple[str, str]]],
+                             outcome_callback:      Callable[[DiffOutcome], None] | None) \
+        -> DiffOutcome:
+    """
+    Processes and saves a diff in this process, catching any error.
+    :param diff: The diff to process and save.
+    :param table_cache: The cache of tables shared by the queue the diff is in.
+    :param shared_tables_by_file: The tables needed from each file used more than once by the queue, as returned by
+                                  `_get_shared_tables_by_file`.
+    :param outcome_callback: A function to call with the outcome of the diff once it's finished, or None.
+    :return: The outcome of the diff.
+    """
+
+    _load_shared_tables(diff, table_cache, shared_tables_by_file)
+    outcome = DiffOutcome(diff, *_process_and_save(diff, list(_get_cached_tables(diff, table_cache))))
+
+    if(outcome_callback is not None):
+        outcome_callback(outcome)
+
+    return outcome
+
+
+def _process_and_save_in_worker(diff:                  TableDiff,
+                                shared_tables_by_file: dict[_FileKey, list[tuple[str, str]]],
+                                cancel_event:          threading.Event) \
+        -> tuple[str | None, float, bool]:
+    """
+    Processes and saves a diff in a worker process, catching any error, with the tables it shares with other diffs
+    loaded into the worker's own table cache, or taken from it where an earlier diff in the worker loaded them.
+    :param diff: The diff to process and save.
+    :param shared_tables_by_file: The tables needed from each file used more than once by the queue the diff is in, as
+                                  returned by `_get_shared_tables_by_file`.
+    :param cancel_event: An event shared with the process that queued the diff, set if the diff is cancelled there.
+    :return: The result of `_process_and_save`.
+    """
+
+    global _worker_table_cache
+
+    if(_worker_table_cache is None):
+        _worker_table_cache = TableCache()
+
+    _load_shared_tables(diff, _worker_table_cache, shared_tables_by_file)
+    return _process_and_save(diff, list(_get_cached_tables(diff, _worker_table_cache)), cancel_event)
+
+
+def _load_shared_tables(diff:                  TableDiff,
+                        table_cache:           TableCache,
+                        shared_tables_by_file: dict[_FileKey, list[tuple[str, str]]]) \
+        -> None:
+    """
+    Loads every table needed from each file used by a diff that's shared with other diffs into a table cache, unless
+    they're already in it, so that each of those files is only parsed once for all the diffs using the cache.
+    :param diff: The diff.
+    :param table_cache: The table cache.
+    :param shared_tables_by_file: The tables needed from each file used more than once by the queue the diff is in, as
+                                  returned by `_get_shared_tables_by_file`.
+    """
+
+    if(diff.cancel_requested or diff.memory_budget is not None):
+        return
+
+    for ref in (diff.first_table_ref, diff.second_table_ref):
+        tables: list[tuple[str, str]] | None = shared_tables_by_file.get(_get_file_key(diff, ref))
+
+        if(tables is None):
+            continue
+
+        try:
+            table_cache.get_tables(ref.filepath, tables, diff.read_only, diff.direct_parse)
+        except Exception:
+            # The diff will load the file on its own, and report the error there.
+            pass
+
+
+def _process_and_save(diff:             TableDiff,
+                      preloaded_tables: list[tuple[TableReference, ColumnarTable]],
+                      cancel_event:     threading.Event | None = None) \
+        -> tuple[str | None, float, bool]:
+    """
+    Processes and saves a diff, catching any error. This is run in the worker processes.
+    :param diff: The diff to process and save.
+    :param preloaded_tables: Tables used by the diff that have already been loaded, each along with a reference to it.
+                             These are given to the diff through a table cache rather than being loaded again.
+    :param cancel_event: An event shared with the process that queued the diff, set if the diff is cancelled there, or
+                         None where the diff is processed in the process that queued it.
+    :return: A tuple of a description of any error that occurred, or None, the time taken in seconds, and whether the
+             diff was cancelled.
+    """
+
+    start: float = time.perf_counter()
+    original_table_cache: TableCache | None = diff.table_cache
+
+    if(cancel_event is not None):
+        diff.share_cancellation(cancel_event)
+
+    if(len(preloaded_tables) != 0):
+        diff.table_cache = original_table_cache if original_table_cache is not None else TableCache(max_bytes=None)
+
+        for ref, table in preloaded_tables:
+            diff.table_cache.add_table(ref.filepath, ref.sheet_name, ref.table_name, diff.read_only, table)
+
+    try:
+        diff.process_and_save()
+    except DiffCancelledError:
+        return None, time.perf_counter() - start, True
+    except Exception:
+        return traceback.format_exc(), time.perf_counter() - start, False
+    finally:
+        diff.table_cache = original_table_cache
+
+    return None, time.perf_counter() - start, False
+
+
+def _get_result(future: Future) -> tuple[str | None, float, bool]:
+    """
+    Waits for the result of processing a diff in a worker process.
+    :param future: The future for the result of `_process_and_save`.
+    :return: The result of `_process_and_save`, or a description of the error if the worker itself failed.
+    """
+
+    if(future.cancelled()):
+        return None, 0.0, True
+
+    try:
+        return future.result()
+    except Exception as e:
+        return f"The worker process failed: {e!r}", 0.0, False
@@ -0,0 +1,88 @@
+"""
+Contains the DiffStats and StageStats classes, records of the time and memory taken by each stage of processing a diff.
+"""
+
+from dataclasses import dataclass, field
+
+
+@dataclass
+class StageStats:
+    """A record of the resources used by one stage of processing a diff."""
+
+    name: str
+    """The name of the stage. (e.g. "load")"""
+
+    wall_seconds: float = 0.0
+    """The time the stage took, in seconds."""
+
+    cpu_seconds: float = 0.0
+    """The CPU time used by this process during the stage, in seconds, across all of its threads."""
+
+    peak_memory_bytes: int | None = None
+    """
+    The most memory allocated at once during the stage, above what was allocated when the stage started, in bytes, or
+    None if memory wasn't traced.
+    """
+
+    rows_processed: int = 0
+    """The number of rows the stage processed, or wrote in the case of saving."""
+
+    @property
+    def rows_per_second(self) -> float | None:
+        """The rate the stage processed rows at, or None if the stage took no measurable time."""
+
+        return self.rows_processed / self.wall_seconds if self.wall_seconds > 0 else None
+
+
+@dataclass
+class DiffStats:
+    """A record of the resources used by each stage of processing a diff, in the order the stages ran."""
+
+    stages: list[StageStats] = field(default_factory=list)
+    """The stats of each stage, in the order the stages ran."""
+
+    profile_filepath: str | None = None
+    """The filepath the profile of processing the diff was saved to, or None if it wasn't profiled."""
+
+    @property
+    def wall_seconds(self) -> float:
+        """The total time taken by every stage, in seconds."""
+
+        return sum(x.wall_seconds for x in self.stages)
+
+    @property
+    def cpu_seconds(self) -> float:
+        """The total CPU time used by every stage, in seconds."""
+
+        return sum(x.cpu_seconds for x in self.stages)
+
+    def get_stage(self, name: str) -> StageStats | None:
+        """
+        Gets the stats of a stage by its name.
+        :param name: The name of the stage.
+        :return: The stats of the stage, or None if no stage with that name ran.
+        """
+
+        for stage in self.stages:
+            if(stage.name == name):
+                return stage
+
+        return None
+
+    def format_table(self) -> str:
+        """
+        Formats these stats as a plain-text table, one line per stage, for logging or attaching to reports.
+        :return: The formatted table.
+        """
+
+        lines: list[str] = [f"{'Stage':<16} {'Wall (s)':>10} {'CPU (s)':>10} {'Peak (MiB)':>11} {'Rows':>12} "
+                            f"{'Rows/s':>12}"]
+
+        for stage in self.stages:
+            peak: str = f"{stage.peak_memory_bytes / 1024 ** 2:.1f}" if stage.peak_memory_bytes is not None else "-"
+            rate: str = f"{stage.rows_per_second:.0f}" if stage.rows_per_second is not None else "-"
+            lines.append(f"{stage.name:<16} {stage.wall_seconds:>10.3f} {stage.cpu_seconds:>10.3f} {peak:>11} "
+                         f"{stage.rows_processed:>12} {rate:>12}")
+
+        lines.append(f"{'Total':<16} {self.wall_seconds:>10.3f} {self.cpu_seconds:>10.3f}")
+        return "\n".join(lines)
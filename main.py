@@ -1,9 +1,18 @@
+import sys
+
 from diff import TableDiff, TableReference
-from mainwindow import MainWindow
 
 
 def main():
 
+    # Given a manifest on the command line, runs the diffs in it without the GUI. (See diffbatch.py)
+    if(len(sys.argv) > 1):
+        import diffbatch
+        sys.exit(diffbatch.main(sys.argv[1:]))
+
+    # Imported here, so running headless doesn't need tkinter.
+    from mainwindow import MainWindow
+
     # The following is an example
 
     # folder_path: str = (r"C:\Users\yourusername\Desktop\Example folder")
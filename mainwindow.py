@@ -1,25 +1,32 @@
 import os.path
-from typing import Any, List
+import queue
+import threading
+import traceback
+from typing import Any, Callable, List
 
 import tkinter as tk
 
-from tkinter import Tk, Label, Button, Grid, Listbox, Frame, LabelFrame, filedialog, Entry
+from tkinter import Tk, Label, Button, Grid, Listbox, Frame, LabelFrame, filedialog, Entry, messagebox
 from tkinter.font import Font
-from tkinter.ttk import OptionMenu, Combobox
+from tkinter.ttk import OptionMenu, Combobox, Progressbar
 
-import openpyxl
-from openpyxl.workbook import Workbook
-from openpyxl.worksheet.table import Table
-from openpyxl.worksheet.worksheet import Worksheet
-
-from diff import TableDiff, TableReference
+from diff import ProgressEvent, TableDiff, TableReference
+from diffqueue import DiffOutcome, process_and_save_diffs
+from xlsxmetadata import TableDefinition, get_table_definition, read_table_definitions
 
 
 # TODO: Note: When showing a queue of diffs to process, if there is a first, second, or destination file chosen, present
 #             a confirmation dialogue to make sure the user hasn't clicked the "start" button without finishing adding
 #             the current diff they're in the process of adding.
 
-# TODO: Add a progress bar when processing the diffs.
+_UI_UPDATE_POLL_MILLISECONDS: int = 100
+
+_CONCURRENT_LOAD_MIN_CELLS: int = 500_000
+"""
+The number of cells the smaller of the two tables in a single diff needs for them to be loaded in separate processes at
+once. Below this, loading them one after the other is quicker than starting the processes.
+"""
+
 
 class MainWindow:
     # region UI fields
@@ -62,6 +69,16 @@ class MainWindow:
 
     _ui_create_diffs_from_queue_button: Button | None = None
 
+    _ui_progress_panel: Frame | None = None
+
+    _ui_progress_label: Label | None = None
+
+    _ui_progress_bar: Progressbar | None = None
+
+    _ui_cancel_button: Button | None = None
+
+    _ui_updates: queue.Queue
+
     # endregion
 
     first_file_path: str | None = None
@@ -86,12 +103,23 @@ class MainWindow:
 
     diff_queue: list[TableDiff] = []
 
+    max_diff_processes: int | None = None
+
+    diffs_in_progress: list[TableDiff] = []
+
+    diffs_finished_count: int = 0
+
+    def __init__(self, max_diff_processes: int | None = None):
+        # The most worker processes to process a queue of diffs across at once. If None, one per CPU is used.
+        self.max_diff_processes = max_diff_processes
+
     def display(self):
         window: Tk = Tk()
         self._ui_window = window
         window.geometry("400x420")
         window.wm_title("ExcelDiff")
         window.wm_minsize(400, 420)
+        self._ui_updates = queue.Queue()
 
         main_label_row = Frame(window)
         main_label_row.pack_configure(side="top", fill="x", pady=10)
@@ -187,9 +215,9 @@ class MainWindow:
             return
 
         self.first_file_path = path
-        wb: Workbook = openpyxl.load_workbook(path, data_only=True)
-        self.tables_in_first_file = self._get_tables_in_file(path, wb)
-        self.column_names_in_tables_from_first_file = self._get_column_names_in_file(wb)
+        table_defs: list[TableDefinition] = read_table_definitions(path)
+        self.tables_in_first_file = self._get_tables_in_file(path, table_defs)
+        self.column_names_in_tables_from_first_file = self._get_column_names_in_file(table_defs)
         self._ui_first_file_label.config(text=os.path.basename(path))
         self.update_first_file_table_menu()
         self.update_key_menu()
@@ -202,9 +230,9 @@ class MainWindow:
             return
 
         self.second_file_path = path
-        wb: Workbook = openpyxl.load_workbook(path, data_only=True)
-        self.tables_in_second_file = self._get_tables_in_file(path, wb)
-        self.column_names_in_tables_from_second_file = self._get_column_names_in_file(wb)
+        table_defs: list[TableDefinition] = read_table_definitions(path)
+        self.tables_in_second_file = self._get_tables_in_file(path, table_defs)
+        self.column_names_in_tables_from_second_file = self._get_column_names_in_file(table_defs)
         self._ui_second_file_label.config(text=os.path.basename(path))
         self.update_second_file_table_menu()
         self.update_key_menu()
@@ -274,10 +302,15 @@ class MainWindow:
         self._ui_enqueue_button["state"] = "disabled"
         first_table: TableReference = self.table_selected_from_first_file
         second_table: TableReference = self.table_selected_from_second_file
+        smaller_cell_count: int = min(get_table_definition(x.filepath, x.sheet_name, x.table_name).cell_count
+                                      for x in (first_table, second_table))
+
+        diff: TableDiff = TableDiff(first_table, second_table, self.destination_file_path, self.key_column_names,
+                                    concurrent_load=smaller_cell_count >= _CONCURRENT_LOAD_MIN_CELLS,
+                                    progress_callback=lambda e: self._post_to_ui(lambda: self.update_progress(e)))
 
-        diff: TableDiff = TableDiff(first_table, second_table, self.destination_file_path, self.key_column_names)
-        diff.process_and_save()
         self.clear_inputs()
+        self._start_processing_diffs([diff], lambda: process_and_save_diffs([diff], max_workers=1))
 
     def on_click_add_to_queue_button(self):
         first_table: TableReference = self.table_selected_from_first_file
@@ -310,8 +343,28 @@ class MainWindow:
         diffs_to_process = [x for x in self.diff_queue]
         self.clear_queue()
 
-        for diff in diffs_to_process:
-            diff.process_and_save()
+        def process() -> list[DiffOutcome]:
+            return process_and_save_diffs(diffs_to_process, self.max_diff_processes,
+                                          outcome_callback=lambda o: self._post_to_ui(self.on_queued_diff_finished))
+
+        self._start_processing_diffs(diffs_to_process, process)
+        self.update_queue_progress()
+
+    def on_queued_diff_finished(self):
+        self.diffs_finished_count += 1
+        self.update_queue_progress()
+
+    def on_diffs_finished(self, outcomes: list[DiffOutcome]):
+        self.diffs_in_progress = []
+        self._switch_to_button_row()
+        self.show_diff_outcomes(outcomes)
+
+    def on_click_cancel(self):
+        for diff in self.diffs_in_progress:
+            diff.cancel()
+
+        self._ui_cancel_button["state"] = "disabled"
+        self._ui_progress_label.config(text="Cancelling...")
 
 
     #endregion
@@ -450,6 +503,39 @@ class MainWindow:
         for diff in self.diff_queue:
             self.add_diff_to_queue_listbox(diff)
 
+    def update_progress(self, event: ProgressEvent):
+        if(self._ui_progress_panel is None or self._ui_cancel_button["state"] == "disabled"):
+            return
+
+        if(event.rows_total is None or event.rows_total == 0):
+            self._ui_progress_label.config(text=f"{event.stage}...")
+            self._ui_progress_bar.config(mode="indeterminate")
+            self._ui_progress_bar.step(10)
+            return
+
+        self._ui_progress_label.config(text=f"{event.stage} ({event.rows_processed:,} of {event.rows_total:,} rows)")
+        self._ui_progress_bar.config(mode="determinate", maximum=event.rows_total, value=event.rows_processed)
+
+    def update_queue_progress(self):
+        if(self._ui_progress_panel is None or self._ui_cancel_button["state"] == "disabled"):
+            return
+
+        diff_count: int = len(self.diffs_in_progress)
+        self._ui_progress_label.config(text=f"Created {self.diffs_finished_count} of {diff_count} diff(s)")
+        self._ui_progress_bar.config(mode="determinate", maximum=diff_count, value=self.diffs_finished_count)
+
+    def poll_ui_updates(self):
+        while(True):
+            try:
+                update: Callable[[], None] = self._ui_updates.get_nowait()
+            except queue.Empty:
+                break
+
+            update()
+
+        if(self._ui_progress_panel is not None):
+            self._ui_window.after(_UI_UPDATE_POLL_MILLISECONDS, self.poll_ui_updates)
+
     def update_remove_diff_button(self):
         if(len(self._ui_diff_queue_listbox.curselection()) == 0):
             self._ui_remove_from_queue_button["state"] = "disabled"
@@ -459,6 +545,30 @@ class MainWindow:
 
     # endregion
 
+    def show_diff_outcomes(self, outcomes: list[DiffOutcome]):
+        failures:  list[DiffOutcome] = [x for x in outcomes if x.error is not None]
+        cancelled: list[DiffOutcome] = [x for x in outcomes if x.cancelled]
+        created_count: int = len(outcomes) - len(failures) - len(cancelled)
+
+        if(len(failures) == 0 and len(cancelled) == 0):
+            messagebox.showinfo("ExcelDiff", f"Created {len(outcomes)} diff(s).")
+            return
+
+        if(len(failures) == 0):
+            messagebox.showinfo("ExcelDiff", f"Created {created_count} of {len(outcomes)} diff(s). "
+                                             f"{len(cancelled)} cancelled.")
+            return
+
+        failure_descriptions: list[str] = []
+
+        for outcome in failures:
+            dest_file_name: str = os.path.basename(outcome.diff.result_filepath)
+            failure_descriptions.append(f"{dest_file_name}: {outcome.error.strip().splitlines()[-1]}")
+
+        messagebox.showerror("ExcelDiff",
+                             f"Created {created_count} of {len(outcomes)} diff(s). The following failed:"
+                             + "\n\n" + "\n".join(failure_descriptions))
+
     def add_diff_to_queue_listbox(self, diff: TableDiff):
         listbox: Listbox = self._ui_diff_queue_listbox
         first_file_name:  str = os.path.basename(diff.first_table_ref.filepath)
@@ -563,38 +673,77 @@ class MainWindow:
 
         self.update_diff_queue_listbox()
 
+    def _show_progress_panel(self):
+        progress_panel: Frame = Frame(self._ui_window)
+        progress_panel.pack_configure(side="bottom", fill="x", pady=(20, 0))
+        progress_label: Label = Label(progress_panel, text="Starting...")
+        progress_label.pack_configure(side="top", fill="x", padx=5)
+        progress_bar: Progressbar = Progressbar(progress_panel, orient="horizontal")
+        progress_bar.pack_configure(side="top", fill="x", padx=5, pady=5)
+        cancel_button: Button = Button(progress_panel, text="Cancel", command=self.on_click_cancel,
+                                       background="#ffafaf", activebackground="#bc6262")
+        cancel_button.pack_configure(side="top", fill="x", padx=5, pady=5)
+        self._ui_progress_panel = progress_panel
+        self._ui_progress_label = progress_label
+        self._ui_progress_bar   = progress_bar
+        self._ui_cancel_button  = cancel_button
+
+    def _hide_progress_panel(self):
+        if(self._ui_progress_panel is None):
+            return
+
+        self._ui_progress_panel.pack_forget()
+        self._ui_progress_panel = None
+        self._ui_progress_label = None
+        self._ui_progress_bar   = None
+        self._ui_cancel_button  = None
+
     def _switch_to_button_row(self):
         self._hide_button_row()
         self._hide_diff_queue()
+        self._hide_progress_panel()
         self._show_button_row()
 
     def _switch_to_diff_queue(self):
         self._hide_button_row()
         self._hide_diff_queue()
+        self._hide_progress_panel()
         self._show_diff_queue()
 
-    def _get_tables_in_file(self, filepath: str, wb: Workbook) -> list[TableReference]:
-        result: list[TableReference] = []
-        sheet_names = wb.sheetnames
+    def _switch_to_progress_panel(self):
+        self._hide_button_row()
+        self._hide_diff_queue()
+        self._hide_progress_panel()
+        self._show_progress_panel()
 
-        for sheet_name in sheet_names:
-            sheet: Worksheet = wb.get_sheet_by_name(sheet_name)
+    def _start_processing_diffs(self, diffs: list[TableDiff], process: Callable[[], list[DiffOutcome]]):
+        # The diffs are processed on a worker thread so the window stays responsive. Anything the worker thread needs
+        # to change in the window is posted back to this thread through self._ui_updates, which is polled with after().
+        self.diffs_in_progress    = diffs
+        self.diffs_finished_count = 0
+        self._switch_to_progress_panel()
 
-            table_name: str
+        worker = threading.Thread(target=self._process_diffs_in_background, args=(diffs, process), daemon=True)
+        worker.start()
+        self._ui_window.after(_UI_UPDATE_POLL_MILLISECONDS, self.poll_ui_updates)
 
-            for table_name in sheet.tables.keys():
-                result.append(TableReference(filepath, sheet_name, table_name))
+    def _process_diffs_in_background(self, diffs: list[TableDiff], process: Callable[[], list[DiffOutcome]]):
+        try:
+            outcomes: list[DiffOutcome] = process()
+        except Exception:
+            error: str = traceback.format_exc()
+            outcomes: list[DiffOutcome] = [DiffOutcome(x, error, 0.0) for x in diffs]
 
-        return result
+        self._post_to_ui(lambda: self.on_diffs_finished(outcomes))
 
-    def _get_column_names_in_file(self, wb: Workbook) -> dict[str, list[str]]:
-        result: dict[str, list[str]] = {}
+    def _post_to_ui(self, update: Callable[[], None]):
+        self._ui_updates.put(update)
 
-        for sheet in wb.worksheets:
-            name: str
+    # The tables in a file and their column names are read straight from the file's workbook, relationship and table
+    # parts, without loading any cell data, so files can be chosen without waiting for the whole workbook to load.
 
-            for name in sheet.tables.keys():
-                table: Table = sheet.tables[name]
-                result[name] = table.column_names
+    def _get_tables_in_file(self, filepath: str, table_defs: list[TableDefinition]) -> list[TableReference]:
+        return [TableReference(filepath, x.sheet_name, x.table_name) for x in table_defs]
 
-        return result
+    def _get_column_names_in_file(self, table_defs: list[TableDefinition]) -> dict[str, list[str]]:
+        return {x.table_name: x.column_names for x in table_defs}
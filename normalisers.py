@@ -0,0 +1,217 @@
+"""
+Contains the ValueNormaliser class and its subclasses, which normalise the cell values of a column before they're
+compared, so that values that should count as the same (such as 1 and 1.0) compare equal.
+"""
+
+import datetime
+import math
+from decimal import Decimal
+from typing import Any, Callable, Sequence
+
+
+_DATE_UNIT_FIELDS: dict[str, dict[str, int]] \
+    = {"day":    {"hour": 0, "minute": 0, "second": 0, "microsecond": 0},
+       "hour":   {"minute": 0, "second": 0, "microsecond": 0},
+       "minute": {"second": 0, "microsecond": 0},
+       "second": {"microsecond": 0}}
+"""The fields of a datetime reset to truncate it to each unit a date normaliser can truncate to."""
+
+_NUMERIC_TYPES: frozenset[type] = frozenset({int, float})
+"""The types of value a numeric normaliser normalises as numbers. Booleans are normalised as text."""
+
+_DATE_TYPES: frozenset[type] = frozenset({datetime.datetime, datetime.date})
+"""The types of value a date normaliser normalises as dates."""
+
+_MEMOISABLE_TYPES: frozenset[type] = frozenset({str, bool})
+"""
+The types of value a memoised normaliser only normalises once per distinct value. These are the types columns tend to
+hold few distinct values of, so the normalised values kept stay few. Numbers and dates are often distinct in every row,
+so are normalised each time rather than kept.
+"""
+
+
+class ValueNormaliser:
+    """
+    Normalises cell values for comparison, as strings. Cells compare equal where their normalised values are equal.
+
+    This normalises values the default way: as their string forms, with leading and trailing whitespace removed, and
+    with empty cells normalised to empty strings. Subclasses normalise particular kinds of value differently, and the
+    rest this way. Normalisers hold nothing but their settings, so can be pickled along with the diffs using them.
+    """
+
+    def __call__(self, value: Any) -> str:
+        """
+        Normalises a cell value.
+        :param value: The value to normalise.
+        :return: The normalised value.
+        """
+
+        return str(value).strip() if value is not None else ""
+
+
+class TextNormaliser(ValueNormaliser):
+    """Normalises cell values as text, optionally ignoring case and differences in whitespace within values."""
+
+    case_insensitive: bool
+    """Whether values that differ only in case are normalised the same."""
+
+    collapse_whitespace: bool
+    """Whether every run of whitespace within a value is normalised to a single space."""
+
+    def __init__(self, case_insensitive: bool = False, collapse_whitespace: bool = False):
+        """
+        Creates a new TextNormaliser object. With neither option, this normalises values the default way.
+        :param case_insensitive: Whether to normalise values that differ only in case the same.
+        :param collapse_whitespace: Whether to normalise every run of whitespace within a value to a single space.
+        """
+
+        self.case_insensitive    = case_insensitive
+        self.collapse_whitespace = collapse_whitespace
+
+    def __call__(self, value: Any) -> str:
+        result: str = " ".join(str(value).split()) if self.collapse_whitespace and value is not None \
+            else super().__call__(value)
+
+        return result.casefold() if self.case_insensitive else result
+
+
+class NumericNormaliser(ValueNormaliser):
+    """
+    Normalises numbers by value rather than type, so integers and floats that are equal (such as 1 and 1.0) are
+    normalised the same, optionally rounding them to a tolerance first. Values that aren't numbers are normalised the
+    default way.
+    """
+
+    tolerance: float
+    """
+    The multiple numbers are rounded to the nearest of before they're normalised, or 0 not to round them. Numbers closer
+    together than this may still round to different multiples, where there's a multiple between them.
+    """
+
+    _decimal_places: int
+    """The number of decimal places to round numbers to after rounding them to the tolerance, to remove float error."""
+
+    def __init__(self, tolerance: float = 0.0):
+        """
+        Creates a new NumericNormaliser object.
+        :param tolerance: The multiple to round numbers to the nearest of before normalising them, or 0 not to round.
+        :raises ValueError: If the tolerance is negative.
+        """
+
+        if(tolerance < 0):
+            raise ValueError(f"The tolerance can't be negative: {tolerance}")
+
+        self.tolerance       = tolerance
+        self._decimal_places = max(0, -Decimal(str(tolerance)).as_tuple().exponent) if tolerance > 0 else 0
+
+    def __call__(self, value: Any) -> str:
+        if(type(value) not in _NUMERIC_TYPES or not math.isfinite(value)):
+            return super().__call__(value)
+
+        if(self.tolerance > 0):
+            value = round(round(value / self.tolerance) * self.tolerance, self._decimal_places)
+
+        if(type(value) is int or value.is_integer()):
+            return str(int(value))
+
+        return repr(value)
+
+
+class DateNormaliser(ValueNormaliser):
+    """
+    Normalises dates and datetimes in ISO format, so a datetime at midnight is normalised the same as the date,
+    optionally truncating datetimes to a unit first. Values that aren't dates are normalised the default way.
+    """
+
+    unit: str | None
+    """The unit datetimes are truncated to: "day", "hour", "minute" or "second", or None not to truncate them."""
+
+    def __init__(self, unit: str | None = None):
+        """
+        Creates a new DateNormaliser object.
+        :param unit: The unit to truncate datetimes to: "day", "hour", "minute" or "second", or None not to truncate.
+        :raises ValueError: If the unit isn't one of those listed.
+        """
+
+        if(unit is not None and unit not in _DATE_UNIT_FIELDS):
+            raise ValueError(f"Unknown unit to truncate datetimes to: {unit}")
+
+        self.unit = unit
+
+    def __call__(self, value: Any) -> str:
+        if(type(value) not in _DATE_TYPES):
+            return super().__call__(value)
+
+        if(type(value) is datetime.date):
+            return value.isoformat()
+
+        if(self.unit is not None):
+            value = value.replace(**_DATE_UNIT_FIELDS[self.unit])
+
+        if(value.tzinfo is None and value.time() == datetime.time()):
+            return value.date().isoformat()
+
+        return value.isoformat(sep=" ")
+
+
+def infer_normaliser(first_values: Sequence[Any], second_values: Sequence[Any]) -> ValueNormaliser:
+    """
+    Chooses how to normalise a column present in both tables from the types of its values. Columns of just numbers are
+    normalised as numbers, and columns of just dates and datetimes as dates, in each case without rounding or
+    truncating them. Empty cells are ignored. Any other column is normalised the default way.
+    :param first_values: The values of the column in the first table.
+    :param second_values: The values of the column in the second table.
+    :return: The normaliser to use for the column.
+    """
+
+    return infer_normaliser_from_types(set(map(type, first_values)).union(map(type, second_values)))
+
+
+def infer_normaliser_from_types(value_types: set[type]) -> ValueNormaliser:
+    """
+    Chooses how to normalise a column present in both tables from the types of its values, as per `infer_normaliser`,
+    where those types have already been collected.
+    :param value_types: The types of the column's values in both tables, which may include NoneType.
+    :return: The normaliser to use for the column.
+    """
+
+    types: set[type] = value_types - {type(None)}
+
+    if(len(types) == 0):
+        return ValueNormaliser()
+
+    if(types <= _NUMERIC_TYPES):
+        return NumericNormaliser()
+
+    if(types <= _DATE_TYPES):
+        return DateNormaliser()
+
+    return ValueNormaliser()
+
+
+def memoise_normaliser(normaliser: Callable[[Any], str]) -> Callable[[Any], str]:
+    """
+    Wraps a normaliser so that each distinct value it's given is only normalised once, as per `_MEMOISABLE_TYPES`.
+    Values are told apart by type as well as by value, as values of different types can be equal while normalising
+    differently.
+    :param normaliser: The normaliser to wrap.
+    :return: A function normalising values the same as the given normaliser.
+    """
+
+    normalised_values: dict[tuple[type, Any], str] = {}
+
+    def normalise(value: Any) -> str:
+        value_type: type = type(value)
+
+        if(value_type not in _MEMOISABLE_TYPES):
+            return normaliser(value)
+
+        key: tuple[type, Any] = (value_type, value)
+        result: str | None = normalised_values.get(key)
+
+        if(result is None):
+            result = normalised_values[key] = normaliser(value)
+
+        return result
+
+    return normalise
@@ -0,0 +1,116 @@
+"""
+Contains the PartitionSpill class, for splitting the rows of a table between files on disk.
+"""
+
+import os
+import pickle
+from typing import Any, Iterator, Sequence
+
+
+class PartitionSpill:
+    """
+    The rows of a table, split between a number of partition files on disk.
+
+    Rows are buffered in memory per partition and appended to the partition's file in batches, so only a bounded number
+    of rows are held in memory at once, and only one file is open at a time. Each row is stored along with its number in
+    the original table, so the original order of rows can be restored once they're read back.
+    """
+
+    directory: str
+    """The directory the partition files are written to."""
+
+    name: str
+    """A name for the spilled table, unique within the directory, used to name the partition files."""
+
+    partition_count: int
+    """The number of partitions the rows are split between."""
+
+    buffer_rows: int
+    """The number of rows buffered in memory for each partition before they're written to the partition's file."""
+
+    _buffers: list[list[tuple[int, Sequence[Any]]]]
+    """The rows buffered for each partition, along with their row numbers, not yet written to disk."""
+
+    def __init__(self, directory: str, name: str, partition_count: int, total_buffer_rows: int):
+        """
+        Creates a new PartitionSpill object, with no rows.
+        :param directory: The directory to write the partition files to.
+        :param name: A name for the spilled table, unique within the directory.
+        :param partition_count: The number of partitions to split rows between.
+        :param total_buffer_rows: The total number of rows to buffer in memory, across all partitions. Each partition
+                                  buffers at least one row, however small this is.
+        """
+
+        self.directory       = directory
+        self.name            = name
+        self.partition_count = partition_count
+        self.buffer_rows     = max(total_buffer_rows // partition_count, 1)
+        self._buffers        = [[] for _ in range(partition_count)]
+
+    def add(self, partition: int, row_number: int, row: Sequence[Any]) -> None:
+        """
+        Adds a row to one of the partitions.
+        :param partition: The number of the partition to add the row to.
+        :param row_number: The number of the row in the original table.
+        :param row: The values of the row.
+        """
+
+        buffer = self._buffers[partition]
+        buffer.append((row_number, row))
+
+        if(len(buffer) >= self.buffer_rows):
+            self._flush(partition)
+
+    def flush(self) -> None:
+        """
+        Writes all buffered rows to disk. This should be called once all rows have been added.
+        """
+
+        for partition in range(self.partition_count):
+            self._flush(partition)
+
+    def read_partition(self, partition: int) -> Iterator[tuple[int, Sequence[Any]]]:
+        """
+        Reads back the rows in one of the partitions, in the order they were added.
+        :param partition: The number of the partition to read.
+        :return: An iterator over tuples of the number of each row in the original table and the values of that row.
+        """
+
+        path: str = self._get_path(partition)
+
+        if(not os.path.exists(path)):
+            return
+
+        with open(path, "rb") as file:
+            while(True):
+                try:
+                    batch: list[tuple[int, Sequence[Any]]] = pickle.load(file)
+                except EOFError:
+                    return
+
+                yield from batch
+
+    def _flush(self, partition: int) -> None:
+        """
+        Writes the rows buffered for a partition to the partition's file.
+        :param partition: The number of the partition.
+        """
+
+        buffer = self._buffers[partition]
+
+        if(len(buffer) == 0):
+            return
+
+        with open(self._get_path(partition), "ab") as file:
+            pickle.dump(buffer, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._buffers[partition] = []
+
+    def _get_path(self, partition: int) -> str:
+        """
+        Gets the path of a partition's file.
+        :param partition: The number of the partition.
+        :return: The path of the partition's file.
+        """
+
+        return os.path.join(self.directory, f"{self.name}.{partition}.partition")
@@ -0,0 +1,384 @@
+"""
+Contains the ResultSink class, the base of destinations diffs can stream their results to as they're found, rather than
+saving them to an Excel file, along with sinks that stream results to CSV and JSON Lines files.
+"""
+
+import csv
+import json
+import math
+import os
+from typing import TYPE_CHECKING, Any, TextIO
+
+if(TYPE_CHECKING):
+    from diff import RowDifference, TableColumnContent
+
+
+class ResultSink:
+    """
+    A destination for the results of a diff, written to as the diff finds them.
+
+    Each kind of result is written as it's found, rather than being held in memory until the diff is finished, so the
+    memory used doesn't grow with the number of differences. Sinks are opened by the diff once it starts processing,
+    and closed once it's finished, whether or not it succeeded. Results are written in the order they're found, so
+    rows unique to the first table may be interleaved with differences between common rows.
+
+    This writes nothing. Subclasses override the methods for the results they write. Sinks should hold no open files
+    until opened, so that diffs with sinks can be pickled.
+    """
+
+    def open(self, key_column_names: list[str]) -> None:
+        """
+        Prepares this sink to be written to.
+        :param key_column_names: The names of the key columns of the tables being diffed.
+        """
+
+    def write_row_difference(self, difference: "RowDifference") -> None:
+        """
+        Writes the differences between a pair of rows common to both tables.
+        :param difference: The differences between the rows.
+        """
+
+    def write_row_only_in_first(self, column_names: list[str], row: tuple[Any, ...]) -> None:
+        """
+        Writes a row only in the first table.
+        :param column_names: The names of the first table's columns, in order. This is the same list for every row.
+        :param row: The values of the row, in the same order as the column names.
+        """
+
+    def write_row_only_in_second(self, column_names: list[str], row: tuple[Any, ...]) -> None:
+        """
+        Writes a row only in the second table.
+        :param column_names: The names of the second table's columns, in order. This is the same list for every row.
+        :param row: The values of the row, in the same order as the column names.
+        """
+
+    def write_columns_only_in_first(self,
+                                    key_columns: list["TableColumnContent"],
+                                    columns:     list["TableColumnContent"]) \
+            -> None:
+        """
+        Writes the columns only in the first table. This is only called where there are any.
+        :param key_columns: The key columns of the first table.
+        :param columns: The columns only in the first table.
+        """
+
+    def write_columns_only_in_second(self,
+                                     key_columns: list["TableColumnContent"],
+                                     columns:     list["TableColumnContent"]) \
+            -> None:
+        """
+        Writes the columns only in the second table. This is only called where there are any.
+        :param key_columns: The key columns of the second table.
+        :param columns: The columns only in the second table.
+        """
+
+    def close(self) -> None:
+        """
+        Finishes writing to this sink, closing any files it has open.
+        """
+
+
+class CsvResultSink(ResultSink):
+    """
+    A sink writing each kind of result to its own CSV file in a directory. Files are only created for kinds of results
+    there are any of, and any such files left in the directory from an earlier diff are deleted when the sink is opened.
+
+    Differences between common rows are written one per line for each differing cell, as the key values of the row,
+    followed by the name of the column and the normalised values of the cell in each table. Rows and columns unique to
+    one table are written as they'd be laid out in the table, with a header row of column names, key columns first.
+    """
+
+    DIFFERENCES_FILENAME: str = "differences.csv"
+    """The name of the file differences between common rows are written to."""
+
+    ROWS_ONLY_IN_FIRST_FILENAME: str = "rows_unique_to_first.csv"
+    """The name of the file rows only in the first table are written to."""
+
+    ROWS_ONLY_IN_SECOND_FILENAME: str = "rows_unique_to_second.csv"
+    """The name of the file rows only in the second table are written to."""
+
+    COLUMNS_ONLY_IN_FIRST_FILENAME: str = "columns_unique_to_first.csv"
+    """The name of the file columns only in the first table are written to."""
+
+    COLUMNS_ONLY_IN_SECOND_FILENAME: str = "columns_unique_to_second.csv"
+    """The name of the file columns only in the second table are written to."""
+
+    directory: str
+    """The directory the CSV files are written to."""
+
+    _key_column_names: list[str]
+    """The names of the key columns of the tables being diffed. Only available once opened."""
+
+    _files: dict[str, TextIO]
+    """The CSV files created so far, mapped against their filenames. Only available once opened."""
+
+    _writers: dict[str, Any]
+    """The CSV writers for the files created so far, mapped against their filenames. Only available once opened."""
+
+    _row_positions: dict[str, list[int]]
+    """
+    The positions in each row unique to a table of the values in the order they're written, mapped against the name of
+    the file they're written to. Only available once opened, for files created so far.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Creates a new CsvResultSink object. Nothing is written until it's opened.
+        :param directory: The directory to write the CSV files to. This is created if it doesn't exist.
+        """
+
+        self.directory         = directory
+        self._key_column_names = []
+        self._files            = {}
+        self._writers          = {}
+        self._row_positions    = {}
+
+    def __getstate__(self) -> dict[str, Any]:
+        """
+        Gets the state of this sink to be pickled, as an unopened sink.
+        :return: The arguments this sink was constructed with, by name.
+        """
+
+        return {"directory": self.directory}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """
+        Restores this sink from a pickled state, as an unopened sink.
+        :param state: The arguments the pickled sink was constructed with, by name.
+        """
+
+        self.__init__(**state)
+
+    def open(self, key_column_names: list[str]) -> None:
+        self._key_column_names = key_column_names
+        os.makedirs(self.directory, exist_ok=True)
+
+        for filename in (self.DIFFERENCES_FILENAME,
+                         self.ROWS_ONLY_IN_FIRST_FILENAME,
+                         self.ROWS_ONLY_IN_SECOND_FILENAME,
+                         self.COLUMNS_ONLY_IN_FIRST_FILENAME,
+                         self.COLUMNS_ONLY_IN_SECOND_FILENAME):
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                pass
+
+    def write_row_difference(self, difference: "RowDifference") -> None:
+        writer = self._writers.get(self.DIFFERENCES_FILENAME)
+
+        if(writer is None):
+            writer = self._create_file(self.DIFFERENCES_FILENAME,
+                                       self._key_column_names + ["Column", "Value in first", "Value in second"])
+
+        key_values: list[Any] = list(difference.key_values)
+        writer.writerows([key_values + [x.column_name, x.value1, x.value2] for x in difference.cell_differences])
+
+    def write_row_only_in_first(self, column_names: list[str], row: tuple[Any, ...]) -> None:
+        self._write_row(self.ROWS_ONLY_IN_FIRST_FILENAME, column_names, row)
+
+    def write_row_only_in_second(self, column_names: list[str], row: tuple[Any, ...]) -> None:
+        self._write_row(self.ROWS_ONLY_IN_SECOND_FILENAME, column_names, row)
+
+    def write_columns_only_in_first(self,
+                                    key_columns: list["TableColumnContent"],
+                                    columns:     list["TableColumnContent"]) \
+            -> None:
+        self._write_columns(self.COLUMNS_ONLY_IN_FIRST_FILENAME, key_columns + columns)
+
+    def write_columns_only_in_second(self,
+                                     key_columns: list["TableColumnContent"],
+                                     columns:     list["TableColumnContent"]) \
+            -> None:
+        self._write_columns(self.COLUMNS_ONLY_IN_SECOND_FILENAME, key_columns + columns)
+
+    def close(self) -> None:
+        for file in self._files.values():
+            file.close()
+
+        self._files            = {}
+        self._writers          = {}
+        self._row_positions    = {}
+
+    def _write_row(self, filename: str, table_column_names: list[str], row: tuple[Any, ...]) -> None:
+        """
+        Writes a row unique to one of the tables, with its key values first, creating the file for it if this is the
+        first such row.
+        :param filename: The name of the file to write the row to.
+        :param table_column_names: The names of the columns of the table the row is in, in order.
+        :param row: The values of the row, in the same order as the table's column names.
+        """
+
+        writer = self._writers.get(filename)
+
+        if(writer is None):
+            column_names: list[str] = self._key_column_names + [x for x in table_column_names
+                                                                if x not in self._key_column_names]
+            self._row_positions[filename] = [table_column_names.index(x) for x in column_names]
+            writer = self._create_file(filename, column_names)
+
+        writer.writerow([row[i] for i in self._row_positions[filename]])
+
+    def _write_columns(self, filename: str, columns: list["TableColumnContent"]) -> None:
+        """
+        Writes columns unique to one of the tables to a new file, as a table.
+        :param filename: The name of the file to write the columns to.
+        :param columns: The columns to write, key columns first.
+        """
+
+        writer = self._create_file(filename, [x.column_name for x in columns])
+        writer.writerows(zip(*[x.values for x in columns]))
+
+    def _create_file(self, filename: str, column_names: list[str]) -> Any:
+        """
+        Creates one of the CSV files, and writes its header row.
+        :param filename: The name of the file to create.
+        :param column_names: The names of the columns in the file.
+        :return: A CSV writer for the file.
+        """
+
+        file: TextIO = open(os.path.join(self.directory, filename), "w", newline="", encoding="utf-8")
+        writer = csv.writer(file)
+        writer.writerow(column_names)
+
+        self._files[filename]   = file
+        self._writers[filename] = writer
+        return writer
+
+
+class JsonLinesResultSink(ResultSink):
+    """
+    A sink writing every result to a single JSON Lines file, as one JSON object per line, tagged with its kind in its
+    "type" property. Values that can't be represented in JSON, such as dates, are written as strings. Numbers that
+    aren't finite, which standard JSON has no way of writing, are written as the strings "NaN", "Infinity" and
+    "-Infinity".
+
+    The kinds of object written are:
+    - "row_difference", with the key values of the row in "keys", and a list of the differing cells in "cells", each
+      with the name of its column in "column" and the normalised values of the cell in each table in "first" and
+      "second".
+    - "row_only_in_first" and "row_only_in_second", with the values of the row mapped against their column names in
+      "row".
+    - "columns_only_in_first" and "columns_only_in_second", one for each row of the table, with the key values of the
+      row in "keys", and the row's values in the columns unique to that table in "values".
+    """
+
+    filepath: str
+    """The filepath of the JSON Lines file written to."""
+
+    _key_column_names: list[str]
+    """The names of the key columns of the tables being diffed. Only available once opened."""
+
+    _file: TextIO | None
+    """The JSON Lines file, or None if this sink isn't open."""
+
+    def __init__(self, filepath: str):
+        """
+        Creates a new JsonLinesResultSink object. Nothing is written until it's opened.
+        :param filepath: The filepath to write the JSON Lines file to. Any file already there is overwritten.
+        """
+
+        self.filepath          = filepath
+        self._key_column_names = []
+        self._file             = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        """
+        Gets the state of this sink to be pickled, as an unopened sink.
+        :return: The arguments this sink was constructed with, by name.
+        """
+
+        return {"filepath": self.filepath}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """
+        Restores this sink from a pickled state, as an unopened sink.
+        :param state: The arguments the pickled sink was constructed with, by name.
+        """
+
+        self.__init__(**state)
+
+    def open(self, key_column_names: list[str]) -> None:
+        self._key_column_names = key_column_names
+        self._file             = open(self.filepath, "w", encoding="utf-8")
+
+    def write_row_difference(self, difference: "RowDifference") -> None:
+        self._write({"type":  "row_difference",
+                     "keys":  dict(zip(self._key_column_names, difference.key_values)),
+                     "cells": [{"column": x.column_name, "first": x.value1, "second": x.value2}
+                               for x in difference.cell_differences]})
+
+    def write_row_only_in_first(self, column_names: list[str], row: tuple[Any, ...]) -> None:
+        self._write({"type": "row_only_in_first", "row": dict(zip(column_names, row))})
+
+    def write_row_only_in_second(self, column_names: list[str], row: tuple[Any, ...]) -> None:
+        self._write({"type": "row_only_in_second", "row": dict(zip(column_names, row))})
+
+    def write_columns_only_in_first(self,
+                                    key_columns: list["TableColumnContent"],
+                                    columns:     list["TableColumnContent"]) \
+            -> None:
+        self._write_columns("columns_only_in_first", key_columns, columns)
+
+    def write_columns_only_in_second(self,
+                                     key_columns: list["TableColumnContent"],
+                                     columns:     list["TableColumnContent"]) \
+            -> None:
+        self._write_columns("columns_only_in_second", key_columns, columns)
+
+    def close(self) -> None:
+        if(self._file is not None):
+            self._file.close()
+            self._file = None
+
+    def _write_columns(self,
+                       record_type: str,
+                       key_columns: list["TableColumnContent"],
+                       columns:     list["TableColumnContent"]) \
+            -> None:
+        """
+        Writes columns unique to one of the tables, a line for each row.
+        :param record_type: The kind of object to write each row as.
+        :param key_columns: The key columns of the table.
+        :param columns: The columns unique to the table.
+        """
+
+        key_names:    list[str] = [x.column_name for x in key_columns]
+        column_names: list[str] = [x.column_name for x in columns]
+
+        for key_values, values in zip(zip(*[x.values for x in key_columns]), zip(*[x.values for x in columns])):
+            self._write({"type":   record_type,
+                         "keys":   dict(zip(key_names, key_values)),
+                         "values": dict(zip(column_names, values))})
+
+    def _write(self, record: dict[str, Any]) -> None:
+        """
+        Writes an object to the file, as a line of JSON.
+        :param record: The object to write.
+        """
+
+        self._file.write(json.dumps(_replace_non_finite_numbers(record), ensure_ascii=False, allow_nan=False,
+                                    default=str))
+        self._file.write("\n")
+
+
+def _replace_non_finite_numbers(value: Any) -> Any:
+    """
+    Replaces the numbers that aren't finite in a value to be written as JSON with strings naming them, as JavaScript
+    does.
+    :param value: The value, which may be a dict or list containing other values.
+    :return: The value, with any infinite or NaN floats in it replaced with "Infinity", "-Infinity" or "NaN".
+    """
+
+    if(isinstance(value, float)):
+        if(math.isfinite(value)):
+            return value
+
+        return "NaN" if math.isnan(value) else ("Infinity" if value > 0 else "-Infinity")
+
+    if(isinstance(value, dict)):
+        return {k: _replace_non_finite_numbers(v) for k, v in value.items()}
+
+    if(isinstance(value, (list, tuple))):
+        return [_replace_non_finite_numbers(x) for x in value]
+
+    return value
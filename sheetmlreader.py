@@ -0,0 +1,329 @@
+"""
+Contains the SheetMLReader class, for reading the values of tables straight from the XML of the worksheets they're on,
+without creating an openpyxl cell object for every cell read.
+"""
+
+import datetime
+import mmap
+import zipfile
+from typing import Any, Iterator
+from xml.etree import ElementTree
+
+from openpyxl.reader.strings import read_string_table
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.cell import column_index_from_string, range_boundaries
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+
+from xlsxmetadata import TableDefinition, read_related_paths, read_workbook_path
+
+
+_MAIN_NS: str = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+
+_SHEET_DATA_TAG:    str = f"{{{_MAIN_NS}}}sheetData"
+_ROW_TAG:           str = f"{{{_MAIN_NS}}}row"
+_VALUE_TAG:         str = f"{{{_MAIN_NS}}}v"
+_INLINE_STRING_TAG: str = f"{{{_MAIN_NS}}}is"
+_TEXT_TAG:          str = f"{{{_MAIN_NS}}}t"
+_RICH_TEXT_RUN_TAG: str = f"{{{_MAIN_NS}}}r"
+
+_SHARED_STRINGS_REL_TYPE: str = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings"
+_STYLES_REL_TYPE:         str = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"
+
+_ROW_NUMBER_DIGITS: str = "0123456789"
+
+
+class SheetMLReader:
+    """
+    A reader of the values of tables in an Excel file, parsing the XML of the worksheets they're on directly.
+
+    The file is memory-mapped, and each worksheet is streamed from it and parsed a row at a time, with only the cells in
+    a table's range being read. Each row is read as a plain tuple of values. The values read are the same as those read
+    by openpyxl in read-only mode with `data_only` set: shared and inline strings are resolved, numbers are read as ints
+    or floats as openpyxl reads them, numbers formatted as dates or times are converted to datetimes (taking account of
+    the workbook's date system), and formulae are read as their cached values.
+
+    The workbook's shared strings and styles are read once, when the reader is created, and shared between every table
+    read with it. Use as a context manager, or call `.close()` once done with it.
+    """
+
+    filepath: str
+    """The filepath of the Excel file being read."""
+
+    _file: Any
+    """The Excel file, opened for reading in binary mode."""
+
+    _mapped_file: mmap.mmap
+    """The contents of the Excel file, memory-mapped."""
+
+    _archive: zipfile.ZipFile
+    """The Excel file, opened as a zip archive from its memory-mapped contents."""
+
+    _epoch: datetime.datetime
+    """The date that dates in the workbook are counted from."""
+
+    _shared_strings: list[str]
+    """The strings shared between the cells of the workbook, in order."""
+
+    _date_style_ids: set[int]
+    """The numbers of the cell styles whose number formats are date or time formats."""
+
+    _timedelta_style_ids: set[int]
+    """The numbers of the cell styles whose number formats are durations, rather than points in time."""
+
+    def __init__(self, filepath: str):
+        """
+        Opens an Excel file for reading, reading the workbook's shared strings and styles.
+        :param filepath: The filepath of the Excel file.
+        """
+
+        self.filepath     = filepath
+        self._file        = open(filepath, "rb")
+        self._mapped_file = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._archive     = zipfile.ZipFile(_MappedFile(self._mapped_file))
+
+        workbook_path: str = read_workbook_path(self._archive)
+        self._epoch = self._read_epoch(workbook_path)
+        self._shared_strings = self._read_shared_strings(workbook_path)
+        self._date_style_ids, self._timedelta_style_ids = self._read_date_style_ids(workbook_path)
+
+    def __enter__(self) -> "SheetMLReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Closes the Excel file.
+        """
+
+        self._archive.close()
+        self._mapped_file.close()
+        self._file.close()
+
+    def iter_table_rows(self, definition: TableDefinition) -> Iterator[tuple[Any, ...]]:
+        """
+        Streams the values of the rows of a table in the Excel file. Rows missing from the worksheet, and cells missing
+        from rows, are read as None.
+        :param definition: The definition of the table, as read from the same file.
+        :return: An iterator over the values of each row of the table, not counting header or totals rows, in column
+                 order.
+        """
+
+        min_col, min_row, max_col, max_row = range_boundaries(definition.ref)
+        first_data_row: int = min_row + definition.header_row_count
+        last_data_row:  int = max_row - definition.totals_row_count
+
+        if(last_data_row < first_data_row):
+            return
+
+        width: int = max_col - min_col + 1
+        empty_row: tuple[None, ...] = (None,) * width
+        column_numbers: dict[str, int] = {}
+        next_row_no: int = first_data_row
+        row_no: int = 0
+        sheet_data: ElementTree.Element | None = None
+
+        with self._archive.open(definition.worksheet_path) as source:
+            for event, element in ElementTree.iterparse(source, events=("start", "end")):
+                if(event == "start"):
+                    if(element.tag == _SHEET_DATA_TAG):
+                        sheet_data = element
+
+                    continue
+
+                if(element.tag != _ROW_TAG):
+                    continue
+
+                row_number_text: str | None = element.get("r")
+                row_no = int(row_number_text) if row_number_text is not None else row_no + 1
+
+                if(row_no > last_data_row):
+                    break
+
+                if(row_no >= first_data_row):
+                    for _ in range(next_row_no, row_no):
+                        yield empty_row
+
+                    values: list[Any] = [None] * width
+                    col_no: int = 0
+
+                    for cell in element:
+                        cell_ref: str | None = cell.get("r")
+
+                        if(cell_ref is None):
+                            col_no += 1
+                        else:
+                            column_letters: str = cell_ref.rstrip(_ROW_NUMBER_DIGITS)
+                            col_no = column_numbers.get(column_letters, 0)
+
+                            if(col_no == 0):
+                                col_no = column_index_from_string(column_letters)
+                                column_numbers[column_letters] = col_no
+
+                        if(min_col <= col_no <= max_col):
+                            values[col_no - min_col] = self._read_cell_value(cell)
+
+                    yield tuple(values)
+                    next_row_no = row_no + 1
+
+                # Rows already read are removed from the tree, so the memory used doesn't grow with the sheet's size.
+                sheet_data.clear()
+
+        for _ in range(next_row_no, last_data_row + 1):
+            yield empty_row
+
+    def _read_cell_value(self, cell: ElementTree.Element) -> Any:
+        """
+        Reads the value of a cell, as openpyxl would in read-only mode with `data_only` set.
+        :param cell: The cell's element.
+        :return: The cell's value.
+        """
+
+        data_type: str = cell.get("t", "n")
+
+        if(data_type == "inlineStr"):
+            inline_string: ElementTree.Element | None = cell.find(_INLINE_STRING_TAG)
+            return _read_inline_string(inline_string) if inline_string is not None else None
+
+        value: str | None = cell.findtext(_VALUE_TAG) or None
+
+        if(value is None):
+            return None
+
+        if(data_type == "n"):
+            number: int | float = float(value) if ("." in value or "E" in value or "e" in value) else int(value)
+            style_id: int = int(cell.get("s", 0))
+
+            if(style_id not in self._date_style_ids):
+                return number
+
+            try:
+                return from_excel(number, self._epoch, timedelta=style_id in self._timedelta_style_ids)
+            except (OverflowError, ValueError):
+                # openpyxl treats dates it can't represent as errors.
+                return "#VALUE!"
+
+        if(data_type == "s"):
+            return self._shared_strings[int(value)]
+
+        if(data_type == "b"):
+            return bool(int(value))
+
+        if(data_type == "d"):
+            return from_ISO8601(value)
+
+        return value
+
+    def _read_epoch(self, workbook_path: str) -> datetime.datetime:
+        """
+        Reads the date system of the workbook.
+        :param workbook_path: The path of the workbook part in the archive.
+        :return: The date that dates in the workbook are counted from.
+        """
+
+        workbook_xml = ElementTree.fromstring(self._archive.read(workbook_path))
+        properties: ElementTree.Element | None = workbook_xml.find(f"{{{_MAIN_NS}}}workbookPr")
+
+        if(properties is not None and properties.get("date1904", "0").lower() in ("1", "true")):
+            return CALENDAR_MAC_1904
+
+        return CALENDAR_WINDOWS_1900
+
+    def _read_shared_strings(self, workbook_path: str) -> list[str]:
+        """
+        Reads the strings shared between the cells of the workbook.
+        :param workbook_path: The path of the workbook part in the archive.
+        :return: The shared strings, in order. This is empty if the workbook has none.
+        """
+
+        paths: list[str] = read_related_paths(self._archive, workbook_path, _SHARED_STRINGS_REL_TYPE)
+
+        if(len(paths) == 0):
+            return []
+
+        with self._archive.open(paths[0]) as source:
+            return read_string_table(source)
+
+    def _read_date_style_ids(self, workbook_path: str) -> tuple[set[int], set[int]]:
+        """
+        Reads which of the workbook's cell styles format numbers as dates, times or durations.
+        :param workbook_path: The path of the workbook part in the archive.
+        :return: A tuple of the numbers of the cell styles with date or time formats, and the numbers of those that are
+                 durations rather than points in time.
+        """
+
+        paths: list[str] = read_related_paths(self._archive, workbook_path, _STYLES_REL_TYPE)
+
+        if(len(paths) == 0):
+            return set(), set()
+
+        styles_xml = ElementTree.fromstring(self._archive.read(paths[0]))
+        custom_formats: dict[int, str] = {int(x.get("numFmtId")): x.get("formatCode")
+                                          for x in styles_xml.iter(f"{{{_MAIN_NS}}}numFmt")}
+
+        cell_formats: ElementTree.Element | None = styles_xml.find(f"{{{_MAIN_NS}}}cellXfs")
+        date_style_ids: set[int] = set()
+        timedelta_style_ids: set[int] = set()
+
+        if(cell_formats is None):
+            return date_style_ids, timedelta_style_ids
+
+        for style_id, cell_format in enumerate(cell_formats.iter(f"{{{_MAIN_NS}}}xf")):
+            format_id: int = int(cell_format.get("numFmtId", 0))
+            format_code: str | None = custom_formats.get(format_id, BUILTIN_FORMATS.get(format_id))
+
+            if(is_date_format(format_code)):
+                date_style_ids.add(style_id)
+
+            if(is_timedelta_format(format_code)):
+                timedelta_style_ids.add(style_id)
+
+        return date_style_ids, timedelta_style_ids
+
+
+def _read_inline_string(inline_string: ElementTree.Element) -> str:
+    """
+    Reads the text of an inline string, as openpyxl would, without its formatting or any phonetic text.
+    :param inline_string: The inline string's element.
+    :return: The text of the inline string, including the text of every run of rich text in it.
+    """
+
+    plain_text: str | None = inline_string.findtext(_TEXT_TAG)
+    runs_text: list[str] = [x.findtext(_TEXT_TAG) or "" for x in inline_string.iterfind(_RICH_TEXT_RUN_TAG)]
+
+    if(len(runs_text) == 0):
+        return plain_text or ""
+
+    return (plain_text or "") + "".join(runs_text)
+
+
+class _MappedFile:
+    """
+    A read-only file object over the contents of a memory-mapped file, so a zip archive can be read from them. mmap
+    objects can't be used as file objects for this themselves before Python 3.13, as they have no `seekable` method.
+    """
+
+    _mapped_file: mmap.mmap
+    """The contents of the file, memory-mapped."""
+
+    def __init__(self, mapped_file: mmap.mmap):
+        """
+        Creates a new _MappedFile object, positioned at the start of the given contents.
+        :param mapped_file: The contents of the file, memory-mapped.
+        """
+
+        self._mapped_file = mapped_file
+
+    def read(self, size: int = -1) -> bytes:
+        return self._mapped_file.read(size if size >= 0 else None)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        self._mapped_file.seek(offset, whence)
+        return self._mapped_file.tell()
+
+    def tell(self) -> int:
+        return self._mapped_file.tell()
+
+    def seekable(self) -> bool:
+        return True
@@ -0,0 +1,315 @@
+"""
+Contains the SnapshotCache class, a size-bounded cache on disk of tables parsed from Excel files, along with their key
+indices, so that tables diffed again and again needn't be parsed each time.
+"""
+
+import hashlib
+import mmap
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from stat import S_IWGRP, S_IWOTH
+
+from columnartable import ColumnarTable
+
+
+DEFAULT_MAX_BYTES: int = 4 * 1024 ** 3
+"""The default number of bytes of disk space the snapshots in a snapshot cache may take up."""
+
+_SNAPSHOT_FORMAT_VERSION: int = 2
+"""The version of the format snapshots are written in. Snapshots written in any other format are parsed afresh."""
+
+_SNAPSHOT_FILE_EXTENSION: str = ".snapshot"
+"""The extension of snapshot files in a cache directory."""
+
+_SnapshotSource = tuple[str, str, str, tuple[str, ...], bool]
+"""
+What a snapshot was made from: the content hash of the Excel file, the name of the sheet, the name of the table, the
+names of the key columns the table was indexed by, and whether the table was loaded in read-only mode.
+"""
+
+
+@dataclass
+class TableSnapshot:
+    """The values of a table, as parsed from an Excel file, along with the table's key index."""
+
+    table: ColumnarTable
+    """The values of the table."""
+
+    key_index: dict[tuple[str, ...], int] | None
+    """
+    The number of every row in the table, mapped against the row's normalised key values, as used by TableDiff, or None
+    where the table was snapshotted without one.
+    """
+
+
+class SnapshotCache:
+    """
+    A cache of tables parsed from Excel files, kept as snapshot files in a directory, so that diffs of the same tables
+    don't each need to parse them again.
+
+    Snapshots are keyed by a hash of the content of the file a table was parsed from, rather than its path or
+    modification time, so copies of a file share snapshots, and a file that changes is parsed again rather than being
+    read from a stale snapshot. Where the snapshots in the directory take up more space than the cache is allowed, the
+    least recently used are deleted first.
+
+    Snapshots are pickled, and reading a pickle can run arbitrary code, so the directory must be one only the current
+    user can write to. On systems with file ownership, the directory is checked to be owned by the current user and not
+    writable by anyone else, and so is each snapshot file before it's read; snapshot files that aren't are ignored.
+
+    Snapshots that can't be read, or that don't match what they're meant to be a snapshot of, are deleted and treated
+    as missing, so the table is parsed afresh. A snapshot cache holds no open files, so it can be pickled and used from
+    several processes at once.
+    """
+
+    directory: str
+    """The directory the snapshot files are kept in."""
+
+    max_bytes: int | None
+    """The number of bytes of disk space the snapshot files may take up, or None for no limit."""
+
+    _content_hashes: dict[tuple[str, int, int], str]
+    """
+    The content hashes of the files already hashed, mapped against the real path, size and modification time (in
+    nanoseconds) of each file, so that files aren't hashed again while they're unchanged.
+    """
+
+    def __init__(self, directory: str, max_bytes: int | None = DEFAULT_MAX_BYTES):
+        """
+        Creates a new SnapshotCache object, keeping snapshots in the given directory. The directory is created, only
+        accessible by the current user, if it doesn't exist, and any snapshots already in it are used.
+        :param directory: The directory to keep the snapshot files in. This must be trusted, as reading snapshots can
+                          run code written into them.
+        :param max_bytes: The number of bytes of disk space the snapshot files may take up, or None for no limit.
+        :raises PermissionError: If the directory isn't owned by the current user, or is writable by anyone else.
+        """
+
+        self.directory       = directory
+        self.max_bytes       = max_bytes
+        self._content_hashes = {}
+
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        if(not _is_trusted(os.stat(directory))):
+            raise PermissionError(f"The snapshot cache directory {directory} must be owned by the current user and not "
+                                  f"writable by anyone else.")
+
+    def get_snapshot(self,
+                     filepath:         str,
+                     sheet_name:       str,
+                     table_name:       str,
+                     key_column_names: list[str],
+                     read_only:        bool = False) \
+            -> TableSnapshot | None:
+        """
+        Reads the snapshot of a table, if there is one.
+        :param filepath: The filepath of the Excel file containing the table.
+        :param sheet_name: The name of the sheet containing the table.
+        :param table_name: The name of the table.
+        :param key_column_names: The names of the key columns the table is indexed by.
+        :param read_only: Whether to get the table as loaded in read-only mode.
+        :return: The snapshot of the table, or None if there's no usable snapshot of it, or if its snapshot file could
+                 have been written by anyone but the current user.
+        """
+
+        source: _SnapshotSource = self._get_source(filepath, sheet_name, table_name, key_column_names, read_only)
+        snapshot_path: str = self._get_snapshot_path(source)
+
+        try:
+            with open(snapshot_path, "rb") as file:
+                # Checked on the open file, so the file checked is the file read.
+                if(not _is_trusted(os.fstat(file.fileno()))):
+                    return None
+
+                contents: dict = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self._delete_snapshot(snapshot_path)
+            return None
+
+        if(contents.get("version") != _SNAPSHOT_FORMAT_VERSION or contents.get("source") != source):
+            self._delete_snapshot(snapshot_path)
+            return None
+
+        # The modification time of each snapshot records when it was last used, for eviction.
+        os.utime(snapshot_path)
+
+        return TableSnapshot(ColumnarTable(contents["column_names"], contents["columns"]), contents["key_index"])
+
+    def add_snapshot(self,
+                     filepath:         str,
+                     sheet_name:       str,
+                     table_name:       str,
+                     key_column_names: list[str],
+                     read_only:        bool,
+                     snapshot:         TableSnapshot) \
+            -> None:
+        """
+        Writes the snapshot of a table that has just been parsed, deleting the least recently used snapshots as needed
+        to stay within the cache's size limit.
+        :param filepath: The filepath of the Excel file the table was parsed from.
+        :param sheet_name: The name of the sheet containing the table.
+        :param table_name: The name of the table.
+        :param key_column_names: The names of the key columns the table was indexed by.
+        :param read_only: Whether the table was loaded in read-only mode.
+        :param snapshot: The values of the table and its key index.
+        """
+
+        source: _SnapshotSource = self._get_source(filepath, sheet_name, table_name, key_column_names, read_only)
+        snapshot_path: str = self._get_snapshot_path(source)
+
+        contents: dict = {"version":      _SNAPSHOT_FORMAT_VERSION,
+                          "source":       source,
+                          "column_names": snapshot.table.column_names,
+                          "columns":      snapshot.table.columns,
+                          "key_index":    snapshot.key_index}
+
+        # Written to a temporary file first and then moved into place, so a snapshot is never seen half-written.
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(contents, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+            os.replace(temp_path, snapshot_path)
+        except BaseException:
+            self._delete_snapshot(temp_path)
+            raise
+
+        self._evict(keep=snapshot_path)
+
+    def clear(self) -> None:
+        """
+        Deletes every snapshot in the cache.
+        """
+
+        for path, _, _ in self._list_snapshots():
+            self._delete_snapshot(path)
+
+    def _get_source(self,
+                    filepath:         str,
+                    sheet_name:       str,
+                    table_name:       str,
+                    key_column_names: list[str],
+                    read_only:        bool) \
+            -> _SnapshotSource:
+        """
+        Gets what the snapshot of a table would be made from.
+        :param filepath: The filepath of the Excel file containing the table.
+        :param sheet_name: The name of the sheet containing the table.
+        :param table_name: The name of the table.
+        :param key_column_names: The names of the key columns the table is indexed by.
+        :param read_only: Whether the table is loaded in read-only mode.
+        :return: The source of the table's snapshot.
+        """
+
+        return self._get_content_hash(filepath), sheet_name, table_name, tuple(key_column_names), read_only
+
+    def _get_content_hash(self, filepath: str) -> str:
+        """
+        Gets a hash of the content of a file, hashing it only if it's changed since it was last hashed.
+        :param filepath: The filepath of the file.
+        :return: The SHA-256 hash of the file's content, in hexadecimal.
+        """
+
+        stat: os.stat_result = os.stat(filepath)
+        file_key: tuple[str, int, int] = (os.path.realpath(filepath), stat.st_size, stat.st_mtime_ns)
+        result: str | None = self._content_hashes.get(file_key)
+
+        if(result is not None):
+            return result
+
+        with open(filepath, "rb") as file:
+            if(stat.st_size == 0):
+                result = hashlib.sha256().hexdigest()
+            else:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    result = hashlib.sha256(mapped).hexdigest()
+
+        self._content_hashes[file_key] = result
+        return result
+
+    def _get_snapshot_path(self, source: _SnapshotSource) -> str:
+        """
+        Gets the path of the snapshot file for a given source.
+        :param source: What the snapshot is made from.
+        :return: The path of the snapshot file in the cache directory.
+        """
+
+        name: str = hashlib.sha256(repr(source).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name + _SNAPSHOT_FILE_EXTENSION)
+
+    def _evict(self, keep: str) -> None:
+        """
+        Deletes the least recently used snapshots until the snapshots in the cache are within its size limit.
+        :param keep: The path of a snapshot not to delete, even if the cache is over its limit without it.
+        """
+
+        if(self.max_bytes is None):
+            return
+
+        snapshots: list[tuple[str, int, int]] = self._list_snapshots()
+        bytes_used: int = sum(size for _, size, _ in snapshots)
+
+        for path, size, _ in sorted(snapshots, key=lambda x: x[2]):
+            if(bytes_used <= self.max_bytes):
+                break
+
+            if(path == keep):
+                continue
+
+            self._delete_snapshot(path)
+            bytes_used -= size
+
+    def _list_snapshots(self) -> list[tuple[str, int, int]]:
+        """
+        Lists the snapshot files in the cache directory.
+        :return: A list of tuples of the path of each snapshot file, its size in bytes, and when it was last used, as a
+                 modification time in nanoseconds.
+        """
+
+        result: list[tuple[str, int, int]] = []
+
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if(not entry.name.endswith(_SNAPSHOT_FILE_EXTENSION)):
+                    continue
+
+                try:
+                    stat: os.stat_result = entry.stat()
+                except FileNotFoundError:
+                    # Deleted by another process since the directory was listed.
+                    continue
+
+                result.append((entry.path, stat.st_size, stat.st_mtime_ns))
+
+        return result
+
+    @staticmethod
+    def _delete_snapshot(path: str) -> None:
+        """
+        Deletes a snapshot file, if it still exists.
+        :param path: The path of the snapshot file.
+        """
+
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _is_trusted(stat: os.stat_result) -> bool:
+    """
+    Gets whether a file or directory can only have been written by the current user, as the files of a snapshot cache
+    must be to be read from.
+    :param stat: The status of the file or directory.
+    :return: True if the file or directory is owned by the current user and isn't writable by anyone else, or if this
+             system doesn't have file ownership. Otherwise, false.
+    """
+
+    if(not hasattr(os, "getuid")):
+        return True
+
+    return stat.st_uid == os.getuid() and stat.st_mode & (S_IWGRP | S_IWOTH) == 0
@@ -0,0 +1,200 @@
+"""
+Contains the TableCache class, a memory-bounded cache of the values of tables loaded from Excel files.
+"""
+
+import os
+from collections import OrderedDict
+from typing import Sequence
+
+from columnartable import ColumnarTable, load_tables_from_file
+
+
+DEFAULT_MAX_BYTES: int = 1024 ** 3
+"""The default approximate number of bytes of memory a table cache may take up."""
+
+_ESTIMATED_BYTES_PER_CACHED_CELL: int = 50
+"""A rough estimate of the memory taken up by each cell of a table held in a cache, including the cell's value."""
+
+_CacheKey = tuple[str, int, int, str, str, bool]
+"""
+The key a table is cached against: the real path, size and modification time (in nanoseconds) of the file the table is
+in, the name of the sheet the table is on, the name of the table, and whether it was loaded in read-only mode.
+"""
+
+
+class TableCache:
+    """
+    A cache of the values of tables loaded from Excel files, so that a table used by several diffs is only loaded once.
+
+    Tables are cached against the path, size and modification time of the files they're loaded from, so a file that
+    changes is loaded again rather than being served from the cache. Where the cached tables are estimated to take up
+    more memory than the cache is allowed, the least recently used tables are evicted first.
+
+    Cached tables are shared between everything that gets them from the cache, and so mustn't be modified.
+    """
+
+    max_bytes: int | None
+    """The approximate number of bytes of memory the cached tables may take up, or None for no limit."""
+
+    bytes_used: int
+    """The approximate number of bytes of memory the cached tables take up."""
+
+    _entries: OrderedDict[_CacheKey, tuple[ColumnarTable, int]]
+    """
+    The cached tables, each along with its estimated size in bytes, mapped against their keys, from least recently used
+    to most recently used.
+    """
+
+    def __init__(self, max_bytes: int | None = DEFAULT_MAX_BYTES):
+        """
+        Creates a new, empty TableCache object.
+        :param max_bytes: The approximate number of bytes of memory the cached tables may take up, or None for no limit.
+                          Tables estimated to be larger than this on their own aren't cached at all.
+        """
+
+        self.max_bytes  = max_bytes
+        self.bytes_used = 0
+        self._entries   = OrderedDict()
+
+    def get_table(self,
+                  filepath:     str,
+                  sheet_name:   str,
+                  table_name:   str,
+                  read_only:    bool = False,
+                  direct_parse: bool = False,
+                  compact:      bool = False) \
+            -> ColumnarTable:
+        """
+        Gets the values of a table, from the cache if it's there, or otherwise by loading it and adding it to the cache.
+        :param filepath: The filepath of the Excel file containing the table.
+        :param sheet_name: The name of the sheet containing the table.
+        :param table_name: The name of the table.
+        :param read_only: Whether to open the file in read-only mode if the table needs to be loaded, as with
+                          `ColumnarTable.load_from_file`. Tables loaded in either mode are cached separately.
+        :param direct_parse: Whether, in read-only mode, to parse the table's worksheet directly if it needs to be
+                             loaded. Tables loaded either way have the same values, so are cached together.
+        :param compact: Whether to store the table's columns compactly if it needs to be loaded, as with
+                        `ColumnarTable.from_rows`. Tables stored either way have the same values, so are cached
+                        together.
+        :return: The values of the table.
+        """
+
+        return self.get_tables(filepath, [(sheet_name, table_name)], read_only, direct_parse, compact)[0]
+
+    def get_tables(self,
+                   filepath:     str,
+                   tables:       Sequence[tuple[str, str]],
+                   read_only:    bool = False,
+                   direct_parse: bool = False,
+                   compact:      bool = False) \
+            -> list[ColumnarTable]:
+        """
+        Gets the values of several tables in the same Excel file, from the cache where they're there. Any that aren't
+        are loaded from the file together, opening the file only once, and added to the cache.
+        :param filepath: The filepath of the Excel file containing the tables.
+        :param tables: The tables to get, as tuples of the name of the sheet containing each table and the table's name.
+        :param read_only: Whether to open the file in read-only mode if any tables need to be loaded.
+        :param direct_parse: Whether, in read-only mode, to parse the tables' worksheets directly if any tables need to
+                             be loaded.
+        :param compact: Whether to store the columns of any tables that need to be loaded compactly.
+        :return: A list of the values of the given tables, in the same order.
+        """
+
+        result: list[ColumnarTable | None] = [self.get_cached_table(filepath, sheet_name, table_name, read_only)
+                                              for sheet_name, table_name in tables]
+
+        missing_positions: list[int] = [i for i, x in enumerate(result) if x is None]
+        missing_tables: list[tuple[str, str]] = [tables[i] for i in missing_positions]
+
+        loaded_tables: list[ColumnarTable] \
+            = load_tables_from_file(filepath, missing_tables, read_only, direct_parse, compact)
+
+        for position, table in zip(missing_positions, loaded_tables):
+            result[position] = table
+            self.add_table(filepath, *tables[position], read_only, table)
+
+        return result
+
+    def get_cached_table(self, filepath: str, sheet_name: str, table_name: str, read_only: bool = False) \
+            -> ColumnarTable | None:
+        """
+        Gets the values of a table from the cache, without loading it if it isn't there.
+        :param filepath: The filepath of the Excel file containing the table.
+        :param sheet_name: The name of the sheet containing the table.
+        :param table_name: The name of the table.
+        :param read_only: Whether to get the table as loaded in read-only mode.
+        :return: The values of the table, or None if they're not in the cache, the file has changed since they were, or
+                 the file no longer exists.
+        """
+
+        try:
+            key: _CacheKey = self._get_key(filepath, sheet_name, table_name, read_only)
+        except OSError:
+            # Left for whatever loads the table to report.
+            return None
+
+        entry: tuple[ColumnarTable, int] | None = self._entries.get(key)
+
+        if(entry is None):
+            return None
+
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def add_table(self, filepath: str, sheet_name: str, table_name: str, read_only: bool, table: ColumnarTable) \
+            -> None:
+        """
+        Adds the values of a table that have already been loaded to the cache, evicting the least recently used tables
+        as needed to stay within the cache's memory limit.
+        :param filepath: The filepath of the Excel file the table was loaded from.
+        :param sheet_name: The name of the sheet containing the table.
+        :param table_name: The name of the table.
+        :param read_only: Whether the table was loaded in read-only mode.
+        :param table: The values of the table.
+        """
+
+        key: _CacheKey = self._get_key(filepath, sheet_name, table_name, read_only)
+        size: int = table.row_count * len(table.column_names) * _ESTIMATED_BYTES_PER_CACHED_CELL
+
+        if(self.max_bytes is not None and size > self.max_bytes):
+            return
+
+        self._remove(key)
+        self._entries[key] = (table, size)
+        self.bytes_used += size
+
+        while(self.max_bytes is not None and self.bytes_used > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        """
+        Removes every table from the cache.
+        """
+
+        self._entries.clear()
+        self.bytes_used = 0
+
+    def _remove(self, key: _CacheKey) -> None:
+        """
+        Removes a table from the cache, if it's there.
+        :param key: The key of the table to remove.
+        """
+
+        entry: tuple[ColumnarTable, int] | None = self._entries.pop(key, None)
+
+        if(entry is not None):
+            self.bytes_used -= entry[1]
+
+    @staticmethod
+    def _get_key(filepath: str, sheet_name: str, table_name: str, read_only: bool) -> _CacheKey:
+        """
+        Gets the key a table is cached against, based on the current state of the file it's in.
+        :param filepath: The filepath of the Excel file containing the table.
+        :param sheet_name: The name of the sheet containing the table.
+        :param table_name: The name of the table.
+        :param read_only: Whether the table is loaded in read-only mode.
+        :return: The key of the table.
+        """
+
+        stat: os.stat_result = os.stat(filepath)
+        return os.path.realpath(filepath), stat.st_size, stat.st_mtime_ns, sheet_name, table_name, read_only
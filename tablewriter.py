@@ -0,0 +1,76 @@
+"""
+Contains functions for writing tables of values to write-only Excel workbooks.
+"""
+
+import warnings
+from typing import Any, Iterable, Sequence
+
+from openpyxl.workbook import Workbook
+from openpyxl.worksheet.filters import AutoFilter
+from openpyxl.worksheet.table import Table, TableColumn
+
+import Utils
+
+
+def append_table_sheet(wb:           Workbook,
+                       sheet_name:   str,
+                       table_name:   str,
+                       column_names: Sequence[str],
+                       rows:         Iterable[Sequence[Any]]) \
+        -> int:
+    """
+    Adds a sheet to the end of a workbook, containing a single table starting in the top-left cell.
+
+    The rows are streamed into the sheet as they're read, and the table's range is set once the final number of rows is
+    known, so this works with workbooks in write-only mode.
+    :param wb: The workbook to add the sheet to.
+    :param sheet_name: The name of the sheet.
+    :param table_name: The name of the table.
+    :param column_names: The names of the table's columns, in order. These are written as the table's header row.
+    :param rows: The values of each row of the table, in column order. These are read through exactly once.
+    :return: The number of rows written, not counting the header row.
+    """
+
+    sheet = wb.create_sheet(sheet_name)
+    sheet.append(column_names)
+    row_count: int = 0
+
+    for row in rows:
+        sheet.append(row)
+        row_count += 1
+
+    ref: str = f"A1:{Utils.convert_int_to_alphabetic_number(len(column_names))}{row_count + 1}"
+
+    table = Table(displayName  = table_name,
+                  ref          = ref,
+                  autoFilter   = AutoFilter(ref=ref),
+                  tableColumns = [TableColumn(id=i + 1, name=x) for i, x in enumerate(column_names)])
+
+    # openpyxl warns about every table added in write-only mode, since it can't read the column names from the sheet.
+    # They're set explicitly above.
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", "In write-only mode you must add table columns manually")
+        sheet.add_table(table)
+
+    return row_count
+
+
+def append_column_table_sheet(wb:           Workbook,
+                              sheet_name:   str,
+                              table_name:   str,
+                              column_names: Sequence[str],
+                              columns:      Sequence[Sequence[Any]]) \
+        -> int:
+    """
+    Adds a sheet to the end of a workbook, containing a single table starting in the top-left cell, from the values of
+    the table given column by column.
+    :param wb: The workbook to add the sheet to.
+    :param sheet_name: The name of the sheet.
+    :param table_name: The name of the table.
+    :param column_names: The names of the table's columns, in order. These are written as the table's header row.
+    :param columns: The values of each column of the table, in the same order as the column names. Every column should
+                    have the same number of values.
+    :return: The number of rows written, not counting the header row.
+    """
+
+    return append_table_sheet(wb, sheet_name, table_name, column_names, zip(*columns))
@@ -0,0 +1,59 @@
+"""
+Tests of reading tables into columnar form, each of the ways a table can be read.
+"""
+
+import datetime
+
+import pytest
+
+from columnartable import ColumnarTable, load_tables_from_file
+from tests.workbooks import TableSpec, write_workbook
+
+
+_ROWS: list[list] = [[1, "One",  1.5,  datetime.datetime(2024, 1, 1, 12, 30), True],
+                     [2, None,   -2.0, None,                                  False],
+                     [3, "Three", None, datetime.datetime(2024, 3, 1),        None]]
+
+_COLUMN_NAMES: list[str] = ["Id", "Name", "Amount", "When", "Flag"]
+
+_LOAD_MODES: list[dict[str, bool]] = [{"read_only": False},
+                                      {"read_only": True},
+                                      {"read_only": True, "direct_parse": True},
+                                      {"read_only": True, "direct_parse": True, "compact": True},
+                                      {"compact": True}]
+
+
+@pytest.fixture
+def workbook_path(tmp_path) -> str:
+    """
+    Writes a workbook with two tables on different sheets, one of them not starting in the top-left cell.
+    :return: The filepath of the workbook.
+    """
+
+    path: str = str(tmp_path / "tables.xlsx")
+    write_workbook(path, [TableSpec("Main",  _COLUMN_NAMES, _ROWS, "Data"),
+                          TableSpec("Other", ["Code"], [["x"], ["y"]], "More", top_left="C4")])
+    return path
+
+
+@pytest.mark.parametrize("mode", _LOAD_MODES, ids=lambda mode: "-".join(mode))
+def test_every_mode_reads_the_same_values(workbook_path: str, mode: dict[str, bool]):
+    table: ColumnarTable = ColumnarTable.load_from_file(workbook_path, "Data", "Main", **mode)
+
+    assert table.column_names == _COLUMN_NAMES
+    assert table.row_count == 3
+    assert [table.get_row_values(i) for i in range(3)] == [tuple(x) for x in _ROWS]
+    assert table.get_row(1) == dict(zip(_COLUMN_NAMES, _ROWS[1]))
+
+
+@pytest.mark.parametrize("mode", _LOAD_MODES, ids=lambda mode: "-".join(mode))
+def test_tables_are_loaded_together_in_the_order_asked_for(workbook_path: str, mode: dict[str, bool]):
+    other, main = load_tables_from_file(workbook_path, [("More", "Other"), ("Data", "Main")], **mode)
+
+    assert list(other.column("Code")) == ["x", "y"]
+    assert list(main.column("Id")) == [1, 2, 3]
+
+
+def test_loading_a_missing_table_together_raises_key_error(workbook_path: str):
+    with pytest.raises(KeyError):
+        load_tables_from_file(workbook_path, [("Data", "Main"), ("Data", "Missing")])
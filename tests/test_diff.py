@@ -0,0 +1,149 @@
+"""
+Tests of how TableDiff matches rows by key, and of the Excel file it saves the differences to.
+"""
+
+import threading
+
+import openpyxl
+import pytest
+
+from columnartable import ColumnarTable
+from diff import CellDifference, DiffResult, RowDifference, TableDiff, TableReference
+from tablecache import TableCache
+from tests.workbooks import write_table
+
+
+def _diff(tmp_path, column_names, first_rows, second_rows, key_column_names, **settings) -> TableDiff:
+    """
+    Writes a pair of single-table files and creates a diff of them.
+    :param tmp_path: The directory to write the files to.
+    :param column_names: The names of the columns of both tables.
+    :param first_rows: The rows of the first table.
+    :param second_rows: The rows of the second table.
+    :param key_column_names: The names of the key columns.
+    :param settings: Any other settings to create the diff with.
+    :return: The diff, unprocessed.
+    """
+
+    write_table(str(tmp_path / "first.xlsx"),  column_names, first_rows)
+    write_table(str(tmp_path / "second.xlsx"), column_names, second_rows)
+
+    return TableDiff(TableReference(str(tmp_path / "first.xlsx"),  "Sheet1", "Table1"),
+                     TableReference(str(tmp_path / "second.xlsx"), "Sheet1", "Table1"),
+                     str(tmp_path / "result.xlsx"),
+                     key_column_names,
+                     **settings)
+
+
+@pytest.mark.parametrize("columnwise_comparison", [False, True])
+def test_keys_are_matched_by_their_string_forms(tmp_path, columnwise_comparison: bool):
+    diff = _diff(tmp_path, ["Id", "Value"], [[1, "a"], [2, "b"]], [["1", "a"], ["2", "c"]], ["Id"],
+                 columnwise_comparison=columnwise_comparison)
+
+    result: DiffResult = diff.process()
+
+    assert result.row_differences == [RowDifference((2,), [CellDifference("Value", "b", "c")])]
+    assert result.rows_only_in_first == []
+    assert result.rows_only_in_second == []
+
+
+@pytest.mark.parametrize("columnwise_comparison", [False, True])
+@pytest.mark.parametrize("first_value", [0, False])
+def test_values_that_hash_the_same_as_empty_strings_are_still_different(tmp_path, first_value, columnwise_comparison):
+    # hash("") == hash(0) == hash(False), so rows with these values have the same fingerprint. Excel files don't keep
+    # empty strings, so the tables are given to the diff through its table cache.
+    diff = _diff(tmp_path, ["K", "A"], [[1, "x"]], [[1, "x"]], ["K"], columnwise_comparison=columnwise_comparison,
+                 table_cache=TableCache(None))
+
+    diff.table_cache.add_table(diff.first_table_ref.filepath, "Sheet1", "Table1", False,
+                               ColumnarTable.from_rows(["K", "A"], [[1, first_value], [2, "y"]]))
+    diff.table_cache.add_table(diff.second_table_ref.filepath, "Sheet1", "Table1", False,
+                               ColumnarTable.from_rows(["K", "A"], [[1, ""], [2, "y"]]))
+
+    result: DiffResult = diff.process()
+
+    assert result.row_differences == [RowDifference((1,), [CellDifference("A", str(first_value), "")])]
+
+
+def test_compound_keys_dont_run_together(tmp_path):
+    # Keys joined into single strings, however they're separated, can make different keys the same.
+    first_rows  = [["a|b", "c", 1], ["a", "b|c", 2]]
+    second_rows = [["a|b", "c", 1], ["a", "b|c", 3]]
+    diff = _diff(tmp_path, ["Key1", "Key2", "Value"], first_rows, second_rows, ["Key1", "Key2"])
+
+    result: DiffResult = diff.process()
+
+    assert result.row_differences == [RowDifference(("a", "b|c"), [CellDifference("Value", "2", "3")])]
+
+
+def test_saved_file_has_a_sheet_for_each_kind_of_difference(tmp_path):
+    first_rows  = [[1, "a", "x"], [2, "b", "y"], [3, "c", "z"]]
+    second_rows = [[1, "a", "x"], [2, "B", "y"], [4, "d", "w"]]
+    write_table(str(tmp_path / "first.xlsx"),  ["Id", "Value", "Old"], first_rows)
+    write_table(str(tmp_path / "second.xlsx"), ["Id", "Value", "New"], second_rows)
+
+    diff = TableDiff(TableReference(str(tmp_path / "first.xlsx"),  "Sheet1", "Table1"),
+                     TableReference(str(tmp_path / "second.xlsx"), "Sheet1", "Table1"),
+                     str(tmp_path / "result.xlsx"),
+                     ["Id"])
+
+    diff.process_and_save()
+    wb = openpyxl.load_workbook(str(tmp_path / "result.xlsx"))
+
+    assert wb.sheetnames == ["Differences", "Rows unique to first", "Rows unique to second",
+                             "Columns unique to first", "Columns unique to second"]
+
+    assert [list(x) for x in wb["Differences"].values] == [["Id", "Value * 1", "Value * 2"], [2, "b", "B"]]
+    assert [list(x) for x in wb["Rows unique to first"].values] == [["Id", "Value", "Old"], [3, "c", "z"]]
+    assert [list(x) for x in wb["Rows unique to second"].values] == [["Id", "Value", "New"], [4, "d", "w"]]
+    assert [list(x) for x in wb["Columns unique to first"].values] == [["Id", "Old"], [1, "x"], [2, "y"], [3, "z"]]
+    assert list(wb["Differences"].tables.keys()) == ["DiffTable"]
+    assert wb["Differences"].tables["DiffTable"].ref == "A1:C2"
+
+
+def test_no_sheets_are_saved_for_kinds_of_difference_there_are_none_of(tmp_path):
+    diff = _diff(tmp_path, ["Id", "Value"], [[1, "a"], [2, "b"]], [[1, "a"], [2, "c"]], ["Id"])
+
+    diff.process_and_save()
+
+    assert openpyxl.load_workbook(str(tmp_path / "result.xlsx")).sheetnames == ["Differences"]
+
+
+def test_concurrent_loading_from_a_background_thread_finds_the_same_differences(tmp_path):
+    diff = _diff(tmp_path, ["Id", "Value"], [[1, "a"], [2, "b"], [3, "c"]], [[1, "a"], [2, "B"], [4, "d"]], ["Id"],
+                 concurrent_load=True)
+
+    expected: DiffResult \
+        = TableDiff(diff.first_table_ref, diff.second_table_ref, diff.result_filepath, ["Id"]).process()
+
+    # As the GUI does, processed on a worker thread while another thread is running.
+    results: list[DiffResult] = []
+    idle = threading.Event()
+    bystander = threading.Thread(target=idle.wait)
+    bystander.start()
+
+    try:
+        worker = threading.Thread(target=lambda: results.append(diff.process()))
+        worker.start()
+        worker.join(timeout=120)
+    finally:
+        idle.set()
+        bystander.join()
+
+    assert results == [expected]
+
+
+@pytest.mark.parametrize("columnwise_comparison", [False, True])
+def test_processing_again_after_the_files_change_indexes_the_new_tables(tmp_path, columnwise_comparison: bool):
+    diff = _diff(tmp_path, ["Id", "Value"], [[1, "a"], [2, "b"], [3, "c"]], [[1, "a"], [2, "b"], [3, "c"]], ["Id"],
+                 columnwise_comparison=columnwise_comparison)
+
+    assert diff.process().row_differences == []
+
+    write_table(str(tmp_path / "first.xlsx"),  ["Id", "Value"], [[3, "c"]])
+    write_table(str(tmp_path / "second.xlsx"), ["Id", "Value"], [[2, "B"], [3, "C"]])
+    result: DiffResult = diff.process()
+
+    assert result.row_differences == [RowDifference((3,), [CellDifference("Value", "c", "C")])]
+    assert result.rows_only_in_second == [(2, "B")]
+    assert [x for x in diff.iterate_differences() if isinstance(x, RowDifference)] == result.row_differences
@@ -0,0 +1,76 @@
+"""
+Tests of reading the manifests of batches of diffs run from the command line.
+"""
+
+import json
+import os
+from typing import Any
+
+import pytest
+
+from diff import TableDiff
+from diffbatch import ManifestError, read_manifest
+
+
+def _job(**settings) -> dict[str, Any]:
+    """
+    Makes a well-formed job for a manifest, with some of its settings changed.
+    :param settings: The settings to change, with None removing a setting.
+    :return: The job.
+    """
+
+    job: dict[str, Any] = {"first":            {"filepath": "Old.xlsx", "sheet_name": "Sheet1", "table_name": "Table1"},
+                           "second":           {"filepath": "New.xlsx", "sheet_name": "Sheet1", "table_name": "Table1"},
+                           "key_column_names": ["Id"],
+                           "result_filepath":  "Diff.xlsx"}
+
+    job.update(settings)
+    return {k: v for k, v in job.items() if v is not None}
+
+
+def _write_manifest(tmp_path, jobs: list[Any]) -> str:
+    """
+    Writes a manifest file.
+    :param tmp_path: The directory to write the manifest to.
+    :param jobs: The jobs in the manifest.
+    :return: The filepath of the manifest.
+    """
+
+    path: str = str(tmp_path / "manifest.json")
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(jobs, file)
+
+    return path
+
+
+def test_jobs_are_read_as_diffs_relative_to_the_manifest(tmp_path):
+    path: str = _write_manifest(tmp_path, [_job(), _job(read_only=True, memory_budget=1_000_000)])
+
+    diffs: list[TableDiff] = read_manifest(path)
+
+    assert [x.key_column_names for x in diffs] == [["Id"], ["Id"]]
+    assert diffs[0].first_table_ref.filepath == os.path.join(str(tmp_path), "Old.xlsx")
+    assert diffs[0].result_filepath == os.path.join(str(tmp_path), "Diff.xlsx")
+    assert (diffs[1].read_only, diffs[1].memory_budget) == (True, 1_000_000)
+
+
+@pytest.mark.parametrize("settings, setting_name",
+                         [({"key_column_names": "ID"},                   "key_column_names"),
+                          ({"key_column_names": []},                     "key_column_names"),
+                          ({"key_column_names": ["Id", 2]},              "key_column_names"),
+                          ({"result_filepath": 5},                       "result_filepath"),
+                          ({"first": "Old.xlsx"},                        "first"),
+                          ({"second": {"filepath": "New.xlsx"}},         "second"),
+                          ({"read_only": "yes"},                         "read_only"),
+                          ({"compact_columns": 1},                       "compact_columns"),
+                          ({"memory_budget": True},                      "memory_budget"),
+                          ({"memory_budget": "1GB"},                     "memory_budget"),
+                          ({"memory_budget": -1},                        "memory_budget"),
+                          ({"key_column_names": None},                   "key_column_names"),
+                          ({"unknown": 1},                               "unknown")])
+def test_malformed_jobs_are_refused_naming_the_job_and_setting(tmp_path, settings: dict[str, Any], setting_name: str):
+    path: str = _write_manifest(tmp_path, [_job(), _job(**settings)])
+
+    with pytest.raises(ManifestError, match=f"Job 2 .*{setting_name}"):
+        read_manifest(path)
@@ -0,0 +1,110 @@
+"""
+Tests of processing queues of diffs, in this process and across worker processes.
+"""
+
+import os
+import threading
+import time
+
+import diffqueue
+import tablecache
+from diff import TableDiff, TableReference
+from diffqueue import DiffOutcome, _get_shared_tables_by_file, _process_and_save, process_and_save_diffs
+from tests.workbooks import write_table
+
+
+class _WaitingDiff(TableDiff):
+    """
+    A diff that, once it starts being processed, marks that it's started with a file next to its result file, and waits
+    to be cancelled for up to half a minute before carrying on.
+    """
+
+    def load_tables(self) -> None:
+        open(self.result_filepath + ".started", "w").close()
+        deadline: float = time.monotonic() + 30
+
+        while(not self.cancel_requested and time.monotonic() < deadline):
+            time.sleep(0.05)
+
+        super().load_tables()
+
+
+def test_outcomes_are_in_queue_order_and_failures_are_kept_to_their_own_diff(tmp_path):
+    write_table(str(tmp_path / "first.xlsx"),  ["Id", "Value"], [[1, "a"], [2, "b"]])
+    write_table(str(tmp_path / "second.xlsx"), ["Id", "Value"], [[1, "a"], [2, "c"]])
+    first  = TableReference(str(tmp_path / "first.xlsx"),   "Sheet1", "Table1")
+    second = TableReference(str(tmp_path / "second.xlsx"),  "Sheet1", "Table1")
+    absent = TableReference(str(tmp_path / "missing.xlsx"), "Sheet1", "Table1")
+
+    diffs: list[TableDiff] = [TableDiff(first, second, str(tmp_path / "1.xlsx"), ["Id"]),
+                              TableDiff(first, absent, str(tmp_path / "2.xlsx"), ["Id"]),
+                              TableDiff(second, first, str(tmp_path / "3.xlsx"), ["Id"])]
+
+    for max_workers in (1, 2):
+        outcomes: list[DiffOutcome] = process_and_save_diffs(diffs, max_workers)
+
+        assert [x.diff for x in outcomes] == diffs
+        assert [x.succeeded for x in outcomes] == [True, False, True]
+        assert "missing.xlsx" in outcomes[1].error
+        assert os.path.exists(tmp_path / "1.xlsx") and os.path.exists(tmp_path / "3.xlsx")
+
+
+def test_a_cancelled_diff_stops_when_processed_with_a_shared_cancel_event(tmp_path):
+    write_table(str(tmp_path / "first.xlsx"), ["Id", "Value"], [[1, "a"]])
+    ref = TableReference(str(tmp_path / "first.xlsx"), "Sheet1", "Table1")
+    diff = TableDiff(ref, ref, str(tmp_path / "result.xlsx"), ["Id"])
+    cancel_event = threading.Event()
+
+    cancel_event.set()
+    error, _, cancelled = _process_and_save(diff, [], cancel_event)
+
+    assert error is None and cancelled
+    assert diff.cancel_requested
+    assert not os.path.exists(tmp_path / "result.xlsx")
+
+
+def test_cancelling_reaches_diffs_already_running_in_workers(tmp_path):
+    write_table(str(tmp_path / "first.xlsx"), ["Id", "Value"], [[1, "a"]])
+    ref = TableReference(str(tmp_path / "first.xlsx"), "Sheet1", "Table1")
+    diffs: list[TableDiff] = [_WaitingDiff(ref, ref, str(tmp_path / f"{i}.xlsx"), ["Id"]) for i in range(2)]
+
+    def cancel_once_started() -> None:
+        while(not all(os.path.exists(x.result_filepath + ".started") for x in diffs)):
+            time.sleep(0.05)
+
+        for diff in diffs:
+            diff.cancel()
+
+    canceller = threading.Thread(target=cancel_once_started, daemon=True)
+    canceller.start()
+    outcomes: list[DiffOutcome] = process_and_save_diffs(diffs, max_workers=2)
+
+    assert all(x.cancelled and x.error is None for x in outcomes)
+    assert not any(os.path.exists(x.result_filepath) for x in diffs)
+
+
+def test_workers_parse_files_shared_by_their_diffs_once_and_keep_them(tmp_path, monkeypatch):
+    write_table(str(tmp_path / "base.xlsx"),  ["Id", "Value"], [[1, "a"], [2, "b"]])
+    write_table(str(tmp_path / "other.xlsx"), ["Id", "Value"], [[1, "a"], [2, "c"]])
+    base  = TableReference(str(tmp_path / "base.xlsx"),  "Sheet1", "Table1")
+    other = TableReference(str(tmp_path / "other.xlsx"), "Sheet1", "Table1")
+    diffs: list[TableDiff] = [TableDiff(base, other, str(tmp_path / f"{i}.xlsx"), ["Id"]) for i in range(3)]
+    parsed: list[str] = []
+    load_tables_from_file = tablecache.load_tables_from_file
+
+    def recording_load_tables_from_file(filepath, tables, *args):
+        if(len(tables) != 0):
+            parsed.append(os.path.basename(filepath))
+
+        return load_tables_from_file(filepath, tables, *args)
+
+    monkeypatch.setattr(tablecache, "load_tables_from_file", recording_load_tables_from_file)
+    monkeypatch.setattr(diffqueue, "_worker_table_cache", None)
+
+    # As a single worker process would process the whole queue.
+    for diff in diffs:
+        assert diffqueue._process_and_save_in_worker(diff, _get_shared_tables_by_file(diffs), threading.Event())[0] \
+            is None
+
+    assert parsed == ["base.xlsx", "other.xlsx"]
+    assert all(os.path.exists(x.result_filepath) for x in diffs)
@@ -0,0 +1,221 @@
+"""
+Tests that every way of loading and comparing tables finds the same differences, and that those are the differences
+found by comparing the tables naively, cell by cell.
+"""
+
+import datetime
+import itertools
+import os
+import random
+from typing import Any
+
+import pytest
+
+import diff as diff_module
+from diff import CellDifference, DiffResult, RowDifference, TableColumnContent, TableDiff, TableReference
+from tests.workbooks import write_table
+
+
+KEY_COLUMN_NAMES: list[str] = ["Id", "Region"]
+
+SHARED_COLUMN_NAMES: list[str] = ["Id", "Region", "Count", "Price", "Name", "Due", "Active", "Notes"]
+
+
+def _make_row(rng: random.Random, row_no: int) -> list[Any]:
+    """
+    Makes the values of a row of the first table, with a value of every type the tables can hold.
+    :param rng: The source of randomness.
+    :param row_no: The number of the row, which its key is made from.
+    :return: The values of the row, in the order of the shared column names.
+    """
+
+    return [row_no // 3,
+            ["North", "South", "East"][row_no % 3],
+            rng.randrange(-50, 50) if rng.random() > 0.1 else None,
+            round(rng.uniform(0, 1000), 2),
+            rng.choice(["Widget", "Gadget", "Gizmo", "Doohickey"]),
+            datetime.datetime(2024, 1, 1) + datetime.timedelta(days=rng.randrange(365), hours=rng.randrange(24)),
+            rng.random() > 0.5,
+            rng.choice([None, "Urgent", "Check stock", "  Check stock  "])]
+
+
+def _change_value(rng: random.Random, row: list[Any]) -> None:
+    """
+    Changes a non-key value of a row in place, sometimes in a way that doesn't count as a difference.
+    :param rng: The source of randomness.
+    :param row: The values of the row, in the order of the shared column names.
+    """
+
+    position: int = rng.randrange(2, len(row))
+    value: Any = row[position]
+
+    if(isinstance(value, str) and rng.random() < 0.3):
+        row[position] = f" {value} "
+    elif(isinstance(value, bool)):
+        row[position] = not value
+    elif(isinstance(value, (int, float))):
+        row[position] = value + 1
+    elif(isinstance(value, datetime.datetime)):
+        row[position] = value + datetime.timedelta(minutes=1)
+    else:
+        row[position] = "Changed"
+
+
+@pytest.fixture(scope="module")
+def table_files(tmp_path_factory: pytest.TempPathFactory) -> tuple[str, str, list[list[Any]], list[list[Any]]]:
+    """
+    Writes a pair of tables where the second is a modified copy of the first, with changed, deleted and inserted rows,
+    and a column unique to each.
+    :return: A tuple of the filepaths of the first and second files, and the rows of the first and second tables.
+    """
+
+    rng = random.Random(1234)
+    first_rows: list[list[Any]] = [_make_row(rng, row_no) for row_no in range(300)]
+    second_rows: list[list[Any]] = []
+
+    for row in first_rows:
+        if(rng.random() < 0.05):
+            continue
+
+        row = row.copy()
+
+        if(rng.random() < 0.3):
+            _change_value(rng, row)
+
+        second_rows.append(row)
+
+    for row_no in range(300, 320):
+        second_rows.insert(rng.randrange(len(second_rows) + 1), _make_row(rng, row_no))
+
+    first_rows  = [row + [f"First {i}"]  for i, row in enumerate(first_rows)]
+    second_rows = [row + [f"Second {i}"] for i, row in enumerate(second_rows)]
+
+    directory: str = str(tmp_path_factory.mktemp("equivalence"))
+    first_path:  str = os.path.join(directory, "first.xlsx")
+    second_path: str = os.path.join(directory, "second.xlsx")
+    write_table(first_path,  SHARED_COLUMN_NAMES + ["OnlyInFirst"],  first_rows)
+    write_table(second_path, SHARED_COLUMN_NAMES + ["OnlyInSecond"], second_rows)
+    return first_path, second_path, first_rows, second_rows
+
+
+def _naive_diff(first_rows: list[list[Any]], second_rows: list[list[Any]]) -> DiffResult:
+    """
+    Diffs two tables with the shared column names, plus a column unique to each, by comparing each pair of common rows
+    cell by cell, without any of the shortcuts TableDiff takes.
+    :param first_rows: The rows of the first table.
+    :param second_rows: The rows of the second table.
+    :return: The differences between the tables, as TableDiff should find them.
+    """
+
+    normalise = lambda x: str(x).strip() if x is not None else ""
+    key_of = lambda row: tuple(str(row[SHARED_COLUMN_NAMES.index(x)]) for x in KEY_COLUMN_NAMES)
+    second_by_key: dict[tuple[str, ...], list[Any]] = {key_of(x): x for x in second_rows}
+    first_keys: set[tuple[str, ...]] = {key_of(x) for x in first_rows}
+    row_differences: list[RowDifference] = []
+
+    for row in first_rows:
+        other: list[Any] | None = second_by_key.get(key_of(row))
+
+        if(other is None):
+            continue
+
+        cell_differences: list[CellDifference] = [CellDifference(name, normalise(v1), normalise(v2))
+                                                  for name, v1, v2 in zip(SHARED_COLUMN_NAMES, row, other)
+                                                  if normalise(v1) != normalise(v2)]
+
+        if(len(cell_differences) != 0):
+            row_differences.append(RowDifference(tuple(row[:len(KEY_COLUMN_NAMES)]), cell_differences))
+
+    return DiffResult(key_column_names       = KEY_COLUMN_NAMES,
+                      first_column_names     = SHARED_COLUMN_NAMES + ["OnlyInFirst"],
+                      second_column_names    = SHARED_COLUMN_NAMES + ["OnlyInSecond"],
+                      row_differences        = row_differences,
+                      rows_only_in_first     = [tuple(x) for x in first_rows if key_of(x) not in second_by_key],
+                      rows_only_in_second    = [tuple(x) for x in second_rows if key_of(x) not in first_keys],
+                      columns_only_in_first  = [TableColumnContent("OnlyInFirst",  [x[-1] for x in first_rows])],
+                      columns_only_in_second = [TableColumnContent("OnlyInSecond", [x[-1] for x in second_rows])])
+
+
+_MODES: list[dict[str, Any]] \
+    = [{"read_only":             read_only,
+        "direct_parse":          direct_parse,
+        "columnwise_comparison": columnwise_comparison,
+        "compact_columns":       compact_columns,
+        "memory_budget":         memory_budget}
+       for read_only, direct_parse, columnwise_comparison, compact_columns, memory_budget
+       in itertools.product([False, True], [False, True], [False, True], [False, True], [None, 20_000])
+       if read_only or not direct_parse]
+"""Every combination of the settings that change how tables are loaded and compared."""
+
+
+@pytest.mark.parametrize("mode", _MODES, ids=lambda mode: "-".join(k for k, v in mode.items() if v) or "default")
+def test_every_mode_finds_the_naive_differences(table_files, tmp_path, mode: dict[str, Any]):
+    first_path, second_path, first_rows, second_rows = table_files
+
+    diff = TableDiff(TableReference(first_path,  "Sheet1", "Table1"),
+                     TableReference(second_path, "Sheet1", "Table1"),
+                     str(tmp_path / "result.xlsx"),
+                     KEY_COLUMN_NAMES,
+                     **mode)
+
+    result: DiffResult = diff.process()
+    expected: DiffResult = _naive_diff(first_rows, second_rows)
+
+    assert len(expected.row_differences) > 0
+    assert result == expected
+
+    if(mode["memory_budget"] is not None):
+        assert any(x.name == "partitioned_diff" for x in diff.stats.stages)
+
+
+@pytest.mark.parametrize("columnwise_comparison", [False, True])
+def test_iterating_finds_the_same_differences_as_processing(table_files, tmp_path, columnwise_comparison: bool):
+    first_path, second_path, first_rows, second_rows = table_files
+
+    diff = TableDiff(TableReference(first_path,  "Sheet1", "Table1"),
+                     TableReference(second_path, "Sheet1", "Table1"),
+                     str(tmp_path / "result.xlsx"),
+                     KEY_COLUMN_NAMES,
+                     columnwise_comparison = columnwise_comparison)
+
+    expected: DiffResult = _naive_diff(first_rows, second_rows)
+    events: list[Any] = list(diff.iterate_differences())
+
+    assert [x for x in events if isinstance(x, RowDifference)] == expected.row_differences
+    assert [x.values for x in events if not isinstance(x, RowDifference) and x.in_first] == expected.rows_only_in_first
+    assert [x.values for x in events if not isinstance(x, RowDifference) and not x.in_first] \
+        == expected.rows_only_in_second
+    assert diff.first_table is None and diff.second_table is None
+
+
+def test_columnwise_comparison_yields_each_block_of_differences_before_comparing_the_next(table_files, tmp_path,
+                                                                                          monkeypatch):
+    first_path, second_path, first_rows, second_rows = table_files
+    compared_blocks: list[int] = []
+    compare_block_columnwise = TableDiff._compare_block_columnwise
+
+    def recording_compare_block_columnwise(compared_columns, codes_in_second, block_in_first, block_in_second):
+        compared_blocks.append(len(block_in_first))
+        return compare_block_columnwise(compared_columns, codes_in_second, block_in_first, block_in_second)
+
+    monkeypatch.setattr(diff_module, "_COLUMNWISE_BLOCK_ROWS", 7)
+    monkeypatch.setattr(TableDiff, "_compare_block_columnwise", staticmethod(recording_compare_block_columnwise))
+    diff = TableDiff(TableReference(first_path,  "Sheet1", "Table1"),
+                     TableReference(second_path, "Sheet1", "Table1"),
+                     str(tmp_path / "result.xlsx"),
+                     KEY_COLUMN_NAMES,
+                     columnwise_comparison = True)
+
+    row_differences: list[RowDifference] = []
+    blocks_compared_by_first_difference: int | None = None
+
+    for event in diff.iterate_differences():
+        if(isinstance(event, RowDifference)):
+            row_differences.append(event)
+
+            if(blocks_compared_by_first_difference is None):
+                blocks_compared_by_first_difference = len(compared_blocks)
+
+    assert len(compared_blocks) > 1 and set(compared_blocks[:-1]) == {7}
+    assert blocks_compared_by_first_difference < len(compared_blocks)
+    assert row_differences == _naive_diff(first_rows, second_rows).row_differences
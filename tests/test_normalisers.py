@@ -0,0 +1,121 @@
+"""
+Tests of normalising cell values before they're compared, and of the normalisers diffs choose for each column.
+"""
+
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import pytest
+
+from diff import CellDifference, DiffResult, RowDifference, TableDiff, TableReference, WORKER_PROCESS_CONTEXT
+from normalisers import (DateNormaliser, NumericNormaliser, TextNormaliser, ValueNormaliser, infer_normaliser,
+                         memoise_normaliser)
+from tests.workbooks import write_table
+
+
+def test_ints_and_floats_that_are_equal_normalise_the_same():
+    normalise = NumericNormaliser()
+
+    assert normalise(1) == normalise(1.0) == "1"
+    assert normalise(-2.50) == normalise(-2.5) == "-2.5"
+    assert normalise(0.1 + 0.2) != normalise(0.3)
+    assert normalise(True) == "True"
+    assert normalise(float("nan")) == "nan"
+
+
+def test_numbers_are_rounded_to_the_tolerance():
+    normalise = NumericNormaliser(0.01)
+
+    assert normalise(0.1 + 0.2) == normalise(0.3) == "0.3"
+    assert normalise(1.004) == normalise(0.996) == "1"
+    assert normalise(1.006) == "1.01"
+    assert NumericNormaliser(5)(12) == "10"
+    assert NumericNormaliser(0.25)(0.2) == "0.25"
+    assert NumericNormaliser(2.5)(6.3) == "7.5"
+
+    with pytest.raises(ValueError):
+        NumericNormaliser(-1)
+
+
+def test_datetimes_are_truncated_to_the_unit():
+    value = datetime.datetime(2024, 3, 1, 13, 45, 30, 500)
+
+    assert DateNormaliser()(value) == "2024-03-01 13:45:30.000500"
+    assert DateNormaliser("second")(value) == "2024-03-01 13:45:30"
+    assert DateNormaliser("minute")(value) == "2024-03-01 13:45:00"
+    assert DateNormaliser("hour")(value) == "2024-03-01 13:00:00"
+    assert DateNormaliser("day")(value) == DateNormaliser()(datetime.date(2024, 3, 1)) == "2024-03-01"
+    assert DateNormaliser("day")(" text ") == "text"
+
+    with pytest.raises(ValueError):
+        DateNormaliser("week")
+
+
+def test_text_is_case_folded_and_its_whitespace_collapsed():
+    assert TextNormaliser(case_insensitive=True)(" Straße ") == TextNormaliser(case_insensitive=True)("STRASSE")
+    assert TextNormaliser(collapse_whitespace=True)(" a \t b\n") == "a b"
+    assert TextNormaliser()(" A  b ") == ValueNormaliser()(" A  b ") == "A  b"
+    assert TextNormaliser(case_insensitive=True, collapse_whitespace=True)(None) == ""
+
+
+def test_normalisers_are_inferred_from_the_types_in_both_columns():
+    assert type(infer_normaliser([1, None], [2.5])) is NumericNormaliser
+    assert type(infer_normaliser([datetime.date(2024, 1, 1)], [datetime.datetime(2024, 1, 1)])) is DateNormaliser
+    assert type(infer_normaliser([1, True], [2])) is ValueNormaliser
+    assert type(infer_normaliser([None], [])) is ValueNormaliser
+
+
+def test_memoised_normalisers_normalise_each_distinct_string_and_boolean_once():
+    calls: list[Any] = []
+
+    def normaliser(value: Any) -> str:
+        calls.append(value)
+        return ValueNormaliser()(value)
+
+    normalise = memoise_normaliser(normaliser)
+    values: list[Any] = ["a", "a", 1, 1, True, 1.0, datetime.date(2024, 1, 1), datetime.date(2024, 1, 1), None, None]
+
+    assert [normalise(x) for x in values] == [ValueNormaliser()(x) for x in values]
+    assert calls == ["a", 1, 1, True, 1.0, datetime.date(2024, 1, 1), datetime.date(2024, 1, 1), None, None]
+
+
+def test_memoised_normalisers_tell_apart_equal_values_that_normalise_differently():
+    normalise = memoise_normaliser(ValueNormaliser())
+    utc = datetime.datetime(2024, 1, 1, 12, tzinfo=datetime.timezone.utc)
+    plus_one = datetime.datetime(2024, 1, 1, 13, tzinfo=datetime.timezone(datetime.timedelta(hours=1)))
+
+    assert [normalise(0.0), normalise(-0.0)] == ["0.0", "-0.0"]
+    assert [normalise(utc), normalise(plus_one)] == [str(utc), str(plus_one)]
+
+
+@pytest.mark.parametrize("normaliser", [ValueNormaliser(), TextNormaliser(True, True), NumericNormaliser(0.5),
+                                        DateNormaliser("day")],
+                         ids=lambda x: type(x).__name__)
+def test_normalisers_normalise_the_same_in_worker_processes(normaliser: ValueNormaliser):
+    values: list[Any] = [" Some  Text ", 1.26, 3, datetime.datetime(2024, 1, 1, 9), None]
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=WORKER_PROCESS_CONTEXT) as executor:
+        assert list(executor.map(normaliser, values)) == [normaliser(x) for x in values]
+
+
+def test_diffs_compare_cells_and_keys_by_their_columns_normalisers(tmp_path):
+    write_table(str(tmp_path / "first.xlsx"),  ["Code", "Amount", "When"],
+                [["abc", 1, datetime.datetime(2024, 1, 1, 9)], ["DEF", 2.004, datetime.datetime(2024, 1, 2)]])
+    write_table(str(tmp_path / "second.xlsx"), ["Code", "Amount", "When"],
+                [["ABC", 1.0, datetime.datetime(2024, 1, 1, 17)], ["def", 2.5, datetime.datetime(2024, 1, 3)]])
+
+    diff = TableDiff(TableReference(str(tmp_path / "first.xlsx"),  "Sheet1", "Table1"),
+                     TableReference(str(tmp_path / "second.xlsx"), "Sheet1", "Table1"),
+                     str(tmp_path / "result.xlsx"),
+                     ["Code"],
+                     column_normalisers = {"Code":   TextNormaliser(case_insensitive=True),
+                                           "Amount": NumericNormaliser(0.01),
+                                           "When":   DateNormaliser("day")})
+
+    result: DiffResult = diff.process()
+
+    assert result.rows_only_in_first == [] and result.rows_only_in_second == []
+    assert result.row_differences \
+        == [RowDifference(("DEF",), [CellDifference("Amount", "2", "2.5"),
+                                     CellDifference("When", "2024-01-02", "2024-01-03")])]
@@ -0,0 +1,113 @@
+"""
+Tests of diffing tables within a memory budget, a partition at a time.
+"""
+
+import pytest
+
+import diff as diff_module
+from diff import CellDifference, DiffResult, TableDiff, TableReference
+from tests.workbooks import write_table
+
+
+_COLUMN_NAMES: list[str] = ["Id", "Name", "Amount", "Only"]
+
+
+@pytest.fixture
+def refs(tmp_path) -> tuple[TableReference, TableReference]:
+    """
+    Writes a pair of tables with changed, deleted and inserted rows.
+    :return: References to the first and second tables.
+    """
+
+    first_rows  = [[i, f"Name {i % 7}", i * 1.5, "x"] for i in range(400)]
+    second_rows = [[i, f"Name {i % 7}", i * 1.5 + (i % 11 == 0), "x"] for i in range(400) if i % 13 != 0]
+    second_rows += [[i, "New", 0.0, "y"] for i in range(400, 420)]
+    write_table(str(tmp_path / "first.xlsx"),  _COLUMN_NAMES, first_rows)
+    write_table(str(tmp_path / "second.xlsx"), _COLUMN_NAMES, second_rows)
+
+    return (TableReference(str(tmp_path / "first.xlsx"),  "Sheet1", "Table1"),
+            TableReference(str(tmp_path / "second.xlsx"), "Sheet1", "Table1"))
+
+
+@pytest.mark.parametrize("memory_budget", [100_000, 20_000, 1_000])
+@pytest.mark.parametrize("columnwise_comparison", [False, True])
+def test_partitioned_results_equal_in_memory_results(tmp_path, refs, memory_budget: int, columnwise_comparison: bool):
+    in_memory = TableDiff(*refs, str(tmp_path / "a.xlsx"), ["Id"], columnwise_comparison=columnwise_comparison)
+    partitioned = TableDiff(*refs, str(tmp_path / "b.xlsx"), ["Id"], columnwise_comparison=columnwise_comparison,
+                            memory_budget=memory_budget)
+
+    expected: DiffResult = in_memory.process()
+    result: DiffResult = partitioned.process()
+
+    assert partitioned._get_partition_count() > 1
+    assert [x.name for x in partitioned.stats.stages] == ["partitioned_diff"]
+    assert len(expected.row_differences) > 0 and len(expected.rows_only_in_second) > 0
+    assert result == expected
+
+
+def test_partitioned_tables_are_streamed_whatever_the_read_only_setting(tmp_path, refs, monkeypatch):
+    read_only_settings: list[bool] = []
+    open_table_rows = diff_module.open_table_rows
+
+    def recording_open_table_rows(filepath, sheet_name, table_name, read_only=False, direct_parse=False):
+        read_only_settings.append(read_only)
+        return open_table_rows(filepath, sheet_name, table_name, read_only, direct_parse)
+
+    monkeypatch.setattr(diff_module, "open_table_rows", recording_open_table_rows)
+    TableDiff(*refs, str(tmp_path / "result.xlsx"), ["Id"], read_only=False, memory_budget=20_000).process()
+
+    assert read_only_settings == [True, True]
+
+
+@pytest.mark.parametrize("memory_budget", [200_000, 20_000])
+def test_rows_buffered_while_partitioning_fit_within_the_budget(tmp_path, refs, monkeypatch, memory_budget: int):
+    spills: list[diff_module.PartitionSpill] = []
+    partition_spill = diff_module.PartitionSpill
+
+    def recording_partition_spill(*args):
+        spills.append(partition_spill(*args))
+        return spills[-1]
+
+    monkeypatch.setattr(diff_module, "PartitionSpill", recording_partition_spill)
+    TableDiff(*refs, str(tmp_path / "result.xlsx"), ["Id"], memory_budget=memory_budget).process()
+    bytes_per_row: int = len(_COLUMN_NAMES) * diff_module._ESTIMATED_BYTES_PER_CELL
+
+    assert len(spills) == 2
+
+    for spill in spills:
+        assert spill.buffer_rows * spill.partition_count * bytes_per_row <= memory_budget
+
+
+def test_table_definitions_are_read_once_per_run(tmp_path, refs, monkeypatch):
+    reads: list[str] = []
+    get_table_definition = diff_module.get_table_definition
+
+    def recording_get_table_definition(filepath, sheet_name, table_name):
+        reads.append(filepath)
+        return get_table_definition(filepath, sheet_name, table_name)
+
+    monkeypatch.setattr(diff_module, "get_table_definition", recording_get_table_definition)
+    diff = TableDiff(*refs, str(tmp_path / "result.xlsx"), ["Id"], memory_budget=20_000)
+
+    diff.process()
+    assert len(reads) == 2
+
+    list(diff.iterate_differences())
+    assert len(reads) == 4
+
+
+def test_normalisers_are_inferred_from_the_whole_of_both_tables(tmp_path):
+    # Column V holds a string in just one row of the first table, so isn't numeric in either table as a whole, but is
+    # in most partitions of it. Large numbers are normalised as "1e+16" the default way, but in full as numbers.
+    write_table(str(tmp_path / "first.xlsx"),  ["Id", "V"], [[i, 1e16 if i > 0 else "x"] for i in range(200)])
+    write_table(str(tmp_path / "second.xlsx"), ["Id", "V"], [[i, 2e16] for i in range(200)])
+    refs = (TableReference(str(tmp_path / "first.xlsx"),  "Sheet1", "Table1"),
+            TableReference(str(tmp_path / "second.xlsx"), "Sheet1", "Table1"))
+
+    expected: DiffResult = TableDiff(*refs, str(tmp_path / "a.xlsx"), ["Id"], infer_normalisers=True).process()
+    partitioned = TableDiff(*refs, str(tmp_path / "b.xlsx"), ["Id"], infer_normalisers=True, memory_budget=2_000)
+    result: DiffResult = partitioned.process()
+
+    assert partitioned._get_partition_count() > 1
+    assert expected.row_differences[1].cell_differences == [CellDifference("V", "1e+16", "2e+16")]
+    assert result == expected
@@ -0,0 +1,62 @@
+"""
+Tests of streaming the results of diffs to sinks rather than saving them to Excel files.
+"""
+
+import json
+from typing import Any
+
+from diff import TableColumnContent, TableDiff, TableReference
+from resultsink import JsonLinesResultSink
+from tests.workbooks import write_table
+
+
+def _read_json_lines(filepath: str) -> list[dict[str, Any]]:
+    """
+    Reads a JSON Lines file, refusing the non-standard NaN and Infinity constants Python writes by default.
+    :param filepath: The filepath of the file.
+    :return: The object on each line of the file, in order.
+    """
+
+    def refuse(constant: str) -> None:
+        raise ValueError(f"{constant} isn't valid JSON.")
+
+    with open(filepath, encoding="utf-8") as file:
+        return [json.loads(line, parse_constant=refuse) for line in file]
+
+
+def test_json_lines_are_standard_json_whatever_the_numbers(tmp_path):
+    sink = JsonLinesResultSink(str(tmp_path / "result.jsonl"))
+
+    sink.open(["Id"])
+    sink.write_row_only_in_first(["Id", "Value"], (1, float("nan")))
+    sink.write_row_only_in_second(["Id", "Value"], (2, float("inf")))
+    sink.write_columns_only_in_first([TableColumnContent("Id", [1, 2])],
+                                     [TableColumnContent("Extra", [float("-inf"), 1.5])])
+    sink.close()
+
+    assert _read_json_lines(str(tmp_path / "result.jsonl")) \
+        == [{"type": "row_only_in_first",     "row":  {"Id": 1, "Value": "NaN"}},
+            {"type": "row_only_in_second",    "row":  {"Id": 2, "Value": "Infinity"}},
+            {"type": "columns_only_in_first", "keys": {"Id": 1}, "values": {"Extra": "-Infinity"}},
+            {"type": "columns_only_in_first", "keys": {"Id": 2}, "values": {"Extra": 1.5}}]
+
+
+def test_diffs_stream_their_results_to_json_lines(tmp_path):
+    write_table(str(tmp_path / "first.xlsx"),  ["Id", "Value"], [[1, "a"], [2, "b"], [3, "c"]])
+    write_table(str(tmp_path / "second.xlsx"), ["Id", "Value"], [[1, "a"], [2, "B"], [4, "d"]])
+    sink = JsonLinesResultSink(str(tmp_path / "result.jsonl"))
+
+    diff = TableDiff(TableReference(str(tmp_path / "first.xlsx"),  "Sheet1", "Table1"),
+                     TableReference(str(tmp_path / "second.xlsx"), "Sheet1", "Table1"),
+                     str(tmp_path / "result.xlsx"),
+                     ["Id"],
+                     result_sink = sink)
+
+    diff.process()
+
+    assert sorted(_read_json_lines(str(tmp_path / "result.jsonl")), key=lambda x: x["type"]) \
+        == [{"type":  "row_difference",
+             "keys":  {"Id": 2},
+             "cells": [{"column": "Value", "first": "b", "second": "B"}]},
+            {"type": "row_only_in_first",  "row":  {"Id": 3, "Value": "c"}},
+            {"type": "row_only_in_second", "row":  {"Id": 4, "Value": "d"}}]
@@ -0,0 +1,155 @@
+"""
+Tests that SheetMLReader reads the values of tables as openpyxl does in read-only mode with `data_only` set.
+"""
+
+import datetime
+import re
+import zipfile
+from typing import Any
+
+import openpyxl
+import pytest
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.utils.datetime import CALENDAR_MAC_1904
+
+from sheetmlreader import SheetMLReader
+from tests.workbooks import TableSpec, write_workbook
+from xlsxmetadata import TableDefinition, get_table_definition
+
+
+_INLINE_STRING_CELL: re.Pattern = re.compile(r'<c ([^>]*?)t="inlineStr"([^>]*)><is><t(?: [^>]*)?>(.*?)</t></is></c>')
+
+_COLUMN_NAMES: list[str] = ["Id", "Name", "Amount", "Flag", "Day", "When", "Time", "Duration"]
+
+_ROWS: list[list[Any]] = [[1, "One", 1.5, True, datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 1, 12, 30),
+                           datetime.time(9, 15), datetime.timedelta(hours=30, minutes=5)],
+                          [2, "Two", -2, False, datetime.datetime(1904, 1, 2), datetime.datetime(1999, 12, 31, 23, 59),
+                           datetime.time(0, 0), datetime.timedelta(minutes=1)],
+                          [None] * 8,
+                          [4, None, 1e20, None, None, datetime.datetime(2024, 2, 29, 6), None, None],
+                          [5, "  Spaced & <escaped>  ", 0, True, datetime.datetime(2100, 12, 31), None,
+                           datetime.time(23, 59, 59), None],
+                          [None, "One", None, None, None, None, None, datetime.timedelta(0)]]
+
+_NUMBER_FORMATS: dict[str, str] = {"Day": "yyyy-mm-dd", "When": "yyyy-mm-dd hh:mm", "Time": "hh:mm:ss",
+                                   "Duration": "[h]:mm:ss"}
+
+
+def _share_strings(filepath: str) -> None:
+    """
+    Rewrites an Excel file written by openpyxl, which only writes inline strings, so that every other string cell is a
+    shared string instead, with the shared strings in a table of their own as Excel writes them.
+    :param filepath: The filepath of the Excel file.
+    """
+
+    with zipfile.ZipFile(filepath) as source:
+        parts: dict[str, bytes] = {x: source.read(x) for x in source.namelist()}
+
+    shared_strings: list[str] = []
+    string_count: int = 0
+
+    def share(match: re.Match) -> str:
+        nonlocal string_count
+        string_count += 1
+
+        if(string_count % 2 == 0):
+            return match.group(0)
+
+        shared_strings.append(match.group(3))
+        return f'<c {match.group(1)}t="s"{match.group(2)}><v>{len(shared_strings) - 1}</v></c>'
+
+    for name in [x for x in parts if x.startswith("xl/worksheets/sheet")]:
+        parts[name] = _INLINE_STRING_CELL.sub(share, parts[name].decode("utf-8")).encode("utf-8")
+
+    string_items: str = "".join(f'<si><t xml:space="preserve">{x}</t></si>' for x in shared_strings)
+    parts["xl/sharedStrings.xml"] \
+        = (f'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="{len(shared_strings)}" '
+           f'uniqueCount="{len(shared_strings)}">{string_items}</sst>').encode("utf-8")
+
+    parts["[Content_Types].xml"] = parts["[Content_Types].xml"].replace(
+        b"</Types>",
+        b'<Override PartName="/xl/sharedStrings.xml" '
+        b'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>')
+
+    parts["xl/_rels/workbook.xml.rels"] = parts["xl/_rels/workbook.xml.rels"].replace(
+        b"</Relationships>",
+        b'<Relationship Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+        b'Target="sharedStrings.xml" Id="rIdShared"/></Relationships>')
+
+    with zipfile.ZipFile(filepath, "w", zipfile.ZIP_DEFLATED) as destination:
+        for name, content in parts.items():
+            destination.writestr(name, content)
+
+
+def _read_with_openpyxl(filepath: str, definition: TableDefinition) -> list[tuple[Any, ...]]:
+    """
+    Reads the values of the data rows of a table through openpyxl, in read-only mode with `data_only` set.
+    :param filepath: The filepath of the Excel file containing the table.
+    :param definition: The definition of the table.
+    :return: The values of each data row of the table, in column order.
+    """
+
+    min_col, min_row, max_col, max_row = range_boundaries(definition.ref)
+    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+
+    try:
+        sheet = wb[definition.sheet_name]
+        return list(sheet.iter_rows(min_row     = min_row + definition.header_row_count,
+                                    max_row     = max_row - definition.totals_row_count,
+                                    min_col     = min_col,
+                                    max_col     = max_col,
+                                    values_only = True))
+    finally:
+        wb.close()
+
+
+@pytest.fixture(params=[None, CALENDAR_MAC_1904], ids=["1900", "1904"])
+def workbook_path(request, tmp_path) -> str:
+    """
+    Writes a workbook, in each date system, with tables of every type of value, with gaps, not starting in the top-left
+    cell, with totals rows and with their strings both shared and inline.
+    :return: The filepath of the workbook.
+    """
+
+    path: str = str(tmp_path / "tables.xlsx")
+    totals_row: list[Any] = ["Total", None, "=SUBTOTAL(109,[Amount])", None, None, None, None, None]
+
+    write_workbook(path,
+                   [TableSpec("Main",   _COLUMN_NAMES, _ROWS, "Data", number_formats=_NUMBER_FORMATS),
+                    TableSpec("Offset", _COLUMN_NAMES, _ROWS, "Data", top_left="K5", totals_row=totals_row,
+                              number_formats=_NUMBER_FORMATS),
+                    TableSpec("Gappy",  ["Code", "Empty"], [[None, None], ["x", None], [None, None], ["y", None]],
+                              "Other", top_left="C3", totals_row=["z", 1])],
+                   epoch=request.param)
+
+    _share_strings(path)
+    return path
+
+
+@pytest.mark.parametrize("table_name", ["Main", "Offset", "Gappy"])
+def test_values_are_read_as_openpyxl_reads_them(workbook_path: str, table_name: str):
+    sheet_name: str = "Other" if table_name == "Gappy" else "Data"
+    definition: TableDefinition = get_table_definition(workbook_path, sheet_name, table_name)
+    expected: list[tuple[Any, ...]] = _read_with_openpyxl(workbook_path, definition)
+
+    with SheetMLReader(workbook_path) as reader:
+        rows: list[tuple[Any, ...]] = list(reader.iter_table_rows(definition))
+
+    assert rows == expected
+    assert [[type(x) for x in row] for row in rows] == [[type(x) for x in row] for row in expected]
+
+
+def test_fixture_has_both_shared_and_inline_strings(workbook_path: str):
+    with zipfile.ZipFile(workbook_path) as archive:
+        sheet_xml: bytes = archive.read("xl/worksheets/sheet1.xml")
+
+    assert b't="s"' in sheet_xml and b't="inlineStr"' in sheet_xml
+
+
+def test_dates_are_read_in_the_workbooks_date_system(workbook_path: str):
+    definition: TableDefinition = get_table_definition(workbook_path, "Data", "Main")
+
+    with SheetMLReader(workbook_path) as reader:
+        first_row: tuple[Any, ...] = next(reader.iter_table_rows(definition))
+
+    assert first_row == tuple(_ROWS[0])
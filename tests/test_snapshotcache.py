@@ -0,0 +1,83 @@
+"""
+Tests of keeping tables parsed from Excel files as snapshots on disk, and of only reading snapshots the current user
+could have written.
+"""
+
+import os
+
+import pytest
+
+from columnartable import ColumnarTable
+from snapshotcache import SnapshotCache, TableSnapshot
+
+
+_owned_by_user = pytest.mark.skipif(not hasattr(os, "getuid"), reason="This system doesn't have file ownership.")
+
+
+@pytest.fixture
+def source_path(tmp_path) -> str:
+    """
+    Writes a file to take snapshots of tables from. Only its content matters to the cache, so it needn't be an Excel
+    file.
+    :return: The filepath of the file.
+    """
+
+    path: str = str(tmp_path / "source.xlsx")
+
+    with open(path, "wb") as file:
+        file.write(b"content")
+
+    return path
+
+
+def _add_snapshot(cache: SnapshotCache, source_path: str) -> TableSnapshot:
+    """
+    Adds a snapshot of a small table to a cache.
+    :param cache: The cache to add the snapshot to.
+    :param source_path: The filepath of the file the table is to have been parsed from.
+    :return: The snapshot added.
+    """
+
+    snapshot = TableSnapshot(ColumnarTable.from_rows(["Id", "Value"], [[1, "a"], [2, None]]), {("1",): 0, ("2",): 1})
+    cache.add_snapshot(source_path, "Sheet1", "Table1", ["Id"], False, snapshot)
+    return snapshot
+
+
+def test_snapshots_are_read_back_as_written(tmp_path, source_path: str):
+    cache = SnapshotCache(str(tmp_path / "snapshots"))
+    snapshot: TableSnapshot = _add_snapshot(cache, source_path)
+
+    result: TableSnapshot | None = cache.get_snapshot(source_path, "Sheet1", "Table1", ["Id"])
+
+    assert result is not None
+    assert result.table.column_names == snapshot.table.column_names
+    assert [result.table.get_row_values(i) for i in range(2)] == [(1, "a"), (2, None)]
+    assert result.key_index == snapshot.key_index
+    assert cache.get_snapshot(source_path, "Sheet1", "Table1", ["Value"]) is None
+
+
+@_owned_by_user
+def test_new_directories_are_only_accessible_by_the_current_user(tmp_path):
+    SnapshotCache(str(tmp_path / "snapshots"))
+
+    assert os.stat(tmp_path / "snapshots").st_mode & 0o777 == 0o700
+
+
+@_owned_by_user
+def test_directories_writable_by_anyone_else_are_refused(tmp_path):
+    os.mkdir(tmp_path / "shared")
+    os.chmod(tmp_path / "shared", 0o777)
+
+    with pytest.raises(PermissionError):
+        SnapshotCache(str(tmp_path / "shared"))
+
+
+@_owned_by_user
+def test_snapshot_files_writable_by_anyone_else_arent_read(tmp_path, source_path: str):
+    cache = SnapshotCache(str(tmp_path / "snapshots"))
+    _add_snapshot(cache, source_path)
+    (snapshot_path, _, _), = cache._list_snapshots()
+
+    os.chmod(snapshot_path, 0o666)
+
+    assert cache.get_snapshot(source_path, "Sheet1", "Table1", ["Id"]) is None
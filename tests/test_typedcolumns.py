@@ -0,0 +1,102 @@
+"""
+Tests of storing table columns compactly, and of reading them back as the values they were made from.
+"""
+
+import datetime
+import pickle
+from typing import Any
+
+import pytest
+
+from diff import CellDifference, DiffResult, RowDifference, TableDiff, TableReference
+from tests.workbooks import write_table
+from typedcolumns import (DateTimeColumn, DictionaryColumn, FloatColumn, IntColumn, compact_column, map_column,
+                          map_values, take_values)
+
+
+_COLUMNS: dict[str, tuple[list[Any], type]] \
+    = {"ints":        ([1, -2, None, 2 ** 63 - 1, -2 ** 63, 0],                              IntColumn),
+       "floats":      ([1.5, None, -0.0, float("inf"), 1e-300],                              FloatColumn),
+       "datetimes":   ([datetime.datetime(2024, 2, 29, 23, 59, 59, 999999), None,
+                        datetime.datetime(1899, 12, 31), datetime.datetime(9999, 12, 31)],   DateTimeColumn),
+       "text":        (["a", "b", None, "a", "b", None, "", ""],                             DictionaryColumn),
+       "bools":       ([True, False, None, True, False, True],                               DictionaryColumn),
+       "no nulls":    ([3, 1, 2],                                                            IntColumn),
+       "all nulls":   ([None, None, None, None],                                             DictionaryColumn),
+       "bool vs int": ([True, 1, 0, False, None, 1],                                         list),
+       "mixed":       ([1, 1.5, "a", None],                                                  list),
+       "huge int":    ([2 ** 63, 1],                                                         list),
+       "distinct":    (["a", "b", "c"],                                                      list),
+       "timezones":   ([datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc), None],  list)}
+
+
+@pytest.mark.parametrize("name", _COLUMNS)
+def test_values_are_read_back_as_they_were_stored(name: str):
+    values, column_type = _COLUMNS[name]
+
+    column = compact_column(values)
+    read_back: list[Any] = list(column)
+
+    assert type(column) is column_type
+    assert len(column) == len(values)
+    assert read_back == values and [type(x) for x in read_back] == [type(x) for x in values]
+    assert [column[i] for i in range(len(values))] == values
+    assert take_values(column, [len(values) - 1, 0, 1]) == [values[-1], values[0], values[1]]
+    assert list(map_column(repr, column)) == list(map(repr, values))
+    assert map_values(repr, column, [len(values) - 1, 0, 0]) == [repr(values[-1]), repr(values[0]), repr(values[0])]
+
+
+@pytest.mark.parametrize("name", _COLUMNS)
+def test_pickled_columns_hold_the_same_values(name: str):
+    values, column_type = _COLUMNS[name]
+
+    column = pickle.loads(pickle.dumps(compact_column(values)))
+
+    assert type(column) is column_type
+    assert list(column) == values and [type(x) for x in column] == [type(x) for x in values]
+
+
+def test_dictionary_columns_are_coded_with_the_smallest_integers_that_fit():
+    assert DictionaryColumn(["a", "b"] * 2).codes.typecode == "B"
+    assert DictionaryColumn([str(i) for i in range(300)] * 2).codes.typecode == "H"
+
+
+def test_codes_are_translated_to_the_same_values_in_another_dictionary():
+    first  = DictionaryColumn(["a", "b", None, True, "a"])
+    second = DictionaryColumn([True, "c", "a", None])
+
+    translated: list[int] = first.translate_codes(second)
+
+    assert translated == [2, -1, 3, 0]
+    assert all(x == -1 or first.dictionary[i] == second.dictionary[x] for i, x in enumerate(translated))
+
+
+def test_dictionary_encoded_columns_are_compared_by_their_codes(tmp_path, monkeypatch):
+    first_rows  = [[i, ["Red", "Green", "Blue"][i % 3], i % 2 == 0] for i in range(12)]
+    second_rows = [[i, ["Blue", "Red", "Green"][i % 3] if i < 3 else row[1], row[2] if i != 5 else None]
+                   for i, row in zip(range(12), first_rows)]
+    write_table(str(tmp_path / "first.xlsx"),  ["Id", "Colour", "Even"], first_rows)
+    write_table(str(tmp_path / "second.xlsx"), ["Id", "Colour", "Even"], second_rows)
+
+    diff = TableDiff(TableReference(str(tmp_path / "first.xlsx"),  "Sheet1", "Table1"),
+                     TableReference(str(tmp_path / "second.xlsx"), "Sheet1", "Table1"),
+                     str(tmp_path / "result.xlsx"),
+                     ["Id"],
+                     columnwise_comparison = True,
+                     compact_columns       = True)
+
+    translated: list[list[Any]] = []
+    translate_codes = DictionaryColumn.translate_codes
+
+    def recording_translate_codes(column: DictionaryColumn, other: DictionaryColumn) -> list[int]:
+        translated.append(column.dictionary)
+        return translate_codes(column, other)
+
+    monkeypatch.setattr(DictionaryColumn, "translate_codes", recording_translate_codes)
+    result: DiffResult = diff.process()
+
+    assert translated == [["Red", "Green", "Blue"], [True, False]]
+    assert result.row_differences == [RowDifference((0,), [CellDifference("Colour", "Red", "Blue")]),
+                                      RowDifference((1,), [CellDifference("Colour", "Green", "Red")]),
+                                      RowDifference((2,), [CellDifference("Colour", "Blue", "Green")]),
+                                      RowDifference((5,), [CellDifference("Even", "False", "")])]
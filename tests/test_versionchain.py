@@ -0,0 +1,79 @@
+"""
+Tests of diffing each version of a table against the version before it.
+"""
+
+import os
+
+import pytest
+
+from columnartable import ColumnarTable
+from diff import CellDifference, RowDifference, TableDiff, TableReference
+from tests.workbooks import write_table
+from versionchain import VersionChain
+
+
+_VERSIONS: list[list[list]] = [[[1, "a"], [2, "b"], [3, "c"]],
+                               [[1, "a"], [2, "B"], [3, "c"]],
+                               [[1, "a"], [2, "B"], [4, "d"]]]
+
+
+@pytest.fixture
+def version_refs(tmp_path) -> list[TableReference]:
+    """
+    Writes each version of a table to its own file.
+    :return: References to each version, in order.
+    """
+
+    result: list[TableReference] = []
+
+    for version_no, rows in enumerate(_VERSIONS):
+        path: str = str(tmp_path / f"v{version_no}.xlsx")
+        write_table(path, ["Id", "Value"], rows)
+        result.append(TableReference(path, "Sheet1", "Table1"))
+
+    return result
+
+
+@pytest.fixture
+def loaded_filepaths(monkeypatch) -> list[str]:
+    """
+    Records the filepath of every table loaded from an Excel file.
+    :return: The list the filepaths are recorded in, as they're loaded.
+    """
+
+    result: list[str] = []
+    load_from_file = ColumnarTable.load_from_file
+
+    def recording_load_from_file(filepath, *args, **kwargs) -> ColumnarTable:
+        result.append(os.path.basename(filepath))
+        return load_from_file(filepath, *args, **kwargs)
+
+    monkeypatch.setattr(ColumnarTable, "load_from_file", staticmethod(recording_load_from_file))
+    return result
+
+
+def test_each_version_is_loaded_once_and_diffed_against_the_one_before(tmp_path, version_refs, loaded_filepaths):
+    chain = VersionChain(version_refs[0], ["Id"])
+
+    first: TableDiff = chain.process_and_save_next(version_refs[1], str(tmp_path / "1.xlsx"))
+    second: TableDiff = chain.process_and_save_next(version_refs[2], str(tmp_path / "2.xlsx"))
+
+    assert loaded_filepaths == ["v0.xlsx", "v1.xlsx", "v2.xlsx"]
+    assert first.row_differences == [RowDifference((2,), [CellDifference("Value", "b", "B")])]
+    assert second.row_differences == []
+    assert second.rows_only_in_first == [(3, "c")] and second.rows_only_in_second == [(4, "d")]
+    assert chain.latest_version == version_refs[2]
+
+
+def test_the_latest_version_is_loaded_again_if_its_file_changes(tmp_path, version_refs, loaded_filepaths):
+    chain = VersionChain(version_refs[0], ["Id"])
+    chain.process_and_save_next(version_refs[1], str(tmp_path / "1.xlsx"))
+
+    write_table(version_refs[1].filepath, ["Id", "Value"], [[1, "a"], [2, "b"], [3, "C"]])
+    stat: os.stat_result = os.stat(version_refs[1].filepath)
+    os.utime(version_refs[1].filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    diff: TableDiff = chain.process_and_save_next(version_refs[2], str(tmp_path / "2.xlsx"))
+
+    assert loaded_filepaths == ["v0.xlsx", "v1.xlsx", "v1.xlsx", "v2.xlsx"]
+    assert diff.row_differences == [RowDifference((2,), [CellDifference("Value", "b", "B")])]
+    assert diff.rows_only_in_first == [(3, "C")]
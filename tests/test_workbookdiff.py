@@ -0,0 +1,70 @@
+"""
+Tests of diffing every table in one Excel file against its counterpart in another.
+"""
+
+import openpyxl
+import pytest
+
+import tablecache
+from tests.workbooks import TableSpec, write_workbook
+from workbookdiff import WorkbookDiff
+
+
+@pytest.fixture
+def filepaths(tmp_path) -> tuple[str, str]:
+    """
+    Writes a pair of files of several tables each: one table in both under the same name, one renamed, and one only in
+    each file.
+    :return: The filepaths of the first and second files.
+    """
+
+    first_path:  str = str(tmp_path / "first.xlsx")
+    second_path: str = str(tmp_path / "second.xlsx")
+
+    write_workbook(first_path,  [TableSpec("People", ["Id", "Name"], [[1, "Ann"], [2, "Bob"]], "Sheet1"),
+                                 TableSpec("Orders", ["No", "Qty"],  [[10, 1], [11, 2]],       "Sheet2"),
+                                 TableSpec("Old",    ["X"],          [["x"]],                  "Sheet2", "E1")])
+    write_workbook(second_path, [TableSpec("People", ["Id", "Name"], [[1, "Ann"], [2, "Rob"]], "Sheet1"),
+                                 TableSpec("Sales",  ["No", "Qty"],  [[10, 1], [12, 3]],       "Sheet1", "E1"),
+                                 TableSpec("New",    ["Y"],          [["y"]],                  "Sheet3")])
+
+    return first_path, second_path
+
+
+def test_paired_tables_are_diffed_into_one_file_with_a_summary(tmp_path, filepaths):
+    diff = WorkbookDiff(*filepaths, str(tmp_path / "result.xlsx"), {"People": ["Id"], "Orders": ["No"]},
+                        table_mapping={"Orders": "Sales"})
+
+    diff.process_and_save()
+    wb = openpyxl.load_workbook(str(tmp_path / "result.xlsx"))
+
+    assert wb.sheetnames == ["1 Differences", "2 Rows unique to first", "2 Rows unique to second", "Summary"]
+    assert [list(x) for x in wb["1 Differences"].values] == [["Id", "Name * 1", "Name * 2"], [2, "Bob", "Rob"]]
+    assert [list(x) for x in wb["2 Rows unique to second"].values] == [["No", "Qty"], [12, 3]]
+    assert [list(x) for x in wb["Summary"].values][1:] == [[1, "People", "People", 1, 0, 0, 0, 0],
+                                                           [2, "Orders", "Sales", 0, 1, 1, 0, 0],
+                                                           [None, "Old", None, None, None, None, None, None],
+                                                           [None, None, "New", None, None, None, None, None]]
+    assert len({x for sheet in wb for x in sheet.tables}) == 4
+
+
+def test_each_file_is_parsed_once(tmp_path, filepaths, monkeypatch):
+    parsed: list[list[tuple[str, str]]] = []
+    load_tables_from_file = tablecache.load_tables_from_file
+
+    def recording_load_tables_from_file(filepath, tables, *args):
+        parsed.append(list(tables))
+        return load_tables_from_file(filepath, tables, *args)
+
+    monkeypatch.setattr(tablecache, "load_tables_from_file", recording_load_tables_from_file)
+    diff = WorkbookDiff(*filepaths, str(tmp_path / "result.xlsx"), {"People": ["Id"], "Orders": ["No"]},
+                        table_mapping={"Orders": "Sales"}, read_only=True)
+
+    diff.process_and_save()
+
+    assert parsed == [[("Sheet1", "People"), ("Sheet2", "Orders")], [("Sheet1", "People"), ("Sheet1", "Sales")]]
+
+
+def test_tables_missing_from_either_file_raise_key_error(tmp_path, filepaths):
+    with pytest.raises(KeyError):
+        WorkbookDiff(*filepaths, str(tmp_path / "result.xlsx"), {"Orders": ["No"]}).process_and_save()
@@ -0,0 +1,97 @@
+"""
+Contains functions for writing the Excel files the tests diff and read, each containing tables of given values.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Sequence
+
+import openpyxl
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string, get_column_letter
+from openpyxl.worksheet.table import Table
+
+
+@dataclass
+class TableSpec:
+    """The contents and placement of a table to write to a test workbook."""
+
+    table_name: str
+    """The name of the table."""
+
+    column_names: list[str]
+    """The names of the table's columns, in order."""
+
+    rows: Sequence[Sequence[Any]]
+    """The values of each row of the table, in column order."""
+
+    sheet_name: str = "Sheet1"
+    """The name of the sheet to put the table on. Sheets are created as they're first named."""
+
+    top_left: str = "A1"
+    """The cell the table's header row starts in."""
+
+    totals_row: Sequence[Any] | None = None
+    """The values of the table's totals row, in column order, or None for the table to have no totals row."""
+
+    number_formats: dict[str, str] = field(default_factory=dict)
+    """The number format to give the cells of particular columns, mapped against the names of the columns."""
+
+
+def write_workbook(filepath: str, tables: list[TableSpec], epoch: Any = None) -> None:
+    """
+    Writes an Excel file containing the given tables.
+    :param filepath: The filepath to write the file to.
+    :param tables: The tables to write, on the sheets they name, in order.
+    :param epoch: The date system of the workbook, as an openpyxl calendar (e.g. `CALENDAR_MAC_1904`), or None for the
+                  default 1900 date system.
+    """
+
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+
+    if(epoch is not None):
+        wb.epoch = epoch
+
+    for spec in tables:
+        sheet = wb[spec.sheet_name] if spec.sheet_name in wb.sheetnames else wb.create_sheet(spec.sheet_name)
+        column_letter, first_row = coordinate_from_string(spec.top_left)
+        first_column: int = column_index_from_string(column_letter)
+        body: list[Sequence[Any]] = [spec.column_names, *spec.rows]
+
+        if(spec.totals_row is not None):
+            body.append(spec.totals_row)
+
+        for row_offset, row in enumerate(body):
+            for column_offset, value in enumerate(row):
+                cell = sheet.cell(first_row + row_offset, first_column + column_offset, value)
+                number_format: str | None = spec.number_formats.get(spec.column_names[column_offset])
+
+                if(row_offset != 0 and number_format is not None):
+                    cell.number_format = number_format
+
+        last_cell: str = f"{get_column_letter(first_column + len(spec.column_names) - 1)}{first_row + len(body) - 1}"
+        table = Table(displayName=spec.table_name, ref=f"{spec.top_left}:{last_cell}")
+
+        if(spec.totals_row is not None):
+            table.totalsRowCount = 1
+
+        sheet.add_table(table)
+
+    wb.save(filepath)
+
+
+def write_table(filepath:     str,
+                column_names: list[str],
+                rows:         Sequence[Sequence[Any]],
+                sheet_name:   str = "Sheet1",
+                table_name:   str = "Table1") \
+        -> None:
+    """
+    Writes an Excel file containing a single table, starting in the top-left cell of its sheet.
+    :param filepath: The filepath to write the file to.
+    :param column_names: The names of the table's columns, in order.
+    :param rows: The values of each row of the table, in column order.
+    :param sheet_name: The name of the sheet containing the table.
+    :param table_name: The name of the table.
+    """
+
+    write_workbook(filepath, [TableSpec(table_name, column_names, rows, sheet_name)])
@@ -0,0 +1,150 @@
+"""
+Contains the VersionChain class, for diffing each version of a table against the version before it.
+"""
+
+from typing import Callable
+
+from columnartable import ColumnarTable
+from diff import ProgressEvent, TableDiff, TableReference
+from snapshotcache import SnapshotCache
+from tablecache import TableCache
+
+
+class VersionChain:
+    """
+    A chain of versions of the same table, such as successive copies of a report, each diffed against the one before.
+
+    The table and key index of the newer version in each diff are kept once the diff is done, and used as the older
+    version in the next diff, rather than being loaded and indexed again. A chain of N versions therefore loads and
+    indexes N tables, rather than the 2(N-1) that diffing each pair separately would take. Only the latest version is
+    kept in memory.
+
+    Where the latest version's file has changed since it was diffed, it's loaded and indexed again.
+    """
+
+    key_column_names: list[str]
+    """The names of the columns that collectively form a unique identifier in every version of the table."""
+
+    read_only: bool
+    """Whether to load the versions of the table in read-only mode, as with `TableDiff.read_only`."""
+
+    columnwise_comparison: bool
+    """Whether to compare common rows column by column, as with `TableDiff.columnwise_comparison`."""
+
+    concurrent_load: bool
+    """
+    Whether to load both versions of the table concurrently, as with `TableDiff.concurrent_load`. This only applies to
+    the first diff in the chain, as only the newer version needs to be loaded in later diffs.
+    """
+
+    direct_parse: bool
+    """Whether, in read-only mode, to parse the versions' worksheets directly, as with `TableDiff.direct_parse`."""
+
+    snapshot_cache: SnapshotCache | None
+    """A cache on disk to read the versions from and snapshot them to, as with `TableDiff.snapshot_cache`, or None."""
+
+    progress_callback: Callable[[ProgressEvent], None] | None
+    """A function to call with the progress of each diff in the chain, as with `TableDiff.progress_callback`."""
+
+    latest_version: TableReference
+    """A reference to the latest version of the table in the chain, which the next version will be diffed against."""
+
+    _latest_index: dict[tuple[str, ...], int] | None
+    """
+    The key index of the latest version of the table, as built by the last diff in the chain, or None if it hasn't been
+    indexed yet.
+    """
+
+    _table_cache: TableCache
+    """A cache holding the values of the latest version of the table, once it's been loaded."""
+
+    def __init__(self,
+                 first:                 TableReference,
+                 key_column_names:      list[str],
+                 read_only:             bool = False,
+                 columnwise_comparison: bool = False,
+                 concurrent_load:       bool = False,
+                 direct_parse:          bool = False,
+                 snapshot_cache:        SnapshotCache | None = None,
+                 progress_callback:     Callable[[ProgressEvent], None] | None = None):
+        """
+        Creates a new VersionChain object, starting from the given version of a table. Nothing is loaded until the
+        first diff in the chain is processed.
+        :param first: A reference to the earliest version of the table.
+        :param key_column_names: The names of the columns common to every version of the table that collectively form a
+                                 uniquely-identifying key.
+        :param read_only: Whether to load the versions of the table in read-only mode.
+        :param columnwise_comparison: Whether to compare common rows column by column, rather than row by row.
+        :param concurrent_load: Whether to load both versions of the table at the same time in the first diff.
+        :param direct_parse: Whether, in read-only mode, to read the versions by parsing their worksheets directly.
+        :param snapshot_cache: A cache on disk to read the versions and their key indices from where they've already
+                               been parsed, and to snapshot them to once they are.
+        :param progress_callback: A function to call with progress events for each diff in the chain.
+        """
+
+        self.key_column_names      = key_column_names
+        self.read_only             = read_only
+        self.columnwise_comparison = columnwise_comparison
+        self.concurrent_load       = concurrent_load
+        self.direct_parse          = direct_parse
+        self.snapshot_cache        = snapshot_cache
+        self.progress_callback     = progress_callback
+
+        self.latest_version = first
+        self._latest_index  = None
+        self._table_cache   = TableCache(max_bytes=None)
+
+    def process_and_save_next(self, version: TableReference, result_filepath: str) -> TableDiff:
+        """
+        Diffs the next version of the table against the latest version in the chain, and saves the differences. The
+        given version becomes the latest version in the chain, even if the diff fails.
+        :param version: A reference to the next version of the table.
+        :param result_filepath: The filepath the differences should be saved to.
+        :return: The diff processed, with information about the differences between the two versions available in it.
+        """
+
+        previous_version: TableReference = self.latest_version
+        diff = TableDiff(previous_version,
+                         version,
+                         result_filepath,
+                         self.key_column_names,
+                         read_only             = self.read_only,
+                         columnwise_comparison = self.columnwise_comparison,
+                         concurrent_load       = self.concurrent_load,
+                         progress_callback     = self.progress_callback,
+                         table_cache           = self._table_cache,
+                         direct_parse          = self.direct_parse,
+                         snapshot_cache        = self.snapshot_cache)
+
+        # The previous index only describes the table in the cache if its file hasn't changed since it was loaded.
+        if(self._latest_index is not None
+                and self._table_cache.get_cached_table(previous_version.filepath, previous_version.sheet_name,
+                                                       previous_version.table_name, self.read_only) is not None):
+            diff.use_first_key_index(self._latest_index)
+
+        self.latest_version = version
+        self._latest_index  = None
+
+        try:
+            diff.process_and_save()
+        finally:
+            self._keep_only_latest_table()
+
+        self._latest_index = diff.row_numbers_for_key_sets_in_second
+        return diff
+
+    def _keep_only_latest_table(self) -> None:
+        """
+        Removes every table but the latest version of the table from the chain's cache, so earlier versions aren't kept
+        in memory.
+        """
+
+        latest_table: ColumnarTable | None \
+            = self._table_cache.get_cached_table(self.latest_version.filepath, self.latest_version.sheet_name,
+                                               self.latest_version.table_name, self.read_only)
+
+        self._table_cache.clear()
+
+        if(latest_table is not None):
+            self._table_cache.add_table(self.latest_version.filepath, self.latest_version.sheet_name,
+                                        self.latest_version.table_name, self.read_only, latest_table)
@@ -0,0 +1,246 @@
+"""
+Contains the WorkbookDiff class, for diffing every table in one Excel file against its counterpart in another.
+"""
+
+from typing import Any, Callable
+
+import openpyxl
+
+from diff import ProgressEvent, TableDiff, TableReference
+from tablecache import TableCache
+from tablewriter import append_table_sheet
+from xlsxmetadata import TableDefinition, read_table_definitions
+
+
+_SUMMARY_COLUMN_NAMES: list[str] = ["No.", "First table", "Second table", "Differences", "Rows unique to first",
+                                    "Rows unique to second", "Columns unique to first", "Columns unique to second"]
+"""The names of the columns of the summary sheet of a workbook diff's result file."""
+
+
+class WorkbookDiff:
+    """
+    A queued difference between two Excel files, each containing several tables.
+
+    Tables in the first file are paired with the tables of the same name in the second, or with the tables given in an
+    explicit mapping, and each pair is diffed with its own key columns. Each file is parsed only once, however many
+    tables are taken from it, and the differences between every pair of tables are saved to the same file.
+
+    The file produced starts with the sheets of each pair of tables, as saved by `TableDiff.process_and_save()`, with
+    the number of the pair before each sheet's name. (e.g. "2 Differences") It ends with a summary sheet, listing the
+    number and names of each pair of tables and how many differences of each kind were found between them, along with
+    any tables in either file that weren't paired.
+    """
+
+    first_filepath: str
+    """The filepath of one of the Excel files being compared."""
+
+    second_filepath: str
+    """The filepath of the other Excel file being compared."""
+
+    result_filepath: str
+    """The filepath at which to save the differences."""
+
+    key_column_names: dict[str, list[str]]
+    """
+    The names of the key columns of each table to compare, mapped against the name of the table in the first file. Only
+    the tables given here are compared.
+    """
+
+    table_mapping: dict[str, str]
+    """
+    The name of the table in the second file to compare each table in the first file against, mapped against the name of
+    the table in the first file, where they're named differently. Tables not given here are paired by name.
+    """
+
+    read_only: bool
+    """Whether to load the files in read-only mode, as with `TableDiff.read_only`."""
+
+    columnwise_comparison: bool
+    """Whether to compare common rows column by column, as with `TableDiff.columnwise_comparison`."""
+
+    direct_parse: bool
+    """Whether, in read-only mode, to parse the files' worksheets directly, as with `TableDiff.direct_parse`."""
+
+    compact_columns: bool
+    """Whether to store the columns of the tables loaded compactly, as with `TableDiff.compact_columns`."""
+
+    progress_callback: Callable[[ProgressEvent], None] | None
+    """A function to call with the progress of each pair of tables' diff, as with `TableDiff.progress_callback`."""
+
+    table_diffs: list[TableDiff]
+    """
+    The diff of each pair of tables, in the order they're given in the key column names. Only available once processed.
+    """
+
+    tables_only_in_first: list[str]
+    """The names of the tables in the first file that weren't compared. Only available once processed."""
+
+    tables_only_in_second: list[str]
+    """The names of the tables in the second file that weren't compared. Only available once processed."""
+
+    def __init__(self,
+                 first_filepath:        str,
+                 second_filepath:       str,
+                 result_filepath:       str,
+                 key_column_names:      dict[str, list[str]],
+                 table_mapping:         dict[str, str] | None = None,
+                 read_only:             bool = False,
+                 columnwise_comparison: bool = False,
+                 direct_parse:          bool = False,
+                 compact_columns:       bool = False,
+                 progress_callback:     Callable[[ProgressEvent], None] | None = None):
+        """
+        Creates a new WorkbookDiff object. This does not immediately process the difference. To process the difference,
+        call `.process_and_save()`.
+        :param first_filepath: The filepath of the first Excel file being compared.
+        :param second_filepath: The filepath of the second Excel file being compared.
+        :param result_filepath: The filepath the differences should be saved to.
+        :param key_column_names: The names of the key columns of each table to compare, mapped against the name of the
+                                 table in the first file. Only these tables are compared.
+        :param table_mapping: The name of the table in the second file to compare each table in the first file against,
+                              mapped against the name of the table in the first file, for tables named differently in
+                              the two files. Tables not given here are compared against the table of the same name.
+        :param read_only: Whether to load the files in read-only mode.
+        :param columnwise_comparison: Whether to compare common rows column by column, rather than row by row.
+        :param direct_parse: Whether, in read-only mode, to read the tables by parsing their worksheets directly.
+        :param compact_columns: Whether to store the columns of the tables loaded compactly, rather than as lists.
+        :param progress_callback: A function to call with progress events for the diff of each pair of tables.
+        """
+
+        self.first_filepath        = first_filepath
+        self.second_filepath       = second_filepath
+        self.result_filepath       = result_filepath
+        self.key_column_names      = key_column_names
+        self.table_mapping         = table_mapping if table_mapping is not None else {}
+        self.read_only             = read_only
+        self.columnwise_comparison = columnwise_comparison
+        self.direct_parse          = direct_parse
+        self.compact_columns       = compact_columns
+        self.progress_callback     = progress_callback
+
+        self.table_diffs           = []
+        self.tables_only_in_first  = []
+        self.tables_only_in_second = []
+
+    def process_and_save(self) -> None:
+        """
+        Processes the differences between each pair of tables in the two files, and saves them all to an Excel file at
+        the filepath stored.
+
+        Every table needed from each file is loaded from it together, so each file is parsed only once. The differences
+        of each pair of tables are written to the result file as soon as they're found.
+
+        After calling this, the diff of each pair of tables will be available in this object.
+        :raises KeyError: If any of the tables to compare isn't in its file.
+        """
+
+        self.table_diffs = self._create_table_diffs()
+        table_cache: TableCache = self._load_tables()
+        wb = openpyxl.Workbook(write_only=True)
+
+        try:
+            for pair_no, diff in enumerate(self.table_diffs, start=1):
+                diff.table_cache = table_cache
+                diff.process_into_workbook(wb, f"{pair_no} ", f"T{pair_no}_")
+                diff.table_cache = None
+        finally:
+            table_cache.clear()
+
+        append_table_sheet(wb, "Summary", "Summary", _SUMMARY_COLUMN_NAMES, self._get_summary_rows())
+        wb.save(self.result_filepath)
+
+    def _create_table_diffs(self) -> list[TableDiff]:
+        """
+        Pairs the tables to compare in the first file with their counterparts in the second, and records the tables that
+        aren't compared.
+        :return: The diff of each pair of tables, in the order they're given in the key column names.
+        :raises KeyError: If any of the tables to compare isn't in its file.
+        """
+
+        first_definitions: dict[str, TableDefinition] \
+            = {x.table_name: x for x in read_table_definitions(self.first_filepath)}
+
+        second_definitions: dict[str, TableDefinition] \
+            = {x.table_name: x for x in read_table_definitions(self.second_filepath)}
+
+        result: list[TableDiff] = []
+
+        for first_name, key_column_names in self.key_column_names.items():
+            second_name: str = self.table_mapping.get(first_name, first_name)
+
+            if(first_name not in first_definitions):
+                raise KeyError(f"No table named \"{first_name}\" in {self.first_filepath}")
+
+            if(second_name not in second_definitions):
+                raise KeyError(f"No table named \"{second_name}\" in {self.second_filepath}")
+
+            result.append(TableDiff(self._get_table_ref(self.first_filepath, first_definitions[first_name]),
+                                    self._get_table_ref(self.second_filepath, second_definitions[second_name]),
+                                    self.result_filepath,
+                                    key_column_names,
+                                    read_only             = self.read_only,
+                                    columnwise_comparison = self.columnwise_comparison,
+                                    progress_callback     = self.progress_callback,
+                                    direct_parse          = self.direct_parse,
+                                    compact_columns       = self.compact_columns))
+
+        compared_in_first:  set[str] = {x.first_table_ref.table_name for x in result}
+        compared_in_second: set[str] = {x.second_table_ref.table_name for x in result}
+        self.tables_only_in_first  = [x for x in first_definitions if x not in compared_in_first]
+        self.tables_only_in_second = [x for x in second_definitions if x not in compared_in_second]
+        return result
+
+    def _load_tables(self) -> TableCache:
+        """
+        Loads every table to compare, parsing each file only once, even where both sides are in the same file.
+        :return: A cache containing the values of every table to compare.
+        """
+
+        table_cache = TableCache(max_bytes=None)
+        tables_by_file: dict[str, list[tuple[str, str]]] = {}
+
+        for diff in self.table_diffs:
+            for ref in (diff.first_table_ref, diff.second_table_ref):
+                tables: list[tuple[str, str]] = tables_by_file.setdefault(ref.filepath, [])
+
+                if((ref.sheet_name, ref.table_name) not in tables):
+                    tables.append((ref.sheet_name, ref.table_name))
+
+        for filepath, tables in tables_by_file.items():
+            table_cache.get_tables(filepath, tables, self.read_only, self.direct_parse, self.compact_columns)
+
+        return table_cache
+
+    def _get_summary_rows(self) -> list[list[Any]]:
+        """
+        Gets the rows of the summary sheet of the result file.
+        :return: A row for each pair of tables compared, giving its number, the names of its tables, and the number of
+                 differences of each kind found between them, followed by a row for each table that wasn't compared.
+        """
+
+        result: list[list[Any]] = []
+
+        for pair_no, diff in enumerate(self.table_diffs, start=1):
+            result.append([pair_no,
+                           diff.first_table_ref.table_name,
+                           diff.second_table_ref.table_name,
+                           len(diff.row_differences),
+                           len(diff.rows_only_in_first),
+                           len(diff.rows_only_in_second),
+                           len(diff.columns_only_in_first),
+                           len(diff.columns_only_in_second)])
+
+        result.extend([None, x, None, None, None, None, None, None] for x in self.tables_only_in_first)
+        result.extend([None, None, x, None, None, None, None, None] for x in self.tables_only_in_second)
+        return result
+
+    @staticmethod
+    def _get_table_ref(filepath: str, definition: TableDefinition) -> TableReference:
+        """
+        Gets a reference to a table from its definition.
+        :param filepath: The filepath of the Excel file containing the table.
+        :param definition: The definition of the table.
+        :return: A reference to the table.
+        """
+
+        return TableReference(filepath, definition.sheet_name, definition.table_name)
@@ -0,0 +1,193 @@
+"""
+Contains functions for reading information about the tables in an Excel file directly from the parts of the file,
+without loading any of the file's cell data.
+"""
+
+import posixpath
+import zipfile
+from dataclasses import dataclass
+from xml.etree import ElementTree
+
+from openpyxl.utils.cell import range_boundaries
+
+
+_MAIN_NS:         str = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_RELATIONSHIP_NS: str = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PACKAGE_REL_NS:  str = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_OFFICE_DOCUMENT_REL_TYPE: str = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_TABLE_REL_TYPE:           str = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/table"
+
+
+@dataclass
+class TableDefinition:
+    """The definition of a table in an Excel file, as read from the file's table part."""
+
+    sheet_name: str
+    """The name of the sheet the table is on."""
+
+    table_name: str
+    """The name of the table."""
+
+    ref: str
+    """The range of cells the table covers, in A1 notation. (e.g. "B3:F100") This includes header and totals rows."""
+
+    column_names: list[str]
+    """The names of the table's columns, in order."""
+
+    header_row_count: int
+    """The number of header rows at the top of the table's range. This is 1 unless the table's header row is hidden."""
+
+    totals_row_count: int
+    """The number of totals rows at the bottom of the table's range."""
+
+    worksheet_path: str
+    """The path, within the Excel file, of the worksheet part containing the table."""
+
+    @property
+    def cell_count(self) -> int:
+        """The number of cells in the table's range, including any header and totals rows."""
+
+        min_col, min_row, max_col, max_row = range_boundaries(self.ref)
+        return (max_col - min_col + 1) * (max_row - min_row + 1)
+
+
+def read_table_definitions(filepath: str) -> list[TableDefinition]:
+    """
+    Reads the definitions of every table in an Excel file, without loading any cell data.
+    :param filepath: The filepath of the Excel file.
+    :return: A list of the definitions of the tables in the file, in order of the sheets they're on.
+    """
+
+    result: list[TableDefinition] = []
+
+    with zipfile.ZipFile(filepath) as archive:
+        for sheet_name, worksheet_path in _read_worksheet_paths(archive):
+            for table_path in read_related_paths(archive, worksheet_path, _TABLE_REL_TYPE):
+                result.append(_read_table_definition(archive, sheet_name, worksheet_path, table_path))
+
+    return result
+
+
+def get_table_definition(filepath: str, sheet_name: str, table_name: str) -> TableDefinition:
+    """
+    Reads the definition of a specific table in an Excel file, without loading any cell data.
+    :param filepath: The filepath of the Excel file.
+    :param sheet_name: The name of the sheet the table is on.
+    :param table_name: The name of the table.
+    :return: The definition of the named table.
+    :raises KeyError: If there is no table with the given name on the given sheet.
+    """
+
+    for table_def in read_table_definitions(filepath):
+        if(table_def.sheet_name == sheet_name and table_def.table_name == table_name):
+            return table_def
+
+    raise KeyError(f"No table named \"{table_name}\" on sheet \"{sheet_name}\" in {filepath}")
+
+
+def read_workbook_path(archive: zipfile.ZipFile) -> str:
+    """
+    Gets the path of the workbook part of an Excel file.
+    :param archive: The Excel file, opened as a zip archive.
+    :return: The path of the workbook part in the archive. (Usually "xl/workbook.xml")
+    """
+
+    return read_related_paths(archive, "", _OFFICE_DOCUMENT_REL_TYPE)[0]
+
+
+def read_related_paths(archive: zipfile.ZipFile, source_path: str, relationship_type: str) -> list[str]:
+    """
+    Gets the paths of the parts related to a given part by relationships of a given type.
+    :param archive: The Excel file, opened as a zip archive.
+    :param source_path: The path of the part whose relationships should be read. An empty string refers to the package
+                        itself.
+    :param relationship_type: The type of the relationships to follow.
+    :return: A list of paths within the archive.
+    """
+
+    return list(_read_relationship_targets(archive, source_path, relationship_type).values())
+
+
+def _read_worksheet_paths(archive: zipfile.ZipFile) -> list[tuple[str, str]]:
+    """
+    Reads the names of the sheets in an Excel file, along with the paths of the worksheet parts for them.
+    :param archive: The Excel file, opened as a zip archive.
+    :return: A list of tuples, where each tuple contains the name of a sheet and the path of its part in the archive.
+    """
+
+    workbook_path: str = read_workbook_path(archive)
+    targets_by_id: dict[str, str] = _read_relationship_targets(archive, workbook_path)
+    workbook_xml = ElementTree.fromstring(archive.read(workbook_path))
+    result: list[tuple[str, str]] = []
+
+    for sheet in workbook_xml.iter(f"{{{_MAIN_NS}}}sheet"):
+        target: str | None = targets_by_id.get(sheet.get(f"{{{_RELATIONSHIP_NS}}}id"))
+
+        # Chartsheets and dialogsheets are listed alongside worksheets, but can't contain tables.
+        if(target is not None and target in archive.namelist()):
+            result.append((sheet.get("name"), target))
+
+    return result
+
+
+def _read_table_definition(archive: zipfile.ZipFile, sheet_name: str, worksheet_path: str, table_path: str) \
+        -> TableDefinition:
+    """
+    Reads a table part from an Excel file.
+    :param archive: The Excel file, opened as a zip archive.
+    :param sheet_name: The name of the sheet the table is on.
+    :param worksheet_path: The path of the worksheet part the table is on.
+    :param table_path: The path of the table part.
+    :return: The definition of the table.
+    """
+
+    table_xml = ElementTree.fromstring(archive.read(table_path))
+    column_names: list[str] = [x.get("name") for x in table_xml.iter(f"{{{_MAIN_NS}}}tableColumn")]
+
+    return TableDefinition(sheet_name       = sheet_name,
+                           table_name       = table_xml.get("name") or table_xml.get("displayName"),
+                           ref              = table_xml.get("ref"),
+                           column_names     = column_names,
+                           header_row_count = int(table_xml.get("headerRowCount", "1")),
+                           totals_row_count = int(table_xml.get("totalsRowCount", "0")),
+                           worksheet_path   = worksheet_path)
+
+
+def _read_relationship_targets(archive: zipfile.ZipFile, source_path: str, relationship_type: str | None = None) \
+        -> dict[str, str]:
+    """
+    Reads the relationships of a part in an Excel file.
+    :param archive: The Excel file, opened as a zip archive.
+    :param source_path: The path of the part whose relationships should be read. An empty string refers to the package
+                        itself.
+    :param relationship_type: If given, only relationships of this type are read.
+    :return: A dictionary of the paths of the targets of the part's relationships, mapped against the relationship IDs.
+    """
+
+    source_dir, source_name = posixpath.split(source_path)
+    rels_path: str = posixpath.join(source_dir, "_rels", f"{source_name}.rels")
+
+    if(rels_path not in archive.namelist()):
+        return {}
+
+    rels_xml = ElementTree.fromstring(archive.read(rels_path))
+    result: dict[str, str] = {}
+
+    for rel in rels_xml.iter(f"{{{_PACKAGE_REL_NS}}}Relationship"):
+        if(relationship_type is not None and rel.get("Type") != relationship_type):
+            continue
+
+        if(rel.get("TargetMode") == "External"):
+            continue
+
+        target: str = rel.get("Target")
+
+        if(target.startswith("/")):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join(source_dir, target))
+
+        result[rel.get("Id")] = target
+
+    return result